@@ -0,0 +1,209 @@
+"""
+Benchmark del historial del chatbot: completo vs incremental
+Simula una interfaz de chat que refresca el historial: cada sesión envía
+--turnos mensajes y después de cada uno sondea el historial --sondeos veces,
+con obtener_historial (la conversación completa en cada refresco) y con
+obtener_historial_incremental (solo los mensajes nuevos, unidos al historial
+local; ver flujo_07). El orden de los dos modos se alterna en cada sondeo.
+
+Por tamaño de la conversación se comparan p50/p95 y bytes recibidos de cada
+modo, y en cada sondeo se verifica que el historial local incremental tenga
+los mismos mensajes (id, rol y texto) que el completo.
+
+Al final de cada sesión se prueba además un reinicio hecho por otro cliente:
+la conversación se reinicia sin que este cliente se entere y vuelve a crecer
+más allá de su cursor local antes del siguiente sondeo (los ids vuelven a
+empezar en 1, así que un corte por desde_id mezclaría las dos conversaciones).
+
+Ejecución:
+    python benchmark_historial.py
+    python benchmark_historial.py --sesiones 5 --turnos 200 --sondeos 3
+    python benchmark_historial.py --turnos 500 --tramo 100 --salida salida_benchmark_historial.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from carga_chatbot import CORPUS
+from http_client import cliente
+from latencias import percentil
+from registro_http import registro
+
+import flujo_07_chatbot as chatbot
+
+MODOS = {
+    'completo': chatbot.obtener_historial,
+    'incremental': chatbot.obtener_historial_incremental,
+}
+
+
+def _salida(mensaje):
+    """Imprime en la consola real aunque stdout esté silenciado durante el benchmark"""
+    print(mensaje, file=sys.__stdout__, flush=True)
+
+
+def _contenido(mensajes: list) -> list:
+    return [(m.get('id'), m.get('rol'), m.get('mensaje')) if isinstance(m, dict) else m for m in mensajes]
+
+
+def caso_reinicio(session_id: str, frases: list) -> bool:
+    """
+    Otro cliente reinicia la conversación y esta crece más allá del cursor local
+    antes del siguiente sondeo. Retorna True si el historial incremental sigue
+    coincidiendo con el completo.
+    """
+    guardado = chatbot.historiales.get(session_id)
+    chatbot.reiniciar_conversacion(session_id, "Reinicio desde otro cliente")
+    if guardado is not None:
+        chatbot.historiales[session_id] = guardado  # este cliente no se enteró del reinicio
+    # Cada turno agrega dos mensajes (usuario y bot)
+    for turno in range((guardado or {}).get('ultimo_id', 0) // 2 + 1):
+        chatbot.enviar_mensaje(session_id, frases[turno % len(frases)], f"Turno {turno + 1} tras el reinicio")
+    _, completo = chatbot.obtener_historial(session_id, "Historial completo")
+    _, incremental = chatbot.obtener_historial_incremental(session_id, "Historial incremental")
+    return _contenido(completo.get('mensajes', [])) == _contenido(incremental.get('mensajes', []))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compara el historial del chatbot completo vs incremental')
+    parser.add_argument('--sesiones', type=int, default=3, help='Conversaciones a simular (default: 3)')
+    parser.add_argument('--turnos', type=int, default=100, help='Mensajes por conversación (default: 100)')
+    parser.add_argument('--sondeos', type=int, default=2,
+                        help='Refrescos del historial por turno y modo (default: 2)')
+    parser.add_argument('--tramo', type=int, default=20,
+                        help='Mensajes por fila de la tabla de resultados (default: 20)')
+    parser.add_argument('--salida', default='salida_benchmark_historial.json',
+                        help='Reporte JSON (default: salida_benchmark_historial.json)')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    frases = [paso if isinstance(paso, str) else paso['mensaje'] for conversacion in CORPUS for paso in conversacion]
+
+    ultima = {}
+
+    def observar(metodo, url, status, duracion, tiempos):
+        ultima['tiempos'] = tiempos or {}
+
+    cliente.observadores.append(observar)
+    registro.configurar(modo='silencio')
+
+    _salida("=" * 80)
+    _salida(f"  BENCHMARK HISTORIAL: {args.sesiones} sesiones x {args.turnos} turnos, "
+            f"{args.sondeos} sondeos por turno")
+    _salida("=" * 80)
+
+    # muestras[modo][tramo] = [(ms, bytes)]
+    muestras = {modo: defaultdict(list) for modo in MODOS}
+    diferencias = 0
+    reinicios_con_diferencias = 0
+    fallos = defaultdict(int)
+    inicio = time.time()
+
+    with contextlib.redirect_stdout(io.StringIO()) as silenciado:
+        for numero in range(args.sesiones):
+            session_id = str(uuid.uuid4())
+            for turno in range(1, args.turnos + 1):
+                exito, _ = chatbot.enviar_mensaje(session_id, frases[(turno - 1) % len(frases)], f"Turno {turno}")
+                if not exito:
+                    fallos['mensaje'] += 1
+                    continue
+                for sondeo in range(args.sondeos):
+                    orden = list(MODOS) if (turno + sondeo) % 2 else list(reversed(MODOS))
+                    historiales = {}
+                    for modo in orden:
+                        exito, data = MODOS[modo](session_id, f"Historial {modo}")
+                        if not exito:
+                            fallos[modo] += 1
+                            continue
+                        historiales[modo] = data.get('mensajes', [])
+                        tiempos = ultima.get('tiempos', {})
+                        muestras[modo][len(historiales[modo]) // args.tramo].append(
+                            (tiempos.get('total_ms') or 0.0, tiempos.get('bytes_recibidos') or 0)
+                        )
+                    if len(historiales) == 2 and (_contenido(historiales['completo'])
+                                                  != _contenido(historiales['incremental'])):
+                        diferencias += 1
+                silenciado.seek(0)
+                silenciado.truncate()
+            if not caso_reinicio(session_id, frases):
+                reinicios_con_diferencias += 1
+            _salida(f"⏱️  sesión {numero + 1}/{args.sesiones} en {time.time() - inicio:.1f}s")
+    cliente.observadores.remove(observar)
+    duracion = time.time() - inicio
+
+    filas = []
+    for tramo in sorted(set(muestras['completo']) | set(muestras['incremental'])):
+        fila = {'mensajes_desde': tramo * args.tramo, 'mensajes_hasta': (tramo + 1) * args.tramo - 1}
+        for modo in MODOS:
+            datos = muestras[modo].get(tramo, [])
+            tiempos = sorted(ms for ms, _ in datos)
+            fila[modo] = {
+                'sondeos': len(datos),
+                'p50_ms': round(percentil(tiempos, 50), 2),
+                'p95_ms': round(percentil(tiempos, 95), 2),
+                'bytes_promedio': round(sum(b for _, b in datos) / len(datos)) if datos else 0
+            }
+        filas.append(fila)
+
+    totales = {
+        modo: {
+            'sondeos': sum(len(d) for d in muestras[modo].values()),
+            'ms': round(sum(ms for d in muestras[modo].values() for ms, _ in d), 2),
+            'bytes': sum(b for d in muestras[modo].values() for _, b in d)
+        }
+        for modo in MODOS
+    }
+
+    _salida(f"\n{'MENSAJES':>11} | {'COMPLETO p50':>12} {'p95':>9} {'BYTES':>9} | "
+            f"{'INCREMENTAL p50':>15} {'p95':>9} {'BYTES':>7}")
+    _salida("-" * 86)
+    for fila in filas:
+        c, i = fila['completo'], fila['incremental']
+        _salida(f"{fila['mensajes_desde']:>5}-{fila['mensajes_hasta']:<5} | {c['p50_ms']:>10}ms {c['p95_ms']:>7}ms "
+                f"{c['bytes_promedio']:>9} | {i['p50_ms']:>13}ms {i['p95_ms']:>7}ms {i['bytes_promedio']:>7}")
+
+    completo, incremental = totales['completo'], totales['incremental']
+    if completo['bytes'] and completo['ms']:
+        _salida(f"\n📉 Incremental: {incremental['bytes'] / completo['bytes']:.1%} de los bytes y "
+                f"{incremental['ms'] / completo['ms']:.1%} del tiempo del historial completo")
+    if diferencias:
+        _salida(f"❌ {diferencias} sondeos con el historial incremental distinto del completo")
+    else:
+        _salida("✅ El historial incremental coincidió con el completo en todos los sondeos")
+    if reinicios_con_diferencias:
+        _salida(f"❌ {reinicios_con_diferencias}/{args.sesiones} reinicios desde otro cliente no detectados")
+    else:
+        _salida(f"✅ Reinicio desde otro cliente detectado en las {args.sesiones} sesiones")
+    if fallos:
+        _salida(f"⚠️  Peticiones fallidas: {dict(fallos)}")
+
+    reporte = {
+        'configuracion': {k: v for k, v in vars(args).items() if k != 'salida'},
+        'ejecucion': {
+            'inicio': datetime.fromtimestamp(inicio).isoformat(),
+            'duracion_segundos': round(duracion, 2)
+        },
+        'tramos': filas,
+        'totales': totales,
+        'diferencias': diferencias,
+        'reinicios_con_diferencias': reinicios_con_diferencias,
+        'fallos': dict(fallos),
+        'conexiones': cliente.estadisticas()
+    }
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+    _salida(f"📄 Reporte: {args.salida}")
+    cliente.cerrar()
+    sys.exit(1 if diferencias or reinicios_con_diferencias else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Caché HTTP en disco para los catálogos (GET condicional)
+Los catálogos (horarios, tipos y estados de consulta, servicios, odontólogos)
+casi no cambian, pero cada flujo los vuelve a pedir. Las respuestas 200 se
+guardan en SQLite con su ETag / Last-Modified:
+
+    - dentro de la ventana de frescura (Cache-Control max-age del servidor o
+      FLUJO_CACHE_FRESCO) se responden sin tocar la red
+    - pasada la ventana se revalidan con If-None-Match / If-Modified-Since;
+      un 304 reutiliza el cuerpo guardado
+
+La clave incluye tenant, URL con sus parámetros y un hash del header
+Authorization (cada rol puede ver un catálogo distinto). Al superar
+FLUJO_CACHE_MAX_ENTRADAS se eliminan las entradas usadas hace más tiempo (LRU).
+
+Cualquier POST/PUT/PATCH/DELETE que pase por http_client sobre la ruta de un
+catálogo borra sus entradas (listado y detalles, de todos los roles del
+tenant), así que un GET posterior no devuelve datos anteriores a la escritura.
+
+Variables de entorno:
+    FLUJO_CACHE_HTTP           1 activa la caché en http_client (default: 0, desactivada)
+    FLUJO_CACHE_ARCHIVO        base SQLite (default: .cache/http_cache.sqlite)
+    FLUJO_CACHE_FRESCO         segundos sin revalidar si el servidor no envía max-age (default: 60)
+    FLUJO_CACHE_MAX_ENTRADAS   entradas máximas antes de desalojar (default: 500)
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+ARCHIVO = os.environ.get('FLUJO_CACHE_ARCHIVO', os.path.join('.cache', 'http_cache.sqlite'))
+FRESCO_SEGUNDOS = float(os.environ.get('FLUJO_CACHE_FRESCO', '60'))
+MAX_ENTRADAS = int(os.environ.get('FLUJO_CACHE_MAX_ENTRADAS', '500'))
+
+# Rutas de catálogo (con o sin id al final)
+CATALOGOS = (
+    'citas/horarios/',
+    'citas/tipos-consulta/',
+    'citas/estados-consulta/',
+    'servicios/servicios/',
+    'profesionales/odontologos/',
+)
+_RUTA_CATALOGO = re.compile(r'/(%s)(\d+/)?$' % '|'.join(re.escape(c) for c in CATALOGOS))
+# Catálogo al que pertenece una ruta, incluidas sus sub-rutas (para invalidar)
+_CATALOGO_EN_RUTA = re.compile(r'/(%s)' % '|'.join(re.escape(c) for c in CATALOGOS))
+_MAX_AGE = re.compile(r'max-age=(\d+)')
+_HEADERS_DE_TRANSPORTE = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+
+class CacheHTTP:
+    """Caché de respuestas GET en SQLite con revalidación condicional y desalojo LRU"""
+
+    def __init__(self, archivo: str = ARCHIVO, fresco_segundos: float = FRESCO_SEGUNDOS,
+                 max_entradas: int = MAX_ENTRADAS, tenant: str = ''):
+        self.fresco_segundos = fresco_segundos
+        self.max_entradas = max_entradas
+        self.tenant = tenant
+        self.aciertos = 0
+        self.revalidados = 0
+        self.fallos = 0
+        self.invalidadas = 0
+        self._lock = threading.Lock()
+
+        directorio = os.path.dirname(archivo)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        self._db = sqlite3.connect(archivo, timeout=10, check_same_thread=False)
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS entradas (
+                clave TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                headers TEXT NOT NULL,
+                contenido BLOB NOT NULL,
+                fresco_hasta REAL NOT NULL,
+                usado REAL NOT NULL
+            )
+        ''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS entradas_usado ON entradas (usado)')
+        self._db.commit()
+
+    @staticmethod
+    def aplica(metodo: str, url: str) -> bool:
+        return metodo.upper() == 'GET' and bool(_RUTA_CATALOGO.search(urlsplit(url).path))
+
+    def _clave(self, url: str, kwargs: dict) -> str:
+        params = kwargs.get('params')
+        completa = url + (('&' if '?' in url else '?') + urlencode(sorted(params.items())) if params else '')
+        autorizacion = (kwargs.get('headers') or {}).get('Authorization', '')
+        token = hashlib.sha256(autorizacion.encode('utf-8')).hexdigest()[:16]
+        return f"{self.tenant or 'public'}|{token}|{completa}"
+
+    def consultar(self, url: str, kwargs: dict, enviar) -> requests.Response:
+        """
+        Responde un GET de catálogo desde la caché o usando enviar(**kwargs).
+        La respuesta lleva .desde_cache = 'fresco' | 'revalidado' | None.
+        """
+        clave = self._clave(url, kwargs)
+        ahora = time.time()
+        with self._lock:
+            fila = self._db.execute(
+                'SELECT etag, last_modified, headers, contenido, fresco_hasta FROM entradas WHERE clave = ?',
+                (clave,)
+            ).fetchone()
+
+        if fila and fila[4] > ahora:
+            self._tocar(clave, ahora)
+            with self._lock:
+                self.aciertos += 1
+            return _a_response(url, fila[2], fila[3], 'fresco')
+
+        if fila:
+            condicionales = {}
+            if fila[0]:
+                condicionales['If-None-Match'] = fila[0]
+            if fila[1]:
+                condicionales['If-Modified-Since'] = fila[1]
+            kwargs = dict(kwargs, headers={**(kwargs.get('headers') or {}), **condicionales})
+
+        response = enviar(**kwargs)
+
+        if response.status_code == 304 and fila:
+            headers = _sin_transporte({**json.loads(fila[2]), **dict(response.headers)})
+            self._guardar(clave, url, headers, fila[3], ahora)
+            with self._lock:
+                self.revalidados += 1
+            cacheada = _a_response(url, json.dumps(headers), fila[3], 'revalidado')
+            cacheada.tiempos = getattr(response, 'tiempos', None)
+            return cacheada
+
+        with self._lock:
+            self.fallos += 1
+        if response.status_code == 200:
+            self._guardar(clave, url, dict(response.headers), response.content, ahora)
+        response.desde_cache = None
+        return response
+
+    def invalidar(self, url: str) -> int:
+        """Borra las entradas del tenant para el catálogo de `url`; retorna cuántas"""
+        partes = urlsplit(url)
+        catalogo = _CATALOGO_EN_RUTA.search(partes.path)
+        if not catalogo:
+            return 0
+        prefijo = f"{partes.scheme}://{partes.netloc}{partes.path[:catalogo.end()]}"
+        with self._lock:
+            borradas = self._db.execute(
+                'DELETE FROM entradas WHERE substr(url, 1, ?) = ? AND substr(clave, 1, ?) = ?',
+                (len(prefijo), prefijo, len(self.tenant or 'public') + 1, f"{self.tenant or 'public'}|")
+            ).rowcount
+            self._db.commit()
+            self.invalidadas += borradas
+        return borradas
+
+    def _frescura(self, headers: dict) -> float:
+        control = CaseInsensitiveDict(headers).get('Cache-Control', '')
+        if 'no-store' in control or 'no-cache' in control:
+            return 0.0
+        max_age = _MAX_AGE.search(control)
+        return float(max_age.group(1)) if max_age else self.fresco_segundos
+
+    def _guardar(self, clave, url, headers, contenido, ahora):
+        headers = _sin_transporte(headers)
+        encabezados = CaseInsensitiveDict(headers)
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO entradas VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (clave, url, encabezados.get('ETag'), encabezados.get('Last-Modified'),
+                 json.dumps(headers), contenido, ahora + self._frescura(headers), ahora)
+            )
+            # Desalojo LRU
+            self._db.execute('''
+                DELETE FROM entradas WHERE clave IN (
+                    SELECT clave FROM entradas ORDER BY usado DESC LIMIT -1 OFFSET ?
+                )
+            ''', (self.max_entradas,))
+            self._db.commit()
+
+    def _tocar(self, clave, ahora):
+        with self._lock:
+            self._db.execute('UPDATE entradas SET usado = ? WHERE clave = ?', (ahora, clave))
+            self._db.commit()
+
+    def estadisticas(self) -> dict:
+        return {'aciertos': self.aciertos, 'revalidados': self.revalidados, 'fallos': self.fallos,
+                'invalidadas': self.invalidadas}
+
+    def resumen(self) -> str:
+        return (f"{self.aciertos} aciertos, {self.revalidados} revalidados (304), {self.fallos} fallos, "
+                f"{self.invalidadas} invalidadas por escrituras")
+
+    def cerrar(self):
+        with self._lock:
+            self._db.close()
+
+
+def _sin_transporte(headers: dict) -> dict:
+    """Headers sin los de transporte: el contenido se guarda ya decodificado"""
+    return {k: v for k, v in headers.items() if k.lower() not in _HEADERS_DE_TRANSPORTE}
+
+
+def _a_response(url: str, headers_json: str, contenido: bytes, origen: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = 'OK'
+    response.url = url
+    response.headers = CaseInsensitiveDict(json.loads(headers_json))
+    response.encoding = get_encoding_from_headers(response.headers)
+    response._content = bytes(contenido)
+    response.desde_cache = origen
+    return response
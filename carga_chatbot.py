@@ -0,0 +1,393 @@
+"""
+Prueba de carga del chatbot con miles de sesiones concurrentes
+Cada sesión es una corrutina en el event loop de motor_async (no un hilo), así
+que un solo proceso sostiene miles de conversaciones a la vez. Cada una toma
+un guion del corpus, lo recorre turno a turno contra chatbot/mensaje/ (si el
+guion es más corto que --turnos, vuelve a empezar) y cada --historial-cada
+turnos pide chatbot/historial/ para ver cuánto cuesta traer una conversación
+cada vez más larga.
+
+El tráfico del chatbot es anónimo y el menos predecible, por eso las sesiones
+llegan escalonadas al azar durante --ramp-up, las pausas entre turnos son
+exponenciales (media --think) y en cada turno una sesión puede abandonar con
+probabilidad --abandono.
+
+El conector de aiohttp se dimensiona con --conexiones (default: una por sesión
+activa, hasta lo que permite el límite de archivos abiertos, ulimit -n), así la
+latencia medida es la del chatbot y no la espera por una conexión libre del
+cliente. Esa espera se mide aparte (trazas del conector,
+ver motor_async.EsperaConexion) y se descuenta de la latencia de cada petición;
+los timeouts que ocurren todavía en la cola cuentan como error
+'espera_conexion', no como error del servidor.
+
+El reporte incluye:
+    - latencia p50/p95/p99 de chatbot/mensaje/ por número de turno, más el p95
+      de la espera por conexión
+    - latencia y tamaño de chatbot/historial/ por cantidad de mensajes guardados,
+      con la recta de ajuste (ms y bytes por mensaje) para ver cómo escala
+
+Corpus: JSON con una lista de conversaciones; cada conversación es una lista
+de mensajes (texto) o de objetos {"mensaje": ..., "datos": {...}} donde datos
+son campos extra del body (nombre, correo_electronico, telefono).
+
+Ejecución:
+    python carga_chatbot.py --sesiones 2000 --turnos 12
+    python carga_chatbot.py --sesiones 5000 --concurrencia 1000 --ramp-up 60 --think 3 --abandono 0.05
+    python carga_chatbot.py --sesiones 2000 --conexiones 200   # pool acotado: ver espera_conexion
+    python carga_chatbot.py --corpus conversaciones.json --turnos 40 --historial-cada 5
+
+Requiere aiohttp (ver motor_async).
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from http_client import cliente
+from latencias import percentil
+from motor_async import EsperaConexion
+
+BASE_URL = "http://localhost:8000/api/v1"
+
+# Descriptores que no se usan para conexiones: archivos, logs, el propio intérprete
+DESCRIPTORES_RESERVADOS = 64
+
+# Guiones por defecto: los mismos intents que prueba flujo_07
+CORPUS = [
+    [
+        "Hola",
+        {"mensaje": "Mi nombre es Juan Perez y mi correo es ana.lopez@email.com",
+         "datos": {"nombre": "Juan Perez", "correo_electronico": "ana.lopez@email.com", "telefono": "77777777"}},
+        "Quiero ver mis citas",
+        "Quiero agendar una cita",
+        "Que servicios ofrecen?",
+        "Como puedo contactarlos?",
+    ],
+    [
+        "Buenas tardes",
+        "Cuanto cuesta una limpieza dental?",
+        "Que servicios ofrecen?",
+        "Quiero agendar una cita",
+        "Para el martes en la mañana",
+        "Gracias",
+    ],
+    [
+        "Hola, tengo dolor de muela",
+        "Es una urgencia?",
+        "Quiero agendar una cita",
+        "Como puedo contactarlos?",
+    ],
+    [
+        "Que horarios de atencion tienen?",
+        "Atienden los sabados?",
+        "Donde estan ubicados?",
+        "Quiero ver mis citas",
+        "Adios",
+    ],
+]
+
+
+def cargar_corpus(ruta: str) -> list:
+    """Conversaciones normalizadas a listas de {'mensaje', 'datos'}"""
+    conversaciones = CORPUS
+    if ruta:
+        with open(ruta, encoding='utf-8') as archivo:
+            conversaciones = json.load(archivo)
+    return [
+        [paso if isinstance(paso, dict) else {'mensaje': paso} for paso in conversacion]
+        for conversacion in conversaciones if conversacion
+    ]
+
+
+class Metricas:
+    """Muestras de la prueba; solo se modifican desde el event loop"""
+
+    def __init__(self):
+        self.turnos = defaultdict(list)
+        self.espera_turnos = defaultdict(list)
+        self.errores_turno = Counter()
+        self.historial = defaultdict(list)
+        self.errores = Counter()
+        self.peticiones = 0
+        self.sesiones_iniciadas = 0
+        self.sesiones_completas = 0
+        self.sesiones_abandonadas = 0
+        self.sesiones_cortadas = 0
+
+
+async def medir(motor, metricas, metodo, url, timeout, **kwargs):
+    """
+    (response o None, ms sin la espera por conexión, ms de espera por conexión).
+    Los errores se cuentan por status o tipo de excepción; los que ocurren
+    mientras la petición sigue en la cola del conector, como 'espera_conexion'.
+    """
+    espera = EsperaConexion()
+    inicio = time.perf_counter()
+    metricas.peticiones += 1
+    try:
+        response = await motor.request(metodo, url, timeout=timeout, espera=espera, **kwargs)
+    except Exception as e:
+        metricas.errores['espera_conexion' if espera.en_cola else type(e).__name__] += 1
+        return None, (time.perf_counter() - inicio) * 1000 - espera.ms(), espera.ms()
+    ms = (time.perf_counter() - inicio) * 1000 - espera.ms()
+    if response.status_code >= 400:
+        metricas.errores[str(response.status_code)] += 1
+        return None, ms, espera.ms()
+    return response, ms, espera.ms()
+
+
+async def sesion(motor, metricas, corpus, args, rng, retraso, limite):
+    await asyncio.sleep(retraso)
+    async with limite:
+        metricas.sesiones_iniciadas += 1
+        session_id = str(uuid.uuid4())
+        conversacion = rng.choice(corpus)
+        for turno in range(1, args.turnos + 1):
+            paso = conversacion[(turno - 1) % len(conversacion)]
+            body = {'session_id': session_id, 'mensaje': paso['mensaje'], **paso.get('datos', {})}
+            response, ms, espera = await medir(motor, metricas, 'POST', f"{BASE_URL}/chatbot/mensaje/",
+                                               args.timeout, json=body)
+            metricas.espera_turnos[turno].append(espera)
+            if response is None:
+                metricas.errores_turno[turno] += 1
+                metricas.sesiones_cortadas += 1
+                return
+            metricas.turnos[turno].append(ms)
+
+            if args.historial_cada and turno % args.historial_cada == 0:
+                response, ms, _ = await medir(motor, metricas, 'GET', f"{BASE_URL}/chatbot/historial/",
+                                              args.timeout, params={'session_id': session_id})
+                if response is not None:
+                    try:
+                        mensajes = len(response.json().get('mensajes', []))
+                    except ValueError:
+                        mensajes = None
+                    if mensajes is not None:
+                        metricas.historial[mensajes].append((ms, len(response.content)))
+
+            if turno < args.turnos:
+                if rng.random() < args.abandono:
+                    metricas.sesiones_abandonadas += 1
+                    return
+                if args.think > 0:
+                    await asyncio.sleep(rng.expovariate(1 / args.think))
+
+        if args.reset:
+            await medir(motor, metricas, 'POST', f"{BASE_URL}/chatbot/reset/", args.timeout,
+                        json={'session_id': session_id})
+        metricas.sesiones_completas += 1
+
+
+async def ejecutar_sesiones(motor, metricas, corpus, args):
+    rng = random.Random(args.seed)
+    limite = asyncio.Semaphore(args.concurrencia or args.sesiones)
+    tareas = [
+        sesion(motor, metricas, corpus, args, random.Random(rng.random()), rng.uniform(0, args.ramp_up), limite)
+        for _ in range(args.sesiones)
+    ]
+    await asyncio.gather(*tareas)
+
+
+def ajuste_lineal(puntos: list) -> dict:
+    """Recta por mínimos cuadrados y = pendiente * x + intercepto, con r²"""
+    n = len(puntos)
+    if n < 2:
+        return None
+    media_x = sum(x for x, _ in puntos) / n
+    media_y = sum(y for _, y in puntos) / n
+    sxx = sum((x - media_x) ** 2 for x, _ in puntos)
+    if sxx == 0:
+        return None
+    sxy = sum((x - media_x) * (y - media_y) for x, y in puntos)
+    syy = sum((y - media_y) ** 2 for _, y in puntos)
+    pendiente = sxy / sxx
+    return {
+        'pendiente': round(pendiente, 4),
+        'intercepto': round(media_y - pendiente * media_x, 3),
+        'r2': round(sxy * sxy / (sxx * syy), 4) if syy else 1.0
+    }
+
+
+def resumen_turnos(metricas) -> list:
+    resultado = []
+    for turno in sorted(set(metricas.turnos) | set(metricas.errores_turno)):
+        muestras = sorted(metricas.turnos.get(turno, []))
+        esperas = sorted(metricas.espera_turnos.get(turno, []))
+        resultado.append({
+            'turno': turno,
+            'peticiones': len(muestras) + metricas.errores_turno[turno],
+            'errores': metricas.errores_turno[turno],
+            'p50_ms': round(percentil(muestras, 50), 2),
+            'p95_ms': round(percentil(muestras, 95), 2),
+            'p99_ms': round(percentil(muestras, 99), 2),
+            'espera_conexion_p50_ms': round(percentil(esperas, 50), 2),
+            'espera_conexion_p95_ms': round(percentil(esperas, 95), 2)
+        })
+    return resultado
+
+
+def resumen_historial(metricas) -> dict:
+    por_tamano = []
+    for mensajes in sorted(metricas.historial):
+        muestras = metricas.historial[mensajes]
+        tiempos = sorted(ms for ms, _ in muestras)
+        por_tamano.append({
+            'mensajes': mensajes,
+            'peticiones': len(muestras),
+            'p50_ms': round(percentil(tiempos, 50), 2),
+            'p95_ms': round(percentil(tiempos, 95), 2),
+            'bytes_promedio': round(sum(b for _, b in muestras) / len(muestras))
+        })
+    puntos_ms = [(m, ms) for m, muestras in metricas.historial.items() for ms, _ in muestras]
+    puntos_bytes = [(m, b) for m, muestras in metricas.historial.items() for _, b in muestras]
+    return {
+        'por_tamano': por_tamano,
+        'escalamiento': {
+            # ms y bytes que agrega cada mensaje guardado a la respuesta del historial
+            'ms_por_mensaje': ajuste_lineal(puntos_ms),
+            'bytes_por_mensaje': ajuste_lineal(puntos_bytes)
+        }
+    }
+
+
+def conexiones_disponibles():
+    """Conexiones que caben en el límite de archivos abiertos del proceso, o None si no hay límite conocido"""
+    if resource is None:
+        return None
+    blando, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if blando == resource.RLIM_INFINITY:
+        return None
+    return max(blando - DESCRIPTORES_RESERVADOS, 1)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Prueba de carga del chatbot con sesiones concurrentes')
+    parser.add_argument('--sesiones', type=int, default=1000, help='Sesiones a simular (default: 1000)')
+    parser.add_argument('--concurrencia', type=int, default=0,
+                        help='Sesiones activas a la vez como máximo (default: todas)')
+    parser.add_argument('--conexiones', type=int,
+                        help='Conexiones del conector aiohttp (default: --concurrencia o --sesiones, '
+                             'acotado por ulimit -n)')
+    parser.add_argument('--turnos', type=int, default=10, help='Mensajes por sesión (default: 10)')
+    parser.add_argument('--historial-cada', type=int, default=1,
+                        help='Pedir el historial cada N turnos; 0 no lo pide (default: 1)')
+    parser.add_argument('--ramp-up', type=float, default=30,
+                        help='Segundos en los que llegan las sesiones, al azar (default: 30)')
+    parser.add_argument('--think', type=float, default=2.0,
+                        help='Pausa media (exponencial) entre turnos en segundos (default: 2.0)')
+    parser.add_argument('--abandono', type=float, default=0.0,
+                        help='Probabilidad de abandonar la sesión después de cada turno (default: 0)')
+    parser.add_argument('--reset', action='store_true', help='Reiniciar la conversación al terminar cada sesión')
+    parser.add_argument('--corpus', help='JSON con las conversaciones (default: guiones de flujo_07)')
+    parser.add_argument('--timeout', type=float, default=30, help='Timeout por petición en segundos (default: 30)')
+    parser.add_argument('--seed', type=int, default=20251103, help='Semilla de llegadas, guiones y pausas')
+    parser.add_argument('--salida', default='salida_carga_chatbot.json',
+                        help='Reporte JSON (default: salida_carga_chatbot.json)')
+    args = parser.parse_args()
+    disponibles = conexiones_disponibles()
+    if args.conexiones is None:
+        args.conexiones = args.concurrencia or args.sesiones
+        if disponibles is not None and args.conexiones > disponibles:
+            print(f"⚠️  Conexiones limitadas a {disponibles} por el límite de archivos abiertos (ulimit -n); "
+                  f"la espera por conexión se reporta aparte")
+            args.conexiones = disponibles
+    elif disponibles is not None and args.conexiones > disponibles:
+        parser.error(f"--conexiones {args.conexiones} supera el límite de archivos abiertos del proceso "
+                     f"(ulimit -n): use a lo sumo {disponibles} o suba el límite")
+    return args
+
+
+def main():
+    args = parse_args()
+    corpus = cargar_corpus(args.corpus)
+    motor = cliente.usar_motor_async(limite_conexiones=args.conexiones)
+    metricas = Metricas()
+
+    print("=" * 80)
+    print(f"  CARGA CHATBOT: {args.sesiones} sesiones x {args.turnos} turnos, "
+          f"concurrencia {args.concurrencia or args.sesiones}, ramp-up {args.ramp_up}s, think {args.think}s")
+    print(f"  Corpus: {len(corpus)} conversaciones | Conexiones: {motor.limite_conexiones}")
+    print("=" * 80)
+
+    inicio = time.time()
+    futuro = asyncio.run_coroutine_threadsafe(ejecutar_sesiones(motor, metricas, corpus, args), motor.loop)
+    siguiente_aviso = inicio + 5
+    while not futuro.done():
+        time.sleep(0.2)
+        if time.time() >= siguiente_aviso:
+            siguiente_aviso += 5
+            print(f"⏱️  {time.time() - inicio:6.1f}s  {metricas.sesiones_iniciadas} sesiones, "
+                  f"{metricas.peticiones} peticiones, {sum(metricas.errores.values())} errores")
+    futuro.result()
+    duracion = time.time() - inicio
+
+    turnos = resumen_turnos(metricas)
+    historial = resumen_historial(metricas)
+    esperas = sorted(ms for muestras in metricas.espera_turnos.values() for ms in muestras)
+    espera_conexion = {
+        'p50_ms': round(percentil(esperas, 50), 2),
+        'p95_ms': round(percentil(esperas, 95), 2),
+        'max_ms': esperas[-1] if esperas else 0
+    }
+
+    print(f"\n{'TURNO':>5} {'REQ':>7} {'ERR':>5} {'P50':>9} {'P95':>9} {'P99':>9} {'ESPERA P95':>11}")
+    print("-" * 62)
+    for t in turnos:
+        print(f"{t['turno']:>5} {t['peticiones']:>7} {t['errores']:>5} "
+              f"{t['p50_ms']:>7}ms {t['p95_ms']:>7}ms {t['p99_ms']:>7}ms {t['espera_conexion_p95_ms']:>9}ms")
+    if historial['por_tamano']:
+        print(f"\n{'MENSAJES':>8} {'REQ':>7} {'P50':>9} {'P95':>9} {'BYTES':>9}")
+        print("-" * 50)
+        for h in historial['por_tamano']:
+            print(f"{h['mensajes']:>8} {h['peticiones']:>7} {h['p50_ms']:>7}ms {h['p95_ms']:>7}ms "
+                  f"{h['bytes_promedio']:>9}")
+        escala_ms = historial['escalamiento']['ms_por_mensaje']
+        escala_bytes = historial['escalamiento']['bytes_por_mensaje']
+        if escala_ms and escala_bytes:
+            print(f"\n📈 chatbot/historial/: {escala_ms['pendiente']} ms y {escala_bytes['pendiente']:.0f} bytes "
+                  f"por mensaje guardado (r² {escala_ms['r2']})")
+
+    print(f"\n✅ {metricas.peticiones} peticiones en {duracion:.1f}s ({metricas.peticiones / duracion:.1f} req/s) - "
+          f"{metricas.sesiones_completas} sesiones completas, {metricas.sesiones_abandonadas} abandonadas, "
+          f"{metricas.sesiones_cortadas} cortadas por error, {cliente.conexiones_abiertas} conexiones abiertas")
+    print(f"🔌 Espera por conexión del cliente ({motor.limite_conexiones} conexiones): "
+          f"p50 {espera_conexion['p50_ms']}ms, p95 {espera_conexion['p95_ms']}ms, máx {espera_conexion['max_ms']}ms")
+    if metricas.errores:
+        print(f"❌ Errores: {dict(metricas.errores)}")
+
+    reporte = {
+        'configuracion': {k: v for k, v in vars(args).items() if k != 'salida'},
+        'ejecucion': {
+            'inicio': datetime.fromtimestamp(inicio).isoformat(),
+            'duracion_segundos': round(duracion, 2),
+            'peticiones': metricas.peticiones,
+            'throughput_rps': round(metricas.peticiones / duracion, 2),
+            'sesiones_completas': metricas.sesiones_completas,
+            'sesiones_abandonadas': metricas.sesiones_abandonadas,
+            'sesiones_cortadas': metricas.sesiones_cortadas
+        },
+        'turnos': turnos,
+        # Tiempo en la cola del conector de aiohttp, ya descontado de las latencias
+        'espera_conexion': espera_conexion,
+        'historial': historial,
+        'errores': dict(metricas.errores),
+        # Las sesiones usan el motor directamente: del cliente solo cuentan las conexiones abiertas
+        'conexiones_abiertas': cliente.conexiones_abiertas
+    }
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+    print(f"📄 Reporte: {args.salida}")
+    cliente.cerrar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Prueba de carga con usuarios virtuales
+Repite los escenarios de negocio de los flujos existentes con N usuarios
+concurrentes, usando los mismos helpers:
+
+    citas        (flujo_02)  crear cita -> ver detalle -> actualizar -> cancelar
+    facturacion  (flujo_05)  crear factura -> ver factura -> registrar pago -> listar pagos
+
+Cada usuario virtual entra escalonado durante --ramp-up, repite escenarios
+hasta que se cumple --duracion y espera --think segundos (±50%) entre pasos.
+Al final se imprime y guarda, por endpoint, throughput y latencias p50/p95/p99.
+
+Los ids de tipo de consulta, estado de factura y tipo de pago se buscan por
+nombre en sus catálogos al preparar, así que la carga funciona con cualquier
+base sembrada (reseed, --scale, snapshot).
+
+Ejecución:
+    python carga_virtual.py --usuarios 20 --duracion 60
+    python carga_virtual.py --usuarios 200 --ramp-up 30 --duracion 120 --think 2 --motor async
+    python carga_virtual.py --escenarios citas --usuarios 10 --salida salida_carga_citas.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+from http_client import cliente
+from latencias import RegistroLatencias
+from paginacion import iterar_registros, registros_de_pagina
+from registro_http import registro
+
+import flujo_02_citas as citas
+import flujo_05_facturacion as facturacion
+
+BASE_URL = citas.BASE_URL
+
+# Registros de catálogo que usan los escenarios: (ruta, nombre, campo id)
+CATALOGOS = {
+    'tipo_consulta': ('citas/tipos-consulta/', 'Primera Vez', 'idtipoconsulta'),
+    'estado_factura': ('pagos/estados-factura/', 'Pendiente', 'idestadofactura'),
+    'tipo_pago': ('pagos/tipos-pago/', 'Efectivo', 'idtipopago'),
+}
+
+
+def _salida(mensaje):
+    """Imprime en la consola real aunque stdout esté silenciado durante la carga"""
+    print(mensaje, file=sys.__stdout__, flush=True)
+
+
+def buscar_en_catalogo(token, ruta, nombre, campo_id):
+    """Id del registro del catálogo cuyo nombre es `nombre` (sin distinguir mayúsculas), o None"""
+    headers = {"Authorization": f"Token {token}"}
+    try:
+        for fila in iterar_registros(f"{BASE_URL}/{ruta}", headers=headers):
+            if any(isinstance(valor, str) and valor.lower() == nombre.lower() for valor in fila.values()):
+                return fila.get(campo_id, fila.get("id"))
+    except requests.RequestException:
+        pass
+    return None
+
+
+class Contexto:
+    """Tokens e ids compartidos por todos los usuarios virtuales"""
+
+    def __init__(self):
+        self.admin_token = None
+        self.paciente_token = None
+        self.odontologo_token = None
+        self.paciente_id = None
+        self.odontologo_id = None
+        self.horarios = []
+        self.catalogos = {}
+
+    def preparar(self):
+        ok_admin, self.admin_token, _ = citas.login("admin@clinica.com", "admin123")
+        ok_pac, self.paciente_token, paciente = citas.login("ana.lopez@email.com", "paciente123")
+        ok_odo, self.odontologo_token, odontologo = citas.login("dr.perez@clinica.com", "odontologo123")
+        if not (ok_admin and ok_pac and ok_odo):
+            raise SystemExit("❌ No se pudo autenticar admin, paciente u odontólogo")
+        self.paciente_id = paciente.get('codigo')
+        self.odontologo_id = odontologo.get('codigo')
+
+        response = cliente.get(f"{BASE_URL}/citas/horarios/",
+                               headers={"Authorization": f"Token {self.admin_token}"})
+        if response.status_code == 200:
+            self.horarios = [h.get('id') for h in registros_de_pagina(response.json()) if h.get('id')]
+        if not self.horarios:
+            self.horarios = [987]  # el horario por defecto de flujo_02
+
+        for clave, (ruta, nombre, campo_id) in CATALOGOS.items():
+            self.catalogos[clave] = buscar_en_catalogo(self.admin_token, ruta, nombre, campo_id)
+        faltantes = [f"{ruta} '{nombre}'" for clave, (ruta, nombre, _) in CATALOGOS.items()
+                     if self.catalogos[clave] is None]
+        if faltantes:
+            raise SystemExit(f"❌ No se encontró en los catálogos: {', '.join(faltantes)}")
+
+
+def escenario_citas(ctx, rng, pensar):
+    cita = {
+        "codpaciente": ctx.paciente_id,
+        "cododontologo": ctx.odontologo_id,
+        "fecha": (datetime.now() + timedelta(days=rng.randint(1, 90))).strftime("%Y-%m-%d"),
+        "idhorario": rng.choice(ctx.horarios),
+        "idtipoconsulta": ctx.catalogos['tipo_consulta'],
+        "motivo_consulta": "Carga virtual: limpieza y revision",
+        "horario_preferido": "cualquiera"
+    }
+    exito, cita_id = citas.crear_cita(ctx.admin_token, cita, "Carga: crear cita")
+    if not exito or not cita_id:
+        return False
+    pensar()
+    citas.ver_detalle_cita(ctx.paciente_token, cita_id, "Carga: ver cita")
+    pensar()
+    citas.actualizar_cita(ctx.admin_token, cita_id,
+                          {"motivo_consulta": "Carga virtual: limpieza profunda"}, "Carga: actualizar cita")
+    pensar()
+    return citas.cancelar_cita(ctx.admin_token, cita_id, "Carga virtual", "Carga: cancelar cita")
+
+
+def escenario_facturacion(ctx, rng, pensar):
+    monto = float(rng.choice([150, 300, 450, 800]))
+    hoy = datetime.now().strftime("%Y-%m-%d")
+    exito, factura_id = facturacion.crear_factura(ctx.admin_token, {
+        "fechaemision": hoy,
+        "montototal": monto,
+        "idestadofactura": ctx.catalogos['estado_factura']
+    }, "Carga: crear factura")
+    if not exito or not factura_id:
+        return False
+    pensar()
+    facturacion.ver_factura(ctx.admin_token, factura_id, "Carga: ver factura")
+    pensar()
+    exito, _ = facturacion.registrar_pago(ctx.admin_token, {
+        "idfactura": factura_id,
+        "idtipopago": ctx.catalogos['tipo_pago'],
+        "montopagado": monto,
+        "fechapago": hoy
+    }, "Carga: registrar pago")
+    pensar()
+    facturacion.listar_pagos(ctx.admin_token, "Carga: listar pagos", factura_id=factura_id)
+    return exito
+
+
+ESCENARIOS = {
+    'citas': escenario_citas,
+    'facturacion': escenario_facturacion,
+}
+
+
+_lock_resultados = threading.Lock()
+
+
+def usuario_virtual(numero, ctx, args, fin, resultados):
+    """Repite escenarios al azar hasta la hora de fin"""
+    rng = random.Random(args.seed + numero)
+
+    def pensar():
+        if args.think > 0:
+            time.sleep(min(rng.uniform(args.think * 0.5, args.think * 1.5), max(fin - time.time(), 0)))
+
+    time.sleep(args.ramp_up * numero / args.usuarios)
+    while time.time() < fin:
+        nombre = rng.choice(args.escenarios)
+        try:
+            exito = ESCENARIOS[nombre](ctx, rng, pensar)
+        except Exception:
+            exito = False
+        with _lock_resultados:
+            resultados[nombre]['exitosos' if exito else 'fallidos'] += 1
+        pensar()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Prueba de carga con usuarios virtuales')
+    parser.add_argument('--usuarios', type=int, default=10, help='Usuarios virtuales concurrentes (default: 10)')
+    parser.add_argument('--ramp-up', type=float, default=10,
+                        help='Segundos para que entren todos los usuarios (default: 10)')
+    parser.add_argument('--duracion', type=float, default=60, help='Segundos de prueba (default: 60)')
+    parser.add_argument('--think', type=float, default=1.0,
+                        help='Pausa media entre pasos en segundos (default: 1.0)')
+    parser.add_argument('--escenarios', nargs='+', choices=list(ESCENARIOS), default=list(ESCENARIOS),
+                        help='Escenarios a repetir (default: todos)')
+    parser.add_argument('--motor', choices=['sync', 'async'], default='sync',
+                        help="'async' multiplexa el HTTP de todos los usuarios en un event loop")
+    parser.add_argument('--seed', type=int, default=20251103, help='Semilla para los datos aleatorios')
+    parser.add_argument('--salida', default='salida_carga.json', help='Reporte JSON (default: salida_carga.json)')
+    parser.add_argument('--log-fallas', default='salida_carga_fallas.jsonl',
+                        help='Transacciones fallidas con su contexto, en JSON lines '
+                             '(default: salida_carga_fallas.jsonl)')
+    return parser.parse_args()
+
+
+def imprimir_tabla(endpoints):
+    _salida(f"\n{'ENDPOINT':<52} {'REQ':>6} {'ERR':>5} {'RPS':>7} {'P50':>8} {'P95':>8} {'P99':>8}")
+    _salida("-" * 100)
+    for endpoint, e in endpoints.items():
+        _salida(f"{endpoint:<52} {e['peticiones']:>6} {e['errores']:>5} {e['throughput_rps']:>7} "
+                f"{e['p50_ms']:>6}ms {e['p95_ms']:>6}ms {e['p99_ms']:>6}ms")
+
+
+def main():
+    args = parse_args()
+    if args.motor == 'async':
+        # Sin conexiones suficientes la espera en el conector se mediría como latencia del servidor
+        cliente.usar_motor_async(limite_conexiones=args.usuarios)
+    elif args.usuarios > cliente.pool_size:
+        # Una conexión keep-alive por usuario virtual
+        cliente.redimensionar_pool(args.usuarios)
+
+    _salida("=" * 80)
+    _salida(f"  CARGA VIRTUAL: {args.usuarios} usuarios, ramp-up {args.ramp_up}s, "
+            f"duración {args.duracion}s, think {args.think}s, motor {args.motor}")
+    _salida("=" * 80)
+
+    ctx = Contexto()
+    # Las transacciones no se formatean ni imprimen: van al buffer circular de
+    # registro_http y solo las fallidas (con su contexto) se escriben a --log-fallas.
+    # El resto de mensajes de los helpers se descarta.
+    registro.configurar(modo='muestreo', muestreo=0.0, archivo=args.log_fallas)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ctx.preparar()
+
+    latencias = RegistroLatencias()
+    cliente.observadores.append(latencias)
+    resultados = {nombre: {'exitosos': 0, 'fallidos': 0} for nombre in args.escenarios}
+
+    inicio = time.time()
+    fin = inicio + args.ramp_up + args.duracion
+    hilos = [
+        threading.Thread(target=usuario_virtual, args=(n, ctx, args, fin, resultados), daemon=True)
+        for n in range(args.usuarios)
+    ]
+    with contextlib.redirect_stdout(io.StringIO()) as silenciado:
+        for hilo in hilos:
+            hilo.start()
+        # join() vuelve apenas termina el hilo: la duración no espera al próximo aviso de progreso
+        proximo_aviso = inicio + 5
+        for hilo in hilos:
+            while hilo.is_alive():
+                hilo.join(timeout=max(proximo_aviso - time.time(), 0))
+                if time.time() >= proximo_aviso:
+                    proximo_aviso += 5
+                    silenciado.seek(0)
+                    silenciado.truncate()
+                    total = sum(len(v) for v in latencias.duraciones.values())
+                    _salida(f"⏱️  {time.time() - inicio:6.1f}s  {total} peticiones")
+        duracion_total = time.time() - inicio
+    cliente.observadores.remove(latencias)
+
+    endpoints = latencias.resumen(duracion_total)
+    imprimir_tabla(endpoints)
+    total = sum(e['peticiones'] for e in endpoints.values())
+    _salida(f"\n✅ {total} peticiones en {duracion_total:.1f}s ({total / duracion_total:.1f} req/s) - "
+            f"{cliente.resumen()}")
+
+    reporte = {
+        'configuracion': {k: v for k, v in vars(args).items() if k not in ('salida', 'log_fallas')},
+        'ejecucion': {
+            'inicio': datetime.fromtimestamp(inicio).isoformat(),
+            'duracion_segundos': round(duracion_total, 2),
+            'peticiones': total,
+            'throughput_rps': round(total / duracion_total, 2)
+        },
+        'escenarios': resultados,
+        'endpoints': endpoints,
+        'conexiones': cliente.estadisticas()
+    }
+    with open(args.salida, 'w', encoding='utf-8') as archivo:
+        json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+    _salida(f"📄 Reporte: {args.salida}")
+    registro.cerrar()
+    if registro.escritas:
+        _salida(f"📄 {registro.escritas} transacciones de fallas y su contexto en {args.log_fallas}")
+    cliente.cerrar()
+
+
+if __name__ == "__main__":
+    main()
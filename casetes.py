@@ -0,0 +1,175 @@
+"""
+Casetes de grabación / reproducción para los flujos
+En modo 'grabar' cada petición que pasa por http_client.cliente se guarda con
+su respuesta; en modo 'reproducir' el cliente responde desde el casete sin
+tocar la red, así que el flujo corre sin backend y en milisegundos (útil para
+medir cambios del lado del cliente: reportes, logs, caché...).
+
+Las respuestas se indexan por método + URL (con parámetros ordenados) + cuerpo
+JSON normalizado. Si una petición no coincide exactamente (fechas relativas
+como "mañana", UUID de sesión, ids nuevos), se usa la siguiente grabación del
+mismo método y ruta normalizada ({id} en lugar de ids). Si se repite la misma
+petición varias veces, se sirven sus respuestas en el orden en que se grabaron.
+
+El casete es un JSON lines comprimido con gzip: un encabezado y una línea por
+intercambio.
+
+Variables de entorno:
+    FLUJO_CASETE        ruta del casete (p. ej. casetes/flujo_02.jsonl.gz)
+    FLUJO_CASETE_MODO   grabar | reproducir (default: reproducir si el archivo existe)
+
+Ejecución:
+    FLUJO_CASETE=casetes/flujo_02.jsonl.gz FLUJO_CASETE_MODO=grabar python flujo_02_citas.py
+    FLUJO_CASETE=casetes/flujo_02.jsonl.gz python flujo_02_citas.py
+"""
+import base64
+import gzip
+import json
+import os
+import re
+import threading
+from collections import defaultdict, deque
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from latencias import normalizar_endpoint
+
+VERSION = 1
+# Headers que no aportan nada a la reproducción
+_HEADERS_OMITIDOS = {'date', 'server', 'connection', 'keep-alive', 'content-encoding',
+                     'content-length', 'transfer-encoding'}
+_UUID = re.compile(r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}')
+
+
+class SinGrabacion(requests.exceptions.ConnectionError):
+    """La petición no está en el casete (se comporta como un error de conexión)"""
+
+
+def _cuerpo_normalizado(kwargs: dict) -> str:
+    if kwargs.get('json') is not None:
+        return json.dumps(kwargs['json'], sort_keys=True, separators=(',', ':'), default=str)
+    data = kwargs.get('data')
+    if isinstance(data, bytes):
+        return data.decode('utf-8', errors='replace')
+    return str(data) if data is not None else ''
+
+
+def clave_exacta(metodo: str, url: str, kwargs: dict) -> str:
+    partes = urlsplit(url)
+    params = kwargs.get('params') or {}
+    consulta = '&'.join(filter(None, [partes.query, urlencode(sorted(params.items()))]))
+    ruta = partes.path + (f"?{consulta}" if consulta else '')
+    return f"{metodo.upper()} {_UUID.sub('{uuid}', ruta)} {_UUID.sub('{uuid}', _cuerpo_normalizado(kwargs))}"
+
+
+def clave_ruta(metodo: str, url: str) -> str:
+    return normalizar_endpoint(metodo, _UUID.sub('{uuid}', url))
+
+
+class Casete:
+    """Intercambios grabados con índice exacto y por ruta normalizada"""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.intercambios = []
+        self._lock = threading.Lock()
+        self._exactos = defaultdict(deque)
+        self._por_ruta = defaultdict(deque)
+        self.reproducidos = 0
+        self.aproximados = 0
+        self.faltantes = 0
+
+    # ------------------------------------------------------------------
+    # Grabación
+    # ------------------------------------------------------------------
+    def grabar(self, metodo: str, url: str, kwargs: dict, response: requests.Response):
+        contenido = response.content if isinstance(response._content, bytes) else b''
+        try:
+            cuerpo, codificacion = contenido.decode('utf-8'), 'texto'
+        except UnicodeDecodeError:
+            cuerpo, codificacion = base64.b64encode(contenido).decode('ascii'), 'base64'
+        intercambio = {
+            'clave': clave_exacta(metodo, url, kwargs),
+            'ruta': clave_ruta(metodo, url),
+            'status': response.status_code,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in _HEADERS_OMITIDOS},
+            'cuerpo': cuerpo,
+            'codificacion': codificacion
+        }
+        with self._lock:
+            self.intercambios.append(intercambio)
+
+    def guardar(self):
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with self._lock:
+            intercambios = list(self.intercambios)
+        with gzip.open(self.ruta, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'version': VERSION, 'grabado': datetime.now().isoformat(),
+                                'intercambios': len(intercambios)}) + '\n')
+            for intercambio in intercambios:
+                f.write(json.dumps(intercambio, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    # ------------------------------------------------------------------
+    # Reproducción
+    # ------------------------------------------------------------------
+    def cargar(self) -> 'Casete':
+        with gzip.open(self.ruta, 'rt', encoding='utf-8') as f:
+            encabezado = json.loads(f.readline())
+            if encabezado.get('version') != VERSION:
+                raise ValueError(f"Versión de casete no soportada: {encabezado.get('version')}")
+            for linea in f:
+                intercambio = json.loads(linea)
+                self.intercambios.append(intercambio)
+                self._exactos[intercambio['clave']].append(intercambio)
+                self._por_ruta[intercambio['ruta']].append(intercambio)
+        return self
+
+    @staticmethod
+    def _siguiente(cola: deque):
+        """Primer intercambio aún no servido; el último de la cola se repite si se pide de nuevo"""
+        while len(cola) > 1 and cola[0].get('_servido'):
+            cola.popleft()
+        return cola[0] if cola else None
+
+    def reproducir(self, metodo: str, url: str, **kwargs) -> requests.Response:
+        """Transporte para http_client: responde desde el casete"""
+        clave = clave_exacta(metodo, url, kwargs)
+        with self._lock:
+            intercambio = self._siguiente(self._exactos[clave]) if clave in self._exactos else None
+            if intercambio is not None:
+                self.reproducidos += 1
+            else:
+                ruta = clave_ruta(metodo, url)
+                intercambio = self._siguiente(self._por_ruta[ruta]) if ruta in self._por_ruta else None
+                if intercambio is None:
+                    self.faltantes += 1
+                    raise SinGrabacion(f"Sin grabación en {self.ruta} para {clave}")
+                self.aproximados += 1
+            intercambio['_servido'] = True
+        return _a_response(url, intercambio)
+
+    def resumen(self) -> str:
+        if self.reproducidos or self.aproximados or self.faltantes:
+            return (f"{self.reproducidos} reproducidas, {self.aproximados} por ruta, "
+                    f"{self.faltantes} sin grabación")
+        return f"{len(self.intercambios)} intercambios grabados"
+
+
+def _a_response(url: str, intercambio: dict) -> requests.Response:
+    response = requests.Response()
+    response.status_code = intercambio['status']
+    response.url = url
+    response.headers = CaseInsensitiveDict(intercambio['headers'])
+    response.encoding = get_encoding_from_headers(response.headers)
+    if intercambio['codificacion'] == 'base64':
+        response._content = base64.b64decode(intercambio['cuerpo'])
+    else:
+        response._content = intercambio['cuerpo'].encode('utf-8')
+    response.tiempos = {'conexion_ms': 0.0, 'ttfb_ms': 0.0, 'transferencia_ms': 0.0}
+    return response
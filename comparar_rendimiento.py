@@ -0,0 +1,232 @@
+"""
+Compuerta de regresiones de rendimiento entre ejecuciones
+Compara los reportes de una ejecución nueva contra una línea base guardada:
+empareja flujos, secciones y endpoints, y sobre las muestras de latencia de
+cada endpoint (reporte['transacciones'], ver reporte_latencias) aplica la
+prueba U de Mann-Whitney (unilateral: ¿el nuevo es más lento?).
+
+Un endpoint es una regresión cuando su p95 empeora más que --umbral, la
+diferencia supera --minimo-ms y la prueba es significativa con --alfa. Si hay
+alguna, el comando termina con código 1 para poder frenar un deploy.
+
+Con pocas muestras la prueba no puede dar significativa (con 3 contra 3 el
+p-valor mínimo ronda 0.04), así que si alguno de los lados tiene menos de
+--minimo-muestras se decide solo con --umbral y --minimo-ms.
+
+BASE y NUEVO pueden ser un directorio (se leen sus salida_flujo*.json), un
+reporte individual o el salida_suite.json de ejecutar_flujos.py.
+
+Ejecución:
+    python comparar_rendimiento.py --guardar-base base_rendimiento/   # guarda los reportes actuales
+    python comparar_rendimiento.py base_rendimiento/ .                # compara contra la base
+    python comparar_rendimiento.py base_rendimiento/ salida_suite.json --umbral 0.3 --alfa 0.01
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import shutil
+import sys
+from collections import defaultdict
+
+from latencias import percentil
+
+
+def cargar_reportes(ruta: str) -> dict:
+    """{numero_flujo: reporte} desde un directorio, un reporte o un salida_suite.json"""
+    if os.path.isdir(ruta):
+        archivos = sorted(glob.glob(os.path.join(ruta, 'salida_flujo*.json')))
+    else:
+        archivos = [ruta]
+
+    reportes = {}
+    for archivo in archivos:
+        with open(archivo, encoding='utf-8') as f:
+            datos = json.load(f)
+        candidatos = [f.get('reporte') for f in datos['flujos']] if 'flujos' in datos else [datos]
+        for reporte in candidatos:
+            if reporte and 'flujo' in reporte:
+                reportes[reporte['flujo']['numero']] = reporte
+    return reportes
+
+
+def mann_whitney_u(base: list, nuevo: list) -> tuple[float, float]:
+    """
+    Prueba U de Mann-Whitney unilateral (H1: nuevo tiende a ser mayor) con
+    aproximación normal, corrección por empates y de continuidad.
+    Retorna (U del nuevo, p-valor).
+    """
+    n1, n2 = len(nuevo), len(base)
+    if not n1 or not n2:
+        return 0.0, 1.0
+
+    combinadas = sorted([(valor, 0) for valor in nuevo] + [(valor, 1) for valor in base])
+    rangos = [0.0] * len(combinadas)
+    empates = 0.0
+    i = 0
+    while i < len(combinadas):
+        j = i
+        while j + 1 < len(combinadas) and combinadas[j + 1][0] == combinadas[i][0]:
+            j += 1
+        rango_medio = (i + j) / 2 + 1
+        for k in range(i, j + 1):
+            rangos[k] = rango_medio
+        t = j - i + 1
+        empates += t ** 3 - t
+        i = j + 1
+
+    suma_rangos_nuevo = sum(r for r, (_, grupo) in zip(rangos, combinadas) if grupo == 0)
+    u = suma_rangos_nuevo - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    media = n1 * n2 / 2
+    varianza = n1 * n2 / 12 * ((n + 1) - empates / (n * (n - 1)))
+    if varianza <= 0:
+        return u, 1.0
+    z = (u - media - 0.5) / math.sqrt(varianza)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def muestras_por_endpoint(reporte: dict) -> dict:
+    muestras = defaultdict(list)
+    for t in reporte.get('transacciones', []):
+        if t.get('total_ms') is not None:
+            muestras[t['endpoint']].append(t['total_ms'])
+    return muestras
+
+
+def comparar_endpoints(base: dict, nuevo: dict, args) -> list:
+    resultados = []
+    muestras_base = muestras_por_endpoint(base)
+    muestras_nuevo = muestras_por_endpoint(nuevo)
+    for endpoint in sorted(set(muestras_base) & set(muestras_nuevo)):
+        a = sorted(muestras_base[endpoint])
+        b = sorted(muestras_nuevo[endpoint])
+        p95_base, p95_nuevo = percentil(a, 95), percentil(b, 95)
+        _, p_valor = mann_whitney_u(a, b)
+        cambio = (p95_nuevo - p95_base) / p95_base if p95_base else 0.0
+        prueba = 'mann-whitney' if min(len(a), len(b)) >= args.minimo_muestras else 'solo_umbral'
+        regresion = (
+            cambio > args.umbral
+            and p95_nuevo - p95_base > args.minimo_ms
+            and (prueba == 'solo_umbral' or p_valor < args.alfa)
+        )
+        resultados.append({
+            'endpoint': endpoint,
+            'muestras_base': len(a),
+            'muestras_nuevo': len(b),
+            'p95_base_ms': round(p95_base, 2),
+            'p95_nuevo_ms': round(p95_nuevo, 2),
+            'cambio_p95': round(cambio, 4),
+            'p_valor': round(p_valor, 5),
+            'prueba': prueba,
+            'regresion': regresion
+        })
+    return resultados
+
+
+def comparar_secciones(base: dict, nuevo: dict) -> list:
+    """Secciones emparejadas por número y nombre con su tiempo HTTP total y p95"""
+    def indice(reporte):
+        return {(s.get('numero'), s.get('nombre')): s for s in reporte.get('secciones', [])}
+
+    secciones_base, secciones_nuevo = indice(base), indice(nuevo)
+    resultados = []
+    for clave in sorted(set(secciones_base) & set(secciones_nuevo), key=lambda c: (c[0] or 0, c[1] or '')):
+        http_base = secciones_base[clave].get('http') or {}
+        http_nuevo = secciones_nuevo[clave].get('http') or {}
+        resultados.append({
+            'numero': clave[0],
+            'nombre': clave[1],
+            'total_ms_base': http_base.get('total_ms'),
+            'total_ms_nuevo': http_nuevo.get('total_ms'),
+            'p95_ms_base': http_base.get('p95_ms'),
+            'p95_ms_nuevo': http_nuevo.get('p95_ms')
+        })
+    return resultados
+
+
+def guardar_base(destino: str):
+    os.makedirs(destino, exist_ok=True)
+    archivos = sorted(glob.glob('salida_flujo*.json')) + glob.glob('salida_suite.json')
+    for archivo in archivos:
+        shutil.copy2(archivo, destino)
+    print(f"✅ {len(archivos)} reportes guardados como línea base en {destino}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compara el rendimiento de una ejecución contra una línea base')
+    parser.add_argument('base', nargs='?', help='Directorio o reporte de la línea base')
+    parser.add_argument('nuevo', nargs='?', default='.', help='Directorio o reporte de la ejecución nueva (default: .)')
+    parser.add_argument('--umbral', type=float, default=0.20,
+                        help='Aumento relativo del p95 tolerado (default: 0.20 = 20%%)')
+    parser.add_argument('--alfa', type=float, default=0.05,
+                        help='Nivel de significancia de la prueba U de Mann-Whitney (default: 0.05)')
+    parser.add_argument('--minimo-ms', type=float, default=5.0,
+                        help='Diferencia mínima de p95 en ms para contar como regresión (default: 5)')
+    parser.add_argument('--minimo-muestras', type=int, default=8,
+                        help='Muestras por lado a partir de las cuales se exige la prueba U; con menos '
+                             'decide solo el umbral de p95 (default: 8)')
+    parser.add_argument('--salida', help='Guardar la comparación en este JSON')
+    parser.add_argument('--guardar-base', metavar='DIR',
+                        help='Copiar los salida_flujo*.json actuales a DIR como nueva línea base y salir')
+    args = parser.parse_args()
+    if not args.guardar_base and not args.base:
+        parser.error('indique la línea base (o use --guardar-base DIR)')
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.guardar_base:
+        guardar_base(args.guardar_base)
+        return
+
+    base, nuevo = cargar_reportes(args.base), cargar_reportes(args.nuevo)
+    comparacion = {'configuracion': {'umbral': args.umbral, 'alfa': args.alfa, 'minimo_ms': args.minimo_ms,
+                                     'minimo_muestras': args.minimo_muestras},
+                   'flujos': []}
+    regresiones = []
+
+    for numero in sorted(set(base) & set(nuevo)):
+        nombre = nuevo[numero]['flujo'].get('nombre', '')
+        endpoints = comparar_endpoints(base[numero], nuevo[numero], args)
+        comparacion['flujos'].append({
+            'numero': numero,
+            'nombre': nombre,
+            'duracion_base': base[numero].get('ejecucion', {}).get('duracion_segundos'),
+            'duracion_nuevo': nuevo[numero].get('ejecucion', {}).get('duracion_segundos'),
+            'secciones': comparar_secciones(base[numero], nuevo[numero]),
+            'endpoints': endpoints
+        })
+
+        print(f"\n📊 Flujo {numero:02d} - {nombre}")
+        if not endpoints:
+            print("   (sin transacciones comparables)")
+        for e in endpoints:
+            icono = '❌' if e['regresion'] else ('⚠️ ' if e['cambio_p95'] > args.umbral else '✅')
+            print(f"   {icono} {e['endpoint']:<50} p95 {e['p95_base_ms']:>8} -> {e['p95_nuevo_ms']:>8} ms "
+                  f"({e['cambio_p95']:+.0%}, p={e['p_valor']:.3f}, n={e['muestras_base']}/{e['muestras_nuevo']}"
+                  f"{', solo umbral' if e['prueba'] == 'solo_umbral' else ''})")
+            if e['regresion']:
+                regresiones.append(f"flujo {numero:02d} {e['endpoint']}")
+
+    sin_par = sorted(set(base) ^ set(nuevo))
+    if sin_par:
+        print(f"\nℹ️  Flujos presentes solo en una de las ejecuciones: {sin_par}")
+
+    comparacion['regresiones'] = regresiones
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(comparacion, f, indent=2, ensure_ascii=False)
+
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones de p95 por encima de {args.umbral:.0%}:")
+        for regresion in regresiones:
+            print(f"   - {regresion}")
+        sys.exit(1)
+    print("\n✅ Sin regresiones de rendimiento")
+
+
+if __name__ == "__main__":
+    main()
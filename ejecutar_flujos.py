@@ -0,0 +1,232 @@
+"""
+Ejecutor de la suite de flujos en paralelo
+Declara las dependencias entre flujos y lanza cada uno como subproceso en
+cuanto sus dependencias terminaron bien, con un máximo de --workers a la vez.
+Un flujo terminó bien si salió con código 0 y su reporte JSON no tiene
+secciones fallidas.
+La salida de cada flujo se muestra en vivo con su nombre como prefijo y, al
+final, los salida_flujoNN.json se combinan en un único reporte de la suite.
+
+Dependencias:
+    flujo_00  verifica el seed; todos los demás dependen de él
+    flujo_01  va al final y solo: hace logout de admin, odontólogo y paciente
+              (borra sus tokens) y cambia temporalmente la contraseña del
+              Dr. Pérez, lo que rompería a los flujos que corren en paralelo
+
+Ejecución:
+    python ejecutar_flujos.py                          # suite completa
+    python ejecutar_flujos.py --workers 3              # máximo 3 flujos simultáneos
+    python ejecutar_flujos.py --solo flujo_02 flujo_05 # solo esos (más sus dependencias)
+    python ejecutar_flujos.py --salida salida_suite.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from reporte_latencias import secciones_fallidas
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# nombre -> script, reporte que genera y flujos que deben terminar bien antes
+FLUJOS = {
+    'flujo_00': {'script': 'flujo_00_seeder.py', 'reporte': 'salida_flujo00.json', 'depende_de': []},
+    'flujo_02': {'script': 'flujo_02_citas.py', 'reporte': 'salida_flujo02.json', 'depende_de': ['flujo_00']},
+    'flujo_03': {'script': 'flujo_03_historiales.py', 'reporte': 'salida_flujo03.json', 'depende_de': ['flujo_00']},
+    'flujo_04': {'script': 'flujo_04_tratamientos.py', 'reporte': 'salida_flujo04.json', 'depende_de': ['flujo_00']},
+    'flujo_05': {'script': 'flujo_05_facturacion.py', 'reporte': 'salida_flujo05.json', 'depende_de': ['flujo_00']},
+    'flujo_07': {'script': 'flujo_07_chatbot.py', 'reporte': 'salida_flujo07.json', 'depende_de': ['flujo_00']},
+    'flujo_10': {'script': 'flujo_10_stripe_presupuestos.py', 'reporte': 'salida_flujo09.json', 'depende_de': ['flujo_00']},
+    'flujo_01': {
+        'script': 'flujo_01_autenticacion.py',
+        'reporte': 'salida_flujo01.json',
+        'depende_de': ['flujo_00', 'flujo_02', 'flujo_03', 'flujo_04', 'flujo_05', 'flujo_07', 'flujo_10']
+    },
+}
+
+_lock_salida = threading.Lock()
+
+
+def seleccionar(nombres):
+    """Los flujos pedidos más sus dependencias (transitivas), en el orden de FLUJOS"""
+    if not nombres:
+        return list(FLUJOS)
+    elegidos = set()
+    pendientes = list(nombres)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in FLUJOS:
+            raise SystemExit(f"❌ Flujo desconocido: {nombre} (disponibles: {', '.join(FLUJOS)})")
+        if nombre not in elegidos:
+            elegidos.add(nombre)
+            pendientes.extend(FLUJOS[nombre]['depende_de'])
+    return [nombre for nombre in FLUJOS if nombre in elegidos]
+
+
+def imprimir(nombre, linea):
+    with _lock_salida:
+        print(f"[{nombre}] {linea}", flush=True)
+
+
+def ejecutar_flujo(nombre):
+    """Corre un flujo como subproceso reenviando su salida línea a línea"""
+    entorno = dict(os.environ, PYTHONUNBUFFERED='1', PYTHONIOENCODING='utf-8')
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, FLUJOS[nombre]['script']],
+        cwd=DIRECTORIO,
+        env=entorno,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    for linea in proceso.stdout:
+        imprimir(nombre, linea.rstrip('\n'))
+    codigo = proceso.wait()
+    return codigo, round(time.perf_counter() - inicio, 2)
+
+
+def ejecutar_suite(nombres, workers):
+    """Lanza los flujos respetando dependencias; retorna {nombre: resultado}"""
+    resultados = {}
+    pendientes = list(nombres)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        en_curso = {}
+        lanzados = {}
+        while pendientes or en_curso:
+            # Flujos cuyas dependencias ya terminaron
+            for nombre in list(pendientes):
+                dependencias = [d for d in FLUJOS[nombre]['depende_de'] if d in nombres]
+                if any(resultados.get(d, {}).get('estado') in ('fallido', 'omitido') for d in dependencias):
+                    pendientes.remove(nombre)
+                    resultados[nombre] = {'estado': 'omitido', 'codigo_salida': None, 'duracion_segundos': 0,
+                                          'secciones_fallidas': []}
+                    imprimir(nombre, "⏭️  Omitido: falló una de sus dependencias")
+                elif all(d in resultados for d in dependencias):
+                    pendientes.remove(nombre)
+                    imprimir(nombre, "▶️  Iniciando")
+                    lanzados[nombre] = time.time()
+                    en_curso[pool.submit(ejecutar_flujo, nombre)] = nombre
+
+            if not en_curso:
+                continue
+
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                nombre = en_curso.pop(futuro)
+                try:
+                    codigo, duracion = futuro.result()
+                except OSError as e:
+                    codigo, duracion = None, 0
+                    imprimir(nombre, f"❌ No se pudo ejecutar: {e}")
+                estado = 'exitoso' if codigo == 0 else 'fallido'
+                fallidas = secciones_fallidas(leer_reporte(nombre, lanzados[nombre]) or {})
+                if fallidas:
+                    estado = 'fallido'
+                    imprimir(nombre, f"❌ Secciones fallidas: {', '.join(fallidas)}")
+                resultados[nombre] = {'estado': estado, 'codigo_salida': codigo, 'duracion_segundos': duracion,
+                                      'secciones_fallidas': fallidas}
+                imprimir(nombre, f"{'✅' if estado == 'exitoso' else '❌'} Terminado en {duracion}s "
+                                 f"(código {codigo})")
+
+    return resultados
+
+
+def leer_reporte(nombre, desde):
+    """Reporte JSON del flujo, solo si se generó en esta ejecución"""
+    ruta = os.path.join(DIRECTORIO, FLUJOS[nombre]['reporte'])
+    try:
+        if os.path.getmtime(ruta) < desde:
+            return None
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+
+def combinar_reportes(nombres, resultados, inicio, fin, workers):
+    """Reporte único de la suite con el resultado y el JSON de cada flujo"""
+    flujos = []
+    totales = {'total_secciones': 0, 'secciones_exitosas': 0, 'secciones_fallidas': 0,
+               'total_errores': 0, 'total_datos_creados': 0}
+    for nombre in nombres:
+        reporte = leer_reporte(nombre, inicio)
+        for clave in totales:
+            totales[clave] += ((reporte or {}).get('estadisticas') or {}).get(clave, 0)
+        flujos.append({
+            'nombre': nombre,
+            'script': FLUJOS[nombre]['script'],
+            **resultados[nombre],
+            'reporte': reporte
+        })
+
+    duraciones = [r['duracion_segundos'] for r in resultados.values()]
+    fallidos = [f['nombre'] for f in flujos if f['estado'] != 'exitoso']
+    return {
+        'suite': {
+            'inicio': datetime.fromtimestamp(inicio).isoformat(),
+            'fin': datetime.fromtimestamp(fin).isoformat(),
+            'duracion_segundos': round(fin - inicio, 2),
+            'suma_duraciones_flujos': round(sum(duraciones), 2),
+            'flujo_mas_lento_segundos': max(duraciones, default=0),
+            'workers': workers
+        },
+        'estadisticas': {
+            'total_flujos': len(flujos),
+            'flujos_exitosos': len(flujos) - len(fallidos),
+            **totales
+        },
+        'flujos': flujos,
+        'resumen': {
+            'estado': 'EXITOSO' if not fallidos else 'CON ERRORES',
+            'flujos_con_problemas': fallidos
+        }
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Ejecuta los flujos de prueba en paralelo')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Máximo de flujos ejecutándose a la vez (default: 4)')
+    parser.add_argument('--solo', nargs='+', metavar='FLUJO',
+                        help=f"Flujos a ejecutar (más sus dependencias): {', '.join(FLUJOS)}")
+    parser.add_argument('--salida', default='salida_suite.json',
+                        help='Archivo del reporte combinado (default: salida_suite.json)')
+    args = parser.parse_args()
+
+    nombres = seleccionar(args.solo)
+    print("=" * 80)
+    print(f"  SUITE DE FLUJOS: {len(nombres)} flujos, {args.workers} en paralelo")
+    print("=" * 80)
+
+    inicio = time.time()
+    resultados = ejecutar_suite(nombres, args.workers)
+    fin = time.time()
+
+    suite = combinar_reportes(nombres, resultados, inicio, fin, args.workers)
+    ruta = os.path.join(DIRECTORIO, args.salida)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(suite, archivo, indent=2, ensure_ascii=False)
+
+    print("\n" + "=" * 80)
+    print(f"  SUITE {suite['resumen']['estado']} en {suite['suite']['duracion_segundos']}s "
+          f"(secuencial: {suite['suite']['suma_duraciones_flujos']}s)")
+    print("=" * 80)
+    for flujo in suite['flujos']:
+        icono = {'exitoso': '✅', 'fallido': '❌', 'omitido': '⏭️ '}[flujo['estado']]
+        print(f"  {icono} {flujo['nombre']:<10} {flujo['duracion_segundos']:>7}s  {flujo['script']}")
+    print(f"\n📄 Reporte combinado: {ruta}")
+
+    sys.exit(0 if not suite['resumen']['flujos_con_problemas'] else 1)
+
+
+if __name__ == "__main__":
+    main()
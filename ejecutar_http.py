@@ -0,0 +1,444 @@
+"""
+Ejecutor de pruebas_flujo_completo.http
+Lee el archivo en formato REST Client (bloques separados por ###, variables
+@nombre = valor, peticiones con # @name y capturas como
+{{adminLogin.response.body.token}} o {{listarHorarios.response.body.results.[4].id}}),
+arma un grafo de dependencias entre bloques y los ejecuta con http_client
+(conexiones del pool): los bloques independientes corren a la vez.
+
+Un bloque depende de:
+    - los bloques cuyas respuestas usa, directamente o a través de variables
+    - por cada recurso capturado (la respuesta de un bloque con nombre) y por
+      cada usuario logueado, las escrituras se ordenan como en el archivo:
+      un POST/PUT/PATCH/DELETE espera a los bloques anteriores que usan el
+      mismo recurso, y los GET posteriores esperan a esa escritura. Para los
+      usuarios la escritura es el logout (el backend borra el token compartido)
+      y el login siguiente del mismo usuario espera a que termine.
+
+Si una captura no se puede resolver (el bloque del que depende falló), el
+bloque se marca como omitido. Cada bloque se cronometra y el resultado se
+guarda con el camino crítico y el paralelismo obtenido.
+
+Ejecución:
+    python ejecutar_http.py
+    python ejecutar_http.py --base-url http://localhost:8000/api/v1 --workers 16
+    python ejecutar_http.py --secuencial                  # mismo archivo en orden, para comparar
+    python ejecutar_http.py --solo "Paciente" --grafo     # muestra el grafo sin ejecutar
+    python ejecutar_http.py --var adminToken=abc123 --salida salida_http.json
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from http_client import cliente
+
+_VARIABLE = re.compile(r'^@([\w.-]+)\s*=\s*(.*?)\s*$')
+_NOMBRE = re.compile(r'^(?:#|//)\s*@name\s+(\S+)')
+_PETICION = re.compile(r'^(GET|POST|PUT|PATCH|DELETE|HEAD|OPTIONS)\s+(\S+)(?:\s+HTTP/[\d.]+)?\s*$')
+_HEADER = re.compile(r'^([\w-]+)\s*:\s*(.*)$')
+_REFERENCIA = re.compile(r'{{\s*([^{}]+?)\s*}}')
+_CORREO = re.compile(r'"correo"\s*:\s*"([^"]*)"')
+_SEGMENTO = re.compile(r'\[(\d+)\]|([^.\[\]]+)')
+
+
+class ErrorVariable(Exception):
+    """Una variable o captura que no se puede resolver"""
+
+
+class Bloque:
+    def __init__(self, indice: int, linea: int, titulo: str, nombre: str, metodo: str, url: str,
+                 headers: list, cuerpo: str):
+        self.indice = indice
+        self.linea = linea
+        self.titulo = titulo
+        self.nombre = nombre
+        self.metodo = metodo
+        self.url = url
+        self.headers = headers
+        self.cuerpo = cuerpo
+        self.dependencias = set()
+
+    @property
+    def es_login(self) -> bool:
+        return self.metodo == 'POST' and self.url.rstrip('/').endswith('auth/login')
+
+    @property
+    def es_logout(self) -> bool:
+        return self.metodo == 'POST' and self.url.rstrip('/').endswith('auth/logout')
+
+    def plantillas(self) -> list:
+        return [self.url, self.cuerpo] + [valor for _, valor in self.headers]
+
+    def etiqueta(self) -> str:
+        return self.titulo or self.nombre or f"{self.metodo} {self.url}"
+
+
+# ----------------------------------------------------------------------
+# Lectura del archivo
+# ----------------------------------------------------------------------
+def parsear(texto: str) -> tuple[list, dict]:
+    """(bloques con petición, variables de archivo {nombre: plantilla})"""
+    bloques, variables = [], {}
+    trozos, actual = [], None
+    for numero, linea in enumerate(texto.splitlines(), 1):
+        if linea.startswith('###'):
+            actual = (numero, linea[3:].strip().lstrip('#').strip(), [])
+            trozos.append(actual)
+        elif actual is None:
+            actual = (numero, '', [(numero, linea)])
+            trozos.append(actual)
+        else:
+            actual[2].append((numero, linea))
+
+    for inicio, titulo, lineas in trozos:
+        nombre, metodo, url, linea_peticion = None, None, None, inicio
+        headers, cuerpo, fase = [], [], 'previo'
+        for numero, linea in lineas:
+            limpia = linea.strip()
+            variable = _VARIABLE.match(limpia)
+            if variable and fase != 'headers':
+                variables[variable.group(1)] = variable.group(2)
+                continue
+            marca = _NOMBRE.match(limpia)
+            if marca:
+                nombre = marca.group(1)
+                continue
+            if limpia.startswith('#') or limpia.startswith('//'):
+                continue
+            if fase == 'previo':
+                peticion = _PETICION.match(limpia)
+                if peticion:
+                    metodo, url, linea_peticion, fase = peticion.group(1), peticion.group(2), numero, 'headers'
+                elif limpia.startswith(('http://', 'https://', '{{')):
+                    metodo, url, linea_peticion, fase = 'GET', limpia, numero, 'headers'
+            elif fase == 'headers':
+                header = _HEADER.match(limpia)
+                if not limpia:
+                    fase = 'cuerpo'
+                elif header:
+                    headers.append((header.group(1), header.group(2)))
+            else:
+                cuerpo.append(linea)
+        if metodo:
+            bloques.append(Bloque(len(bloques), linea_peticion, titulo, nombre, metodo, url, headers,
+                                  '\n'.join(cuerpo).strip()))
+    return bloques, variables
+
+
+# ----------------------------------------------------------------------
+# Grafo de dependencias
+# ----------------------------------------------------------------------
+def referencias(texto: str, variables: dict, vistas=None) -> set:
+    """Nombres de bloques cuyas respuestas usa la plantilla (siguiendo las variables)"""
+    vistas = vistas if vistas is not None else set()
+    nombres = set()
+    for ref in _REFERENCIA.findall(texto or ''):
+        if '.response.' in ref:
+            nombres.add(ref.split('.response.', 1)[0])
+        elif ref in variables and ref not in vistas:
+            vistas.add(ref)
+            nombres |= referencias(variables[ref], variables, vistas)
+    return nombres
+
+
+def _correo_login(bloque: Bloque) -> str:
+    """Correo del login tal como está escrito (una plantilla si viene de una captura)"""
+    correo = _CORREO.search(bloque.cuerpo)
+    return correo.group(1) if correo else ''
+
+
+def construir_grafo(bloques: list, variables: dict):
+    """Completa bloque.dependencias con índices de bloques anteriores"""
+    por_nombre = {b.nombre: b for b in bloques if b.nombre}
+    logins = {b.nombre: _correo_login(b) for b in bloques if b.nombre and b.es_login}
+
+    # Claves leídas/escritas por bloque: recursos capturados y usuarios logueados
+    accesos = []
+    for bloque in bloques:
+        usados = set().union(*(referencias(t, variables) for t in bloque.plantillas()))
+        for nombre in usados:
+            if nombre in por_nombre and por_nombre[nombre].indice < bloque.indice:
+                bloque.dependencias.add(por_nombre[nombre].indice)
+        usuarios = {f"usuario:{logins[n]}" for n in usados if n in logins}
+        if bloque.es_login:
+            usuarios.add(f"usuario:{_correo_login(bloque)}")
+        recursos = {f"recurso:{n}" for n in usados if n in por_nombre and n not in logins}
+        escrituras = (usuarios if bloque.es_logout else set()) | (
+            recursos if bloque.metodo != 'GET' and not bloque.es_login else set())
+        accesos.append((usuarios | recursos, escrituras))
+
+    # Orden lectores/escritor por clave, como en el archivo
+    ultima_escritura, lectores = {}, {}
+    for bloque, (claves, escrituras) in zip(bloques, accesos):
+        for clave in claves:
+            if clave in ultima_escritura:
+                bloque.dependencias.add(ultima_escritura[clave])
+            if clave in escrituras:
+                bloque.dependencias.update(lectores.get(clave, ()))
+                ultima_escritura[clave] = bloque.indice
+                lectores[clave] = []
+            else:
+                lectores.setdefault(clave, []).append(bloque.indice)
+        bloque.dependencias.discard(bloque.indice)
+
+
+def con_dependencias(bloques: list, elegidos: set) -> set:
+    """Los bloques elegidos más todo lo que necesitan para correr"""
+    pendientes, resultado = list(elegidos), set()
+    while pendientes:
+        indice = pendientes.pop()
+        if indice not in resultado:
+            resultado.add(indice)
+            pendientes.extend(bloques[indice].dependencias)
+    return resultado
+
+
+# ----------------------------------------------------------------------
+# Resolución de variables
+# ----------------------------------------------------------------------
+class Contexto:
+    """Variables de archivo, valores fijados por línea de comandos y respuestas capturadas"""
+
+    def __init__(self, variables: dict, fijadas: dict):
+        self.variables = variables
+        self.fijadas = fijadas
+        self.respuestas = {}
+        self._lock = threading.Lock()
+
+    def guardar_respuesta(self, nombre: str, response):
+        with self._lock:
+            self.respuestas[nombre] = response
+
+    def resolver(self, texto: str, en_json: bool = False, vistas: tuple = ()) -> str:
+        def reemplazar(coincidencia):
+            valor = self.valor(coincidencia.group(1), vistas)
+            if isinstance(valor, str):
+                return valor
+            return json.dumps(valor) if en_json or valor is None or isinstance(valor, bool) else str(valor)
+        return _REFERENCIA.sub(reemplazar, texto or '')
+
+    def valor(self, ref: str, vistas: tuple = ()):
+        if ref in self.fijadas:
+            return self.fijadas[ref]
+        if ref in self.variables:
+            if ref in vistas:
+                raise ErrorVariable(f"Referencia circular en @{ref}")
+            return self.resolver(self.variables[ref], vistas=vistas + (ref,))
+        if '.response.' in ref:
+            return self.captura(ref)
+        raise ErrorVariable(f"Variable no definida: {ref}")
+
+    def captura(self, ref: str):
+        nombre, resto = ref.split('.response.', 1)
+        with self._lock:
+            response = self.respuestas.get(nombre)
+        if response is None:
+            raise ErrorVariable(f"{ref}: la petición '{nombre}' no tiene respuesta")
+        parte, _, camino = resto.partition('.')
+        if parte == 'headers':
+            if camino not in response.headers:
+                raise ErrorVariable(f"{ref}: header ausente")
+            return response.headers[camino]
+        if parte != 'body':
+            raise ErrorVariable(f"{ref}: solo se soportan body y headers")
+        try:
+            actual = response.json()
+        except ValueError:
+            raise ErrorVariable(f"{ref}: la respuesta no es JSON")
+        for indice, clave in _SEGMENTO.findall(camino):
+            try:
+                actual = actual[int(indice)] if indice else (actual if clave == '$' else actual[clave])
+            except (KeyError, IndexError, TypeError):
+                raise ErrorVariable(f"{ref}: '{indice or clave}' no existe en la respuesta "
+                                    f"(status {response.status_code})")
+        return actual
+
+
+# ----------------------------------------------------------------------
+# Ejecución
+# ----------------------------------------------------------------------
+def ejecutar_bloque(bloque: Bloque, contexto: Contexto, inicio_total: float) -> dict:
+    resultado = {
+        'indice': bloque.indice,
+        'linea': bloque.linea,
+        'titulo': bloque.titulo,
+        'nombre': bloque.nombre,
+        'metodo': bloque.metodo,
+        'dependencias': sorted(bloque.dependencias),
+        'hilo': threading.current_thread().name
+    }
+    try:
+        url = contexto.resolver(bloque.url)
+        headers = {nombre: contexto.resolver(valor) for nombre, valor in bloque.headers}
+        cuerpo = contexto.resolver(bloque.cuerpo, en_json=True) if bloque.cuerpo else None
+    except ErrorVariable as e:
+        return dict(resultado, estado='omitido', error=str(e))
+    resultado['url'] = url
+
+    resultado['inicio_ms'] = round((time.perf_counter() - inicio_total) * 1000, 2)
+    inicio = time.perf_counter()
+    try:
+        response = cliente.request(bloque.metodo, url, headers=headers,
+                                   data=cuerpo.encode('utf-8') if cuerpo else None)
+    except Exception as e:
+        return dict(resultado, estado='error', error=f"{type(e).__name__}: {e}",
+                    duracion_ms=round((time.perf_counter() - inicio) * 1000, 2))
+    resultado['duracion_ms'] = round((time.perf_counter() - inicio) * 1000, 2)
+    if bloque.nombre:
+        contexto.guardar_respuesta(bloque.nombre, response)
+    resultado.update(
+        estado='ok' if response.status_code < 400 else 'fallido',
+        status=response.status_code,
+        tiempos=getattr(response, 'tiempos', None)
+    )
+    return resultado
+
+
+def ejecutar(bloques: list, indices: set, contexto: Contexto, workers: int) -> tuple[list, float]:
+    """Corre los bloques elegidos respetando las dependencias; retorna (resultados, segundos)"""
+    restantes = {i: set(bloques[i].dependencias) & indices for i in indices}
+    dependientes = {i: [] for i in indices}
+    for indice, deps in restantes.items():
+        for dep in deps:
+            dependientes[dep].append(indice)
+
+    resultados = {}
+    inicio_total = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bloque') as pool:
+        en_curso = {}
+
+        def lanzar_listos():
+            for indice in sorted(i for i, deps in restantes.items() if not deps):
+                del restantes[indice]
+                en_curso[pool.submit(ejecutar_bloque, bloques[indice], contexto, inicio_total)] = indice
+
+        lanzar_listos()
+        while en_curso:
+            terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                indice = en_curso.pop(futuro)
+                resultado = futuro.result()
+                resultados[indice] = resultado
+                imprimir_resultado(bloques[indice], resultado)
+                for dependiente in dependientes[indice]:
+                    restantes[dependiente].discard(indice)
+            lanzar_listos()
+    return [resultados[i] for i in sorted(resultados)], time.perf_counter() - inicio_total
+
+
+def imprimir_resultado(bloque: Bloque, resultado: dict):
+    iconos = {'ok': '✅', 'fallido': '❌', 'error': '💥', 'omitido': '⏭️ '}
+    detalle = (f"{resultado.get('status')} {resultado.get('duracion_ms')} ms" if 'status' in resultado
+               else resultado.get('error', ''))
+    print(f"{iconos[resultado['estado']]} [{bloque.linea:>4}] {bloque.etiqueta()[:60]:<60} {detalle}")
+
+
+def camino_critico(bloques: list, resultados: list) -> tuple[float, list]:
+    """Suma de duraciones de la cadena de dependencias más larga (ms) y sus bloques"""
+    duracion = {r['indice']: r.get('duracion_ms') or 0.0 for r in resultados}
+    mejor = {}
+    for indice in sorted(duracion):
+        previos = [d for d in bloques[indice].dependencias if d in mejor]
+        anterior = max(previos, key=lambda d: mejor[d][0], default=None)
+        base, cadena = mejor[anterior] if anterior is not None else (0.0, [])
+        mejor[indice] = (base + duracion[indice], cadena + [indice])
+    return max(mejor.values(), key=lambda m: m[0], default=(0.0, []))
+
+
+def imprimir_grafo(bloques: list, indices: set):
+    niveles = {}
+    for indice in sorted(indices):
+        deps = bloques[indice].dependencias & indices
+        niveles[indice] = 1 + max((niveles[d] for d in deps), default=-1)
+    for nivel in range(max(niveles.values(), default=-1) + 1):
+        grupo = [i for i in sorted(indices) if niveles[i] == nivel]
+        print(f"\n📶 Nivel {nivel} ({len(grupo)} bloques en paralelo)")
+        for indice in grupo:
+            bloque = bloques[indice]
+            deps = sorted(bloques[d].linea for d in bloque.dependencias & indices)
+            print(f"   [{bloque.linea:>4}] {bloque.etiqueta()[:60]:<60} <- líneas {deps}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Ejecuta pruebas_flujo_completo.http en paralelo según dependencias')
+    parser.add_argument('archivo', nargs='?', default='pruebas_flujo_completo.http')
+    parser.add_argument('--base-url', help='Reemplaza @baseUrl del archivo (p. ej. http://localhost:8000/api/v1)')
+    parser.add_argument('--var', action='append', default=[], metavar='NOMBRE=VALOR',
+                        help='Fija una variable (se puede repetir)')
+    parser.add_argument('--workers', type=int, default=8, help='Bloques en paralelo (default: 8)')
+    parser.add_argument('--secuencial', action='store_true',
+                        help='Ejecutar en el orden del archivo, uno por vez (línea base para comparar)')
+    parser.add_argument('--solo', help='Ejecutar solo los bloques cuyo título coincide (y sus dependencias)')
+    parser.add_argument('--grafo', action='store_true', help='Mostrar el grafo por niveles y salir')
+    parser.add_argument('--salida', default='salida_http.json', help='Archivo JSON de resultados')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    with open(args.archivo, encoding='utf-8') as f:
+        bloques, variables = parsear(f.read())
+
+    fijadas = dict(v.split('=', 1) for v in args.var)
+    if args.base_url:
+        fijadas['baseUrl'] = args.base_url
+
+    construir_grafo(bloques, variables)
+    if args.secuencial:
+        for bloque in bloques[1:]:
+            bloque.dependencias = {bloque.indice - 1}
+
+    indices = set(range(len(bloques)))
+    if args.solo:
+        patron = re.compile(args.solo, re.IGNORECASE)
+        indices = con_dependencias(bloques, {b.indice for b in bloques if patron.search(b.etiqueta())})
+
+    print(f"📄 {args.archivo}: {len(bloques)} bloques, {len(variables)} variables, {len(indices)} a ejecutar")
+    if args.grafo:
+        imprimir_grafo(bloques, indices)
+        return
+
+    workers = 1 if args.secuencial else args.workers
+    cliente.redimensionar_pool(max(cliente.pool_size, workers))
+    resultados, segundos = ejecutar(bloques, indices, Contexto(variables, fijadas), workers)
+
+    suma_ms = sum(r.get('duracion_ms') or 0.0 for r in resultados)
+    critico_ms, cadena = camino_critico(bloques, resultados)
+    conteo = {estado: sum(1 for r in resultados if r['estado'] == estado)
+              for estado in ('ok', 'fallido', 'error', 'omitido')}
+    resumen = {
+        'bloques': len(resultados),
+        **conteo,
+        'duracion_segundos': round(segundos, 3),
+        'suma_bloques_ms': round(suma_ms, 2),
+        'camino_critico_ms': round(critico_ms, 2),
+        'camino_critico_lineas': [bloques[i].linea for i in cadena],
+        'paralelismo': round(suma_ms / (segundos * 1000), 2) if segundos else None,
+        'workers': workers
+    }
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump({
+            'archivo': args.archivo,
+            'fecha': datetime.now().isoformat(),
+            'resumen': resumen,
+            'conexiones': cliente.estadisticas(),
+            'bloques': resultados
+        }, f, indent=2, ensure_ascii=False, default=str)
+
+    print(f"\n📊 {conteo['ok']} ok, {conteo['fallido']} fallidos, {conteo['error']} con error, "
+          f"{conteo['omitido']} omitidos en {segundos:.2f}s")
+    print(f"   Suma de bloques: {suma_ms / 1000:.2f}s | Camino crítico: {critico_ms / 1000:.2f}s | "
+          f"Paralelismo: {resumen['paralelismo']}x con {workers} workers")
+    print(f"   Conexiones HTTP: {cliente.resumen()}")
+    print(f"💾 Resultados en {args.salida}")
+    cliente.cerrar()
+    sys.exit(1 if conteo['fallido'] or conteo['error'] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,12 @@ Verifica que los datos del seeder estén correctamente cargados en la base de da
 """
 import requests
 import sys
+from http_client import cliente, reunir
+from paginacion import contar_registros
+from registro_http import cuerpo_respuesta, print_http_transaction
+from reporte_latencias import enriquecer_reporte, registrar_transacciones, secciones_fallidas
+from token_cache import guardar_token, token_en_cache
 from http_logger import (
-    print_http_transaction, 
     print_seccion, 
     print_exito, 
     print_error,
@@ -25,7 +29,13 @@ paciente_token = None
 def login(correo: str, password: str, rol_descripcion: str) -> tuple[bool, str]:
     """
     Realiza login y retorna (exitoso, token)
+    Si hay un token en cache que el servidor sigue aceptando, lo reutiliza.
     """
+    en_cache = token_en_cache(BASE_URL, correo)
+    if en_cache:
+        print_exito(f"Token en cache reutilizado para {rol_descripcion}")
+        return True, en_cache[0]
+    
     url = f"{BASE_URL}/auth/login/"
     
     body = {
@@ -38,7 +48,7 @@ def login(correo: str, password: str, rol_descripcion: str) -> tuple[bool, str]:
     }
     
     try:
-        response = requests.post(url, json=body, headers=headers)
+        response = cliente.post(url, json=body, headers=headers)
         
         # Imprimir transacción completa
         print_http_transaction(
@@ -48,14 +58,15 @@ def login(correo: str, password: str, rol_descripcion: str) -> tuple[bool, str]:
             body=body,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=f"Login como {rol_descripcion}"
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             token = data.get("token")
             if token:
+                guardar_token(BASE_URL, correo, token, data.get("usuario"))
                 print_exito(f"Login exitoso como {rol_descripcion}")
                 return True, token
             else:
@@ -76,6 +87,7 @@ def login(correo: str, password: str, rol_descripcion: str) -> tuple[bool, str]:
 def listar_usuarios(token: str) -> bool:
     """
     Lista todos los usuarios (requiere autenticación de Admin)
+    Recorre las páginas de a una, así contar una base grande no la carga entera en memoria.
     """
     url = f"{BASE_URL}/usuarios/"
     
@@ -84,28 +96,26 @@ def listar_usuarios(token: str) -> bool:
         "Content-Type": "application/json"
     }
     
-    try:
-        response = requests.get(url, headers=headers)
-        
+    def registrar_pagina(response):
         print_http_transaction(
             metodo="GET",
-            url=url,
+            url=response.url,
             headers=headers,
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion="Listar todos los usuarios"
         )
+    
+    try:
+        total = contar_registros(url, headers=headers, al_recibir_pagina=registrar_pagina)
+        print_exito(f"Se listaron {total} usuarios correctamente")
+        return True
         
-        if response.status_code == 200:
-            usuarios = response.json()
-            print_exito(f"Se listaron {len(usuarios)} usuarios correctamente")
-            return True
-        else:
-            print_error(f"Listar usuarios falló con status {response.status_code}")
-            return False
-            
+    except requests.exceptions.HTTPError as e:
+        print_error(f"Listar usuarios falló con status {e.response.status_code}")
+        return False
     except Exception as e:
         print_error(f"Error: {str(e)}")
         return False
@@ -123,7 +133,7 @@ def listar_odontologos(token: str) -> bool:
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -132,12 +142,12 @@ def listar_odontologos(token: str) -> bool:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion="Listar odontólogos"
         )
         
         if response.status_code == 200:
-            odontologos = response.json()
+            odontologos = cuerpo_respuesta(response)
             if isinstance(odontologos, list):
                 print_exito(f"Se listaron {len(odontologos)} odontólogos correctamente")
             else:
@@ -164,7 +174,7 @@ def listar_servicios(token: str) -> bool:
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -173,12 +183,12 @@ def listar_servicios(token: str) -> bool:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion="Listar servicios odontológicos"
         )
         
         if response.status_code == 200:
-            servicios = response.json()
+            servicios = cuerpo_respuesta(response)
             if isinstance(servicios, list):
                 print_exito(f"Se listaron {len(servicios)} servicios correctamente")
             else:
@@ -201,6 +211,7 @@ def main():
     
     # Inicializar reporte JSON
     reporte = crear_reporte_json(0, "Verificacion de Seeder")
+    transacciones = registrar_transacciones()
     
     print_seccion("FLUJO 00: VERIFICACIÓN DE DATOS DEL SEEDER")
     
@@ -253,18 +264,17 @@ def main():
     # ======================================
     print_seccion("SECCIÓN 2: VERIFICACIÓN DE DATOS DEL SEEDER")
     
-    # 2.1 Listar usuarios (requiere admin)
-    exito_usuarios = listar_usuarios(admin_token)
+    # 2.1 - 2.3 Listar usuarios (requiere admin), odontólogos y servicios.
+    # Son independientes: con FLUJO_MOTOR=async se consultan a la vez.
+    exito_usuarios, exito_odontologos, exito_servicios = reunir(
+        lambda: listar_usuarios(admin_token),
+        lambda: listar_odontologos(admin_token),
+        lambda: listar_servicios(admin_token)
+    )
     if not exito_usuarios:
         print_error("Fallo al listar usuarios")
-    
-    # 2.2 Listar odontólogos
-    exito_odontologos = listar_odontologos(admin_token)
     if not exito_odontologos:
         print_error("Fallo al listar odontólogos")
-    
-    # 2.3 Listar servicios
-    exito_servicios = listar_servicios(admin_token)
     if not exito_servicios:
         print_error("Fallo al listar servicios")
     
@@ -281,8 +291,10 @@ def main():
     # GENERAR REPORTE JSON
     # ======================================
     archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
     print(f"\n{'='*80}")
     print(f"REPORTE JSON GENERADO: {archivo_generado}")
+    print(f"Conexiones HTTP: {cliente.resumen()}")
     print(f"{'='*80}\n")
     
     # ======================================
@@ -293,6 +305,11 @@ def main():
     print_exito("✓ Tokens obtenidos para los 3 roles")
     print_exito("✓ Datos del seeder verificados")
     print_info("El backend está listo para las pruebas de los demás flujos")
+    
+    fallidas = secciones_fallidas(reporte_final)
+    if fallidas:
+        print_error(f"Secciones fallidas: {', '.join(fallidas)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
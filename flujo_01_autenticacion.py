@@ -2,11 +2,12 @@
 FLUJO 01: Autenticacion y Gestion de Usuarios
 Prueba registro, login, logout, ver perfil, actualizar perfil y cambio de contrasena
 """
-import requests
 import sys
 from datetime import datetime
+from http_client import cliente
+from registro_http import cuerpo_respuesta, print_http_transaction
+from reporte_latencias import enriquecer_reporte, registrar_transacciones, secciones_fallidas
 from http_logger import (
-    print_http_transaction, 
     print_seccion, 
     print_exito, 
     print_error,
@@ -34,7 +35,7 @@ def registrar_usuario(datos_registro: dict, descripcion: str) -> tuple[bool, str
     }
     
     try:
-        response = requests.post(url, json=datos_registro, headers=headers)
+        response = cliente.post(url, json=datos_registro, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -43,12 +44,12 @@ def registrar_usuario(datos_registro: dict, descripcion: str) -> tuple[bool, str
             body=datos_registro,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code == 201:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             token = data.get("token")
             print_exito(f"✓ Usuario registrado exitosamente")
             return True, token
@@ -77,7 +78,7 @@ def login(correo: str, password: str, rol_descripcion: str) -> tuple[bool, str,
     }
     
     try:
-        response = requests.post(url, json=body, headers=headers)
+        response = cliente.post(url, json=body, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -86,12 +87,12 @@ def login(correo: str, password: str, rol_descripcion: str) -> tuple[bool, str,
             body=body,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=f"Login como {rol_descripcion}"
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             token = data.get("token")
             usuario = data.get("usuario")
             if token:
@@ -121,7 +122,7 @@ def ver_perfil(token: str, rol_descripcion: str) -> bool:
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -130,7 +131,7 @@ def ver_perfil(token: str, rol_descripcion: str) -> bool:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=f"Ver perfil de {rol_descripcion}"
         )
         
@@ -158,7 +159,7 @@ def actualizar_perfil(token: str, datos_actualizar: dict, rol_descripcion: str)
     }
     
     try:
-        response = requests.patch(url, json=datos_actualizar, headers=headers)
+        response = cliente.patch(url, json=datos_actualizar, headers=headers)
         
         print_http_transaction(
             metodo="PATCH",
@@ -167,7 +168,7 @@ def actualizar_perfil(token: str, datos_actualizar: dict, rol_descripcion: str)
             body=datos_actualizar,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=f"Actualizar perfil de {rol_descripcion}"
         )
         
@@ -201,7 +202,7 @@ def cambiar_password(token: str, password_actual: str, password_nuevo: str, rol_
     }
     
     try:
-        response = requests.post(url, json=body, headers=headers)
+        response = cliente.post(url, json=body, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -210,7 +211,7 @@ def cambiar_password(token: str, password_actual: str, password_nuevo: str, rol_
             body=body,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=f"Cambiar contraseña de {rol_descripcion}"
         )
         
@@ -238,7 +239,7 @@ def logout(token: str, rol_descripcion: str) -> bool:
     }
     
     try:
-        response = requests.post(url, headers=headers)
+        response = cliente.post(url, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -247,7 +248,7 @@ def logout(token: str, rol_descripcion: str) -> bool:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=f"Logout de {rol_descripcion}"
         )
         
@@ -271,6 +272,7 @@ def main():
     
     # Inicializar reporte JSON
     reporte = crear_reporte_json(1, "Autenticacion y Gestion de Usuarios")
+    transacciones = registrar_transacciones()
     
     print_seccion("FLUJO 01: AUTENTICACIÓN Y GESTIÓN DE USUARIOS")
     
@@ -472,7 +474,7 @@ def main():
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         print_http_transaction(
             metodo="GET",
             url=url,
@@ -480,7 +482,7 @@ def main():
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion="Intentar ver perfil con token expirado"
         )
         
@@ -517,7 +519,14 @@ def main():
     # GENERAR ARCHIVO JSON
     # ======================================
     archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
     print_info(f"\nArchivo JSON generado: {archivo_generado}")
+    print_info(f"Conexiones HTTP: {cliente.resumen()}")
+    
+    fallidas = secciones_fallidas(reporte_final)
+    if fallidas:
+        print_error(f"Secciones fallidas: {', '.join(fallidas)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -6,8 +6,12 @@ import requests
 import sys
 from typing import Optional
 from datetime import datetime, timedelta
+from http_client import cliente
+from paginacion import contar_registros
+from registro_http import cuerpo_respuesta, print_http_transaction
+from reporte_latencias import enriquecer_reporte, registrar_transacciones, secciones_fallidas
+from token_cache import login_cacheado
 from http_logger import (
-    print_http_transaction, 
     print_seccion, 
     print_exito, 
     print_error,
@@ -29,24 +33,12 @@ paciente_id = None
 
 
 def login(correo: str, password: str) -> tuple[bool, str, dict]:
-    """Realiza login y retorna (exitoso, token, usuario)"""
-    url = f"{BASE_URL}/auth/login/"
-    body = {"correo": correo, "password": password}
-    headers = {"Content-Type": "application/json"}
-    
-    try:
-        response = requests.post(url, json=body, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            return True, data.get("token"), data.get("usuario")
-        return False, "", {}
-    except Exception as e:
-        print_error(f"Error en login: {str(e)}")
-        return False, "", {}
+    """Realiza login (o reutiliza el token en cache) y retorna (exitoso, token, usuario)"""
+    return login_cacheado(BASE_URL, correo, password)
 
 
 def listar_citas(token: str, descripcion: str, filtros: dict = None) -> bool:
-    """Lista las citas con filtros opcionales"""
+    """Lista las citas con filtros opcionales, recorriendo todas las paginas"""
     url = f"{BASE_URL}/citas/consultas/"
     
     headers = {
@@ -54,29 +46,26 @@ def listar_citas(token: str, descripcion: str, filtros: dict = None) -> bool:
         "Content-Type": "application/json"
     }
     
-    try:
-        response = requests.get(url, params=filtros, headers=headers)
-        
+    def registrar_pagina(response):
         print_http_transaction(
             metodo="GET",
-            url=url + (f"?{requests.compat.urlencode(filtros)}" if filtros else ""),
+            url=response.url,
             headers=headers,
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
+    
+    try:
+        cantidad = contar_registros(url, headers=headers, params=filtros, al_recibir_pagina=registrar_pagina)
+        print_exito(f"Citas listadas correctamente (Total: {cantidad})")
+        return True
         
-        if response.status_code == 200:
-            data = response.json()
-            cantidad = data.get('count', len(data) if isinstance(data, list) else 0)
-            print_exito(f"Citas listadas correctamente (Total: {cantidad})")
-            return True
-        else:
-            print_error(f"Listar citas fallo con status {response.status_code}")
-            return False
-            
+    except requests.exceptions.HTTPError as e:
+        print_error(f"Listar citas fallo con status {e.response.status_code}")
+        return False
     except Exception as e:
         print_error(f"Error: {str(e)}")
         return False
@@ -92,7 +81,7 @@ def obtener_horarios_disponibles(token: str, fecha: str, odontologo_id: int, des
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -101,12 +90,12 @@ def obtener_horarios_disponibles(token: str, fecha: str, odontologo_id: int, des
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             if isinstance(data, list) and len(data) > 0:
                 primer_horario = data[0]
                 id_horario = primer_horario.get('id')
@@ -135,7 +124,7 @@ def crear_cita(token: str, datos_cita: dict, descripcion: str) -> tuple[bool, in
     }
     
     try:
-        response = requests.post(url, json=datos_cita, headers=headers)
+        response = cliente.post(url, json=datos_cita, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -144,12 +133,12 @@ def crear_cita(token: str, datos_cita: dict, descripcion: str) -> tuple[bool, in
             body=datos_cita,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code in [200, 201]:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             cita_id = data.get('id') or data.get('codigo')
             print_exito(f"Cita creada correctamente (ID: {cita_id})")
             return True, cita_id
@@ -172,7 +161,7 @@ def ver_detalle_cita(token: str, cita_id: int, descripcion: str) -> bool:
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -181,7 +170,7 @@ def ver_detalle_cita(token: str, cita_id: int, descripcion: str) -> bool:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
@@ -207,7 +196,7 @@ def actualizar_cita(token: str, cita_id: int, datos_actualizar: dict, descripcio
     }
     
     try:
-        response = requests.patch(url, json=datos_actualizar, headers=headers)
+        response = cliente.patch(url, json=datos_actualizar, headers=headers)
         
         print_http_transaction(
             metodo="PATCH",
@@ -216,7 +205,7 @@ def actualizar_cita(token: str, cita_id: int, datos_actualizar: dict, descripcio
             body=datos_actualizar,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
@@ -244,7 +233,7 @@ def cancelar_cita(token: str, cita_id: int, motivo: str, descripcion: str) -> bo
     }
     
     try:
-        response = requests.post(url, json=body, headers=headers)
+        response = cliente.post(url, json=body, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -253,7 +242,7 @@ def cancelar_cita(token: str, cita_id: int, motivo: str, descripcion: str) -> bo
             body=body,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
@@ -275,6 +264,7 @@ def main():
     global odontologo_id, paciente_id
     
     reporte = crear_reporte_json(2, "Gestion de Citas")
+    transacciones = registrar_transacciones()
     
     print_seccion("FLUJO 02: GESTION DE CITAS")
     print_info("Servidor: http://localhost:8000")
@@ -345,9 +335,9 @@ def main():
     }
     
     try:
-        response_horarios = requests.get(url_horarios, headers=headers_temp)
+        response_horarios = cliente.get(url_horarios, headers=headers_temp)
         if response_horarios.status_code == 200:
-            horarios = response_horarios.json()
+            horarios = cuerpo_respuesta(response_horarios)
             # Usar el primer horario disponible (ID 986 a 992 segun los datos existentes)
             # Para evitar conflictos, usar un horario que no este en uso
             id_horario = 987  # Horario de las 10:00 aproximadamente
@@ -522,7 +512,14 @@ def main():
     # GENERAR ARCHIVO JSON
     # ======================================
     archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
     print_info(f"\nArchivo JSON generado: {archivo_generado}")
+    print_info(f"Conexiones HTTP: {cliente.resumen()}")
+    
+    fallidas = secciones_fallidas(reporte_final)
+    if fallidas:
+        print_error(f"Secciones fallidas: {', '.join(fallidas)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
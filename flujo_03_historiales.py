@@ -4,8 +4,12 @@ Prueba creacion, consulta y actualizacion de historiales medicos
 """
 import requests
 import sys
+from http_client import cliente
+from paginacion import contar_registros
+from registro_http import cuerpo_respuesta, print_http_transaction
+from reporte_latencias import enriquecer_reporte, registrar_transacciones, secciones_fallidas
+from token_cache import login_cacheado
 from http_logger import (
-    print_http_transaction, 
     print_seccion, 
     print_exito, 
     print_error,
@@ -25,23 +29,12 @@ historial_id = None
 
 
 def login(correo: str, password: str) -> tuple[bool, str, dict]:
-    """Realiza login"""
-    url = f"{BASE_URL}/auth/login/"
-    body = {"correo": correo, "password": password}
-    headers = {"Content-Type": "application/json"}
-    
-    try:
-        response = requests.post(url, json=body, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            return True, data.get("token"), data.get("usuario")
-        return False, "", {}
-    except:
-        return False, "", {}
+    """Realiza login (o reutiliza el token en cache) y retorna (exitoso, token, usuario)"""
+    return login_cacheado(BASE_URL, correo, password)
 
 
 def listar_historiales(token: str, descripcion: str, paciente_id: int = None) -> bool:
-    """Lista historiales clinicos"""
+    """Lista historiales clinicos, recorriendo todas las paginas"""
     url = f"{BASE_URL}/historia-clinica/"
     
     headers = {
@@ -51,29 +44,26 @@ def listar_historiales(token: str, descripcion: str, paciente_id: int = None) ->
     
     params = {"paciente": paciente_id} if paciente_id else None
     
-    try:
-        response = requests.get(url, params=params, headers=headers)
-        
+    def registrar_pagina(response):
         print_http_transaction(
             metodo="GET",
-            url=url + (f"?paciente={paciente_id}" if paciente_id else ""),
+            url=response.url,
             headers=headers,
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
+    
+    try:
+        cantidad = contar_registros(url, headers=headers, params=params, al_recibir_pagina=registrar_pagina)
+        print_exito(f"Historiales listados (Total: {cantidad})")
+        return True
         
-        if response.status_code == 200:
-            data = response.json()
-            cantidad = data.get('count', len(data) if isinstance(data, list) else 0)
-            print_exito(f"Historiales listados (Total: {cantidad})")
-            return True
-        else:
-            print_error(f"Listar historiales fallo: {response.status_code}")
-            return False
-            
+    except requests.exceptions.HTTPError as e:
+        print_error(f"Listar historiales fallo: {e.response.status_code}")
+        return False
     except Exception as e:
         print_error(f"Error: {str(e)}")
         return False
@@ -89,7 +79,7 @@ def crear_historial(token: str, datos_historial: dict, descripcion: str) -> tupl
     }
     
     try:
-        response = requests.post(url, json=datos_historial, headers=headers)
+        response = cliente.post(url, json=datos_historial, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -98,12 +88,12 @@ def crear_historial(token: str, datos_historial: dict, descripcion: str) -> tupl
             body=datos_historial,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code in [200, 201]:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             historial_id = data.get('id') or data.get('codigo')
             print_exito(f"Historial creado (ID: {historial_id})")
             return True, historial_id
@@ -126,7 +116,7 @@ def ver_historial(token: str, historial_id: int, descripcion: str) -> bool:
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -135,7 +125,7 @@ def ver_historial(token: str, historial_id: int, descripcion: str) -> bool:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
@@ -161,7 +151,7 @@ def agregar_diagnostico(token: str, historial_id: int, diagnostico: dict, descri
     }
     
     try:
-        response = requests.post(url, json=diagnostico, headers=headers)
+        response = cliente.post(url, json=diagnostico, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -170,7 +160,7 @@ def agregar_diagnostico(token: str, historial_id: int, diagnostico: dict, descri
             body=diagnostico,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
@@ -191,6 +181,7 @@ def main():
     global odontologo_token, admin_token, paciente_id, historial_id
     
     reporte = crear_reporte_json(3, "Historiales Clinicos")
+    transacciones = registrar_transacciones()
     
     print_seccion("FLUJO 03: HISTORIALES CLINICOS")
     print_info("Servidor: http://localhost:8000")
@@ -318,7 +309,7 @@ def main():
         }
         
         try:
-            response = requests.patch(url, json=datos_actualizacion, headers=headers)
+            response = cliente.patch(url, json=datos_actualizacion, headers=headers)
             
             print_http_transaction(
                 metodo="PATCH",
@@ -327,7 +318,7 @@ def main():
                 body=datos_actualizacion,
                 response_status=response.status_code,
                 response_headers=dict(response.headers),
-                response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+                response_body=cuerpo_respuesta(response),
                 descripcion=f"Actualizar historial #{historial_id} con diagnostico y tratamiento"
             )
             
@@ -366,7 +357,14 @@ def main():
     # GENERAR ARCHIVO JSON
     # ======================================
     archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
     print_info(f"\nArchivo JSON generado: {archivo_generado}")
+    print_info(f"Conexiones HTTP: {cliente.resumen()}")
+    
+    fallidas = secciones_fallidas(reporte_final)
+    if fallidas:
+        print_error(f"Secciones fallidas: {', '.join(fallidas)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
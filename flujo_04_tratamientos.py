@@ -2,10 +2,13 @@
 FLUJO 04: Tratamientos y Presupuestos
 Prueba gestion de tratamientos, presupuestos y servicios odontologicos
 """
-import requests
 import sys
+from http_client import cliente
+from paginacion import registros_de_pagina, total_registros
+from registro_http import cuerpo_respuesta, print_http_transaction
+from reporte_latencias import enriquecer_reporte, registrar_transacciones, secciones_fallidas
+from token_cache import login_cacheado
 from http_logger import (
-    print_http_transaction, 
     print_seccion, 
     print_exito, 
     print_error,
@@ -26,19 +29,8 @@ presupuesto_id = None
 
 
 def login(correo: str, password: str) -> tuple[bool, str, dict]:
-    """Realiza login"""
-    url = f"{BASE_URL}/auth/login/"
-    body = {"correo": correo, "password": password}
-    headers = {"Content-Type": "application/json"}
-    
-    try:
-        response = requests.post(url, json=body, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            return True, data.get("token"), data.get("usuario")
-        return False, "", {}
-    except:
-        return False, "", {}
+    """Realiza login (o reutiliza el token en cache) y retorna (exitoso, token, usuario)"""
+    return login_cacheado(BASE_URL, correo, password)
 
 
 def listar_servicios(token: str, descripcion: str) -> tuple[bool, list]:
@@ -51,7 +43,7 @@ def listar_servicios(token: str, descripcion: str) -> tuple[bool, list]:
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -60,13 +52,13 @@ def listar_servicios(token: str, descripcion: str) -> tuple[bool, list]:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code == 200:
-            data = response.json()
-            servicios = data.get('results', data if isinstance(data, list) else [])
+            data = cuerpo_respuesta(response)
+            servicios = registros_de_pagina(data)
             print_exito(f"Servicios listados (Total: {len(servicios)})")
             return True, servicios
         else:
@@ -88,7 +80,7 @@ def crear_plan_tratamiento(token: str, datos: dict, descripcion: str) -> tuple[b
     }
     
     try:
-        response = requests.post(url, json=datos, headers=headers)
+        response = cliente.post(url, json=datos, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -97,12 +89,12 @@ def crear_plan_tratamiento(token: str, datos: dict, descripcion: str) -> tuple[b
             body=datos,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code in [200, 201]:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             plan_id = data.get('id') or data.get('idplantratamiento')
             print_exito(f"Plan de tratamiento creado (ID: {plan_id})")
             return True, plan_id
@@ -127,7 +119,7 @@ def listar_planes(token: str, descripcion: str, paciente_id: int = None) -> bool
     params = {"paciente": paciente_id} if paciente_id else None
     
     try:
-        response = requests.get(url, params=params, headers=headers)
+        response = cliente.get(url, params=params, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -136,13 +128,13 @@ def listar_planes(token: str, descripcion: str, paciente_id: int = None) -> bool
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code == 200:
-            data = response.json()
-            cantidad = data.get('count', len(data) if isinstance(data, list) else 0)
+            data = cuerpo_respuesta(response)
+            cantidad = total_registros(data)
             print_exito(f"Planes listados (Total: {cantidad})")
             return True
         else:
@@ -164,7 +156,7 @@ def crear_presupuesto(token: str, datos: dict, descripcion: str) -> tuple[bool,
     }
     
     try:
-        response = requests.post(url, json=datos, headers=headers)
+        response = cliente.post(url, json=datos, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -173,12 +165,12 @@ def crear_presupuesto(token: str, datos: dict, descripcion: str) -> tuple[bool,
             body=datos,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code in [200, 201]:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             presupuesto_id = data.get('id') or data.get('idpresupuesto')
             print_exito(f"Presupuesto creado (ID: {presupuesto_id})")
             return True, presupuesto_id
@@ -201,7 +193,7 @@ def ver_presupuesto(token: str, presupuesto_id: int, descripcion: str) -> bool:
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -210,7 +202,7 @@ def ver_presupuesto(token: str, presupuesto_id: int, descripcion: str) -> bool:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
@@ -231,6 +223,7 @@ def main():
     global odontologo_token, admin_token, paciente_id, tratamiento_id, presupuesto_id
     
     reporte = crear_reporte_json(4, "Tratamientos y Presupuestos")
+    transacciones = registrar_transacciones()
     
     print_seccion("FLUJO 04: TRATAMIENTOS Y PRESUPUESTOS")
     print_info("Servidor: http://localhost:8000")
@@ -434,7 +427,14 @@ def main():
     # GENERAR ARCHIVO JSON
     # ======================================
     archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
     print_info(f"\nArchivo JSON generado: {archivo_generado}")
+    print_info(f"Conexiones HTTP: {cliente.resumen()}")
+    
+    fallidas = secciones_fallidas(reporte_final)
+    if fallidas:
+        print_error(f"Secciones fallidas: {', '.join(fallidas)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -5,8 +5,12 @@ Prueba generacion de facturas y registro de pagos
 import requests
 import sys
 from datetime import datetime, timedelta
+from http_client import cliente
+from paginacion import contar_registros, iterar_registros, registros_de_pagina
+from registro_http import cuerpo_respuesta, print_http_transaction
+from reporte_latencias import enriquecer_reporte, registrar_transacciones, secciones_fallidas
+from token_cache import login_cacheado
 from http_logger import (
-    print_http_transaction, 
     print_seccion, 
     print_exito, 
     print_error,
@@ -27,23 +31,12 @@ pago_id = None
 
 
 def login(correo: str, password: str) -> tuple[bool, str, dict]:
-    """Realiza login"""
-    url = f"{BASE_URL}/auth/login/"
-    body = {"correo": correo, "password": password}
-    headers = {"Content-Type": "application/json"}
-    
-    try:
-        response = requests.post(url, json=body, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            return True, data.get("token"), data.get("usuario")
-        return False, "", {}
-    except:
-        return False, "", {}
+    """Realiza login (o reutiliza el token en cache) y retorna (exitoso, token, usuario)"""
+    return login_cacheado(BASE_URL, correo, password)
 
 
 def listar_facturas(token: str, descripcion: str, paciente_id: int = None) -> tuple[bool, list]:
-    """Lista facturas"""
+    """Lista facturas de todas las paginas"""
     url = f"{BASE_URL}/pagos/facturas/"
     
     headers = {
@@ -53,29 +46,27 @@ def listar_facturas(token: str, descripcion: str, paciente_id: int = None) -> tu
     
     params = {"paciente": paciente_id} if paciente_id else None
     
-    try:
-        response = requests.get(url, params=params, headers=headers)
-        
+    def registrar_pagina(response):
         print_http_transaction(
             metodo="GET",
-            url=url + (f"?paciente={paciente_id}" if paciente_id else ""),
+            url=response.url,
             headers=headers,
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
+    
+    try:
+        facturas = list(iterar_registros(url, headers=headers, params=params, prefetch=True,
+                                         al_recibir_pagina=registrar_pagina))
+        print_exito(f"Facturas listadas (Total: {len(facturas)})")
+        return True, facturas
         
-        if response.status_code == 200:
-            data = response.json()
-            facturas = data.get('results', data if isinstance(data, list) else [])
-            print_exito(f"Facturas listadas (Total: {len(facturas)})")
-            return True, facturas
-        else:
-            print_error(f"Listar facturas fallo: {response.status_code}")
-            return False, []
-            
+    except requests.exceptions.HTTPError as e:
+        print_error(f"Listar facturas fallo: {e.response.status_code}")
+        return False, []
     except Exception as e:
         print_error(f"Error: {str(e)}")
         return False, []
@@ -91,7 +82,7 @@ def crear_factura(token: str, datos: dict, descripcion: str) -> tuple[bool, int]
     }
     
     try:
-        response = requests.post(url, json=datos, headers=headers)
+        response = cliente.post(url, json=datos, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -100,24 +91,24 @@ def crear_factura(token: str, datos: dict, descripcion: str) -> tuple[bool, int]
             body=datos,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code in [200, 201]:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             factura_id = data.get('id') or data.get('idfactura')
             
             # Si no viene el ID en la respuesta, listar para obtener la ultima
             if not factura_id:
                 print_info("Factura creada, consultando lista para obtener ID...")
-                list_response = requests.get(
+                list_response = cliente.get(
                     f"{BASE_URL}/pagos/facturas/",
                     headers=headers
                 )
                 if list_response.status_code == 200:
-                    list_data = list_response.json()
-                    facturas = list_data.get('results', list_data if isinstance(list_data, list) else [])
+                    list_data = cuerpo_respuesta(list_response)
+                    facturas = registros_de_pagina(list_data)
                     if facturas:
                         factura_id = facturas[0].get('id')
             
@@ -142,7 +133,7 @@ def ver_factura(token: str, factura_id: int, descripcion: str) -> bool:
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = cliente.get(url, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -151,7 +142,7 @@ def ver_factura(token: str, factura_id: int, descripcion: str) -> bool:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
@@ -177,7 +168,7 @@ def registrar_pago(token: str, datos: dict, descripcion: str) -> tuple[bool, int
     }
     
     try:
-        response = requests.post(url, json=datos, headers=headers)
+        response = cliente.post(url, json=datos, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -186,12 +177,12 @@ def registrar_pago(token: str, datos: dict, descripcion: str) -> tuple[bool, int
             body=datos,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code in [200, 201]:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             pago_id = data.get('id') or data.get('idpago')
             print_exito(f"Pago registrado (ID: {pago_id})")
             return True, pago_id
@@ -205,7 +196,7 @@ def registrar_pago(token: str, datos: dict, descripcion: str) -> tuple[bool, int
 
 
 def listar_pagos(token: str, descripcion: str, factura_id: int = None) -> bool:
-    """Lista pagos"""
+    """Lista pagos, recorriendo todas las paginas"""
     url = f"{BASE_URL}/pagos/"
     
     headers = {
@@ -215,29 +206,26 @@ def listar_pagos(token: str, descripcion: str, factura_id: int = None) -> bool:
     
     params = {"factura": factura_id} if factura_id else None
     
-    try:
-        response = requests.get(url, params=params, headers=headers)
-        
+    def registrar_pagina(response):
         print_http_transaction(
             metodo="GET",
-            url=url + (f"?factura={factura_id}" if factura_id else ""),
+            url=response.url,
             headers=headers,
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
+    
+    try:
+        cantidad = contar_registros(url, headers=headers, params=params, al_recibir_pagina=registrar_pagina)
+        print_exito(f"Pagos listados (Total: {cantidad})")
+        return True
         
-        if response.status_code == 200:
-            data = response.json()
-            cantidad = data.get('count', len(data) if isinstance(data, list) else 0)
-            print_exito(f"Pagos listados (Total: {cantidad})")
-            return True
-        else:
-            print_error(f"Listar pagos fallo: {response.status_code}")
-            return False
-            
+    except requests.exceptions.HTTPError as e:
+        print_error(f"Listar pagos fallo: {e.response.status_code}")
+        return False
     except Exception as e:
         print_error(f"Error: {str(e)}")
         return False
@@ -248,6 +236,7 @@ def main():
     global admin_token, paciente_token, paciente_id, factura_id, pago_id
     
     reporte = crear_reporte_json(5, "Facturacion y Pagos")
+    transacciones = registrar_transacciones()
     
     print_seccion("FLUJO 05: FACTURACION Y PAGOS")
     print_info("Servidor: http://localhost:8000")
@@ -412,8 +401,10 @@ def main():
     # GENERAR REPORTE JSON
     # ======================================
     archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
     print(f"\n{'='*80}")
     print(f"REPORTE JSON GENERADO: {archivo_generado}")
+    print(f"Conexiones HTTP: {cliente.resumen()}")
     print(f"{'='*80}\n")
     
     # ======================================
@@ -426,6 +417,11 @@ def main():
     print_exito("OK Registro de pagos exitoso")
     print_exito("OK Consulta de pagos funciona")
     print_info("Sistema de facturacion y pagos funcionando correctamente")
+    
+    fallidas = secciones_fallidas(reporte_final)
+    if fallidas:
+        print_error(f"Secciones fallidas: {', '.join(fallidas)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
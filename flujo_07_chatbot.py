@@ -2,11 +2,12 @@
 FLUJO 07: Chatbot Inteligente
 Prueba conversaciones, intents, historial y reset del chatbot
 """
-import requests
 import sys
 import uuid
+from http_client import cliente
+from registro_http import cuerpo_respuesta, print_http_transaction
+from reporte_latencias import enriquecer_reporte, registrar_transacciones, secciones_fallidas
 from http_logger import (
-    print_http_transaction, 
     print_seccion, 
     print_exito, 
     print_error,
@@ -21,6 +22,9 @@ BASE_URL = "http://localhost:8000/api/v1"
 # Variables globales
 session_id = None
 
+# Historial local por session_id que completa obtener_historial_incremental
+historiales = {}
+
 
 def enviar_mensaje(session_id: str, mensaje: str, descripcion: str, **kwargs) -> tuple[bool, dict]:
     """Envia un mensaje al chatbot"""
@@ -42,7 +46,7 @@ def enviar_mensaje(session_id: str, mensaje: str, descripcion: str, **kwargs) ->
     headers = {"Content-Type": "application/json"}
     
     try:
-        response = requests.post(url, json=body, headers=headers)
+        response = cliente.post(url, json=body, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -51,12 +55,12 @@ def enviar_mensaje(session_id: str, mensaje: str, descripcion: str, **kwargs) ->
             body=body,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             mensaje_bot = data.get('mensaje', '')
             preview = mensaje_bot[:80] + "..." if len(mensaje_bot) > 80 else mensaje_bot
             print_exito(f"Bot respondio: {preview}")
@@ -78,7 +82,7 @@ def obtener_historial(session_id: str, descripcion: str) -> tuple[bool, dict]:
     params = {"session_id": session_id}
     
     try:
-        response = requests.get(url, params=params, headers=headers)
+        response = cliente.get(url, params=params, headers=headers)
         
         print_http_transaction(
             metodo="GET",
@@ -87,12 +91,12 @@ def obtener_historial(session_id: str, descripcion: str) -> tuple[bool, dict]:
             body=None,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code == 200:
-            data = response.json()
+            data = cuerpo_respuesta(response)
             mensajes = data.get('mensajes', [])
             print_exito(f"Historial obtenido ({len(mensajes)} mensajes)")
             return True, data
@@ -105,6 +109,69 @@ def obtener_historial(session_id: str, descripcion: str) -> tuple[bool, dict]:
         return False, {}
 
 
+def obtener_historial_incremental(session_id: str, descripcion: str) -> tuple[bool, dict]:
+    """
+    Como obtener_historial, pero pide solo los mensajes posteriores al ultimo
+    que ya esta en el historial local (desde_id) y los agrega a ese historial.
+    Si el servidor no soporta desde_id responde la conversacion completa y el
+    historial local se reemplaza.
+    
+    Si otro cliente reinicio la conversacion, los ids vuelven a empezar en 1:
+    el reinicio se detecta porque cambia conversacion_id, porque el servidor
+    rechaza el cursor con 409/410 o, si no envia ninguno de los dos, porque
+    ultimo_id quedo por debajo del local; el historial se vuelve a pedir desde
+    cero.
+    """
+    url = f"{BASE_URL}/chatbot/historial/"
+    local = historiales.setdefault(session_id, {'mensajes': [], 'ultimo_id': 0, 'conversacion_id': None})
+    
+    headers = {"Content-Type": "application/json"}
+    params = {"session_id": session_id, "desde_id": local['ultimo_id']}
+    
+    try:
+        response = cliente.get(url, params=params, headers=headers)
+        
+        print_http_transaction(
+            metodo="GET",
+            url=f"{url}?session_id={session_id}&desde_id={params['desde_id']}",
+            headers=headers,
+            body=None,
+            response_status=response.status_code,
+            response_headers=dict(response.headers),
+            response_body=cuerpo_respuesta(response),
+            descripcion=descripcion
+        )
+        
+        if response.status_code == 200:
+            data = cuerpo_respuesta(response)
+            mensajes = data.get('mensajes', [])
+            if 'desde_id' not in data:
+                local['mensajes'] = list(mensajes)
+            elif local['ultimo_id'] and (data.get('conversacion_id') != local['conversacion_id']
+                                         or data.get('ultimo_id', 0) < local['ultimo_id']):
+                # La conversacion se reinicio en el servidor: se vuelve a pedir desde cero
+                historiales.pop(session_id, None)
+                return obtener_historial_incremental(session_id, descripcion)
+            else:
+                local['mensajes'].extend(mensajes)
+            ultimo = local['mensajes'][-1].get('id', len(local['mensajes'])) if local['mensajes'] else 0
+            local['ultimo_id'] = data.get('ultimo_id', ultimo)
+            local['conversacion_id'] = data.get('conversacion_id')
+            print_exito(f"Historial actualizado ({len(mensajes)} nuevos, {len(local['mensajes'])} en total)")
+            return True, dict(data, mensajes=local['mensajes'], nuevos=len(mensajes))
+        elif response.status_code in (409, 410) and local['ultimo_id']:
+            # El servidor rechaza el cursor porque la conversacion ya no existe
+            historiales.pop(session_id, None)
+            return obtener_historial_incremental(session_id, descripcion)
+        else:
+            print_error(f"Obtener historial fallo: {response.status_code}")
+            return False, {}
+            
+    except Exception as e:
+        print_error(f"Error: {str(e)}")
+        return False, {}
+
+
 def reiniciar_conversacion(session_id: str, descripcion: str) -> bool:
     """Reinicia el contexto de la conversacion"""
     url = f"{BASE_URL}/chatbot/reset/"
@@ -113,7 +180,7 @@ def reiniciar_conversacion(session_id: str, descripcion: str) -> bool:
     headers = {"Content-Type": "application/json"}
     
     try:
-        response = requests.post(url, json=body, headers=headers)
+        response = cliente.post(url, json=body, headers=headers)
         
         print_http_transaction(
             metodo="POST",
@@ -122,11 +189,12 @@ def reiniciar_conversacion(session_id: str, descripcion: str) -> bool:
             body=body,
             response_status=response.status_code,
             response_headers=dict(response.headers),
-            response_body=response.json() if response.headers.get('Content-Type', '').startswith('application/json') else response.text,
+            response_body=cuerpo_respuesta(response),
             descripcion=descripcion
         )
         
         if response.status_code == 200:
+            historiales.pop(session_id, None)
             print_exito("Conversacion reiniciada")
             return True
         else:
@@ -144,6 +212,7 @@ def main():
     
     # Inicializar reporte JSON
     reporte = crear_reporte_json(7, "Chatbot Inteligente")
+    transacciones = registrar_transacciones()
     
     print_seccion("FLUJO 07: CHATBOT INTELIGENTE")
     print_info("Servidor: http://localhost:8000")
@@ -306,8 +375,10 @@ def main():
     # GENERAR REPORTE JSON
     # ======================================
     archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
     print(f"\n{'='*80}")
     print(f"REPORTE JSON GENERADO: {archivo_generado}")
+    print(f"Conexiones HTTP: {cliente.resumen()}")
     print(f"{'='*80}\n")
     
     # ======================================
@@ -324,6 +395,11 @@ def main():
     print_exito("OK Reinicio de conversacion funciona")
     print_info("Chatbot inteligente funcionando correctamente")
     print_warning("Nota: El chatbot usa IA para entender intenciones del usuario")
+    
+    fallidas = secciones_fallidas(reporte_final)
+    if fallidas:
+        print_error(f"Secciones fallidas: {', '.join(fallidas)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
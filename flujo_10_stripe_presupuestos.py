@@ -11,7 +11,6 @@ Este flujo prueba el sistema de pagos de presupuestos con Stripe:
 7. Listar pagos del paciente
 """
 
-import requests
 import sys
 import os
 import django
@@ -21,9 +20,13 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+from http_client import cliente
+from paginacion import iterar_registros, registros_de_pagina
+from registro_http import cuerpo_respuesta, print_http_transaction
+from reporte_latencias import enriquecer_reporte, registrar_transacciones, secciones_fallidas
+from token_cache import login_cacheado
 from json_output_helper import crear_reporte_json
 from http_logger import (
-    print_http_transaction,
     print_seccion,
     print_exito,
     print_error,
@@ -31,78 +34,28 @@ from http_logger import (
 )
 
 BASE_URL = "http://localhost:8000"
+API_URL = f"{BASE_URL}/api/v1"
 
 
 def autenticar_usuarios():
-    """Autenticar admin y paciente."""
+    """Autenticar admin y paciente (reutilizando los tokens en cache si siguen validos)."""
     print("\n=== SECCION 1: AUTENTICACION DE USUARIOS ===")
     
     # Login como admin
-    payload_admin = {
-        "correo": "admin@clinica.com",
-        "password": "admin123"
-    }
-    
-    url = f"{BASE_URL}/api/v1/auth/login/"
-    
     print("\n[1.1] Login como Administrador")
-    print_http_transaction(
-        metodo="POST",
-        url=url,
-        body=payload_admin,
-        descripcion="Login como administrador"
-    )
-    
-    response_admin = requests.post(url, json=payload_admin)
-    
-    print_http_transaction(
-        metodo="POST",
-        url=url,
-        body=payload_admin,
-        response_status=response_admin.status_code,
-        response_body=response_admin.json() if response_admin.status_code == 200 else response_admin.text,
-        descripcion="Respuesta login admin"
-    )
-    
-    if response_admin.status_code != 200:
+    exito, admin_token, _ = login_cacheado(API_URL, "admin@clinica.com", "admin123")
+    if not exito:
         print("✗ Error en autenticacion de admin")
         return False, None, None
-    
-    admin_token = response_admin.json().get('token')
-    print(f"✓ Admin autenticado")
+    print("✓ Admin autenticado")
     
     # Login como paciente
-    payload_paciente = {
-        "correo": "ana.lopez@email.com",
-        "password": "paciente123"
-    }
-    
     print("\n[1.2] Login como Paciente")
-    print_http_transaction(
-        metodo="POST",
-        url=url,
-        body=payload_paciente,
-        descripcion="Login como paciente"
-    )
-    
-    response_paciente = requests.post(url, json=payload_paciente)
-    
-    print_http_transaction(
-        metodo="POST",
-        url=url,
-        body=payload_paciente,
-        response_status=response_paciente.status_code,
-        response_body=response_paciente.json() if response_paciente.status_code == 200 else response_paciente.text,
-        descripcion="Respuesta login paciente"
-    )
-    
-    if response_paciente.status_code != 200:
+    exito, paciente_token, paciente_usuario = login_cacheado(API_URL, "ana.lopez@email.com", "paciente123")
+    if not exito:
         print("✗ Error en autenticacion de paciente")
         return False, admin_token, None
-    
-    paciente_token = response_paciente.json().get('token')
-    paciente_id = response_paciente.json().get('usuario', {}).get('codigo')
-    print(f"✓ Paciente autenticado (ID: {paciente_id})")
+    print(f"✓ Paciente autenticado (ID: {paciente_usuario.get('codigo')})")
     
     return True, admin_token, paciente_token
 
@@ -121,20 +74,20 @@ def obtener_tipos_consulta(token):
         descripcion="Obtener tipos de consulta"
     )
     
-    response = requests.get(url, headers=headers)
+    response = cliente.get(url, headers=headers)
     
     print_http_transaction(
         metodo="GET",
         url=url,
         headers=headers,
         response_status=response.status_code,
-        response_body=response.json() if response.status_code == 200 else response.text,
+        response_body=cuerpo_respuesta(response),
         descripcion="Respuesta - Tipos de consulta"
     )
     
     if response.status_code == 200:
-        data = response.json()
-        tipos = data.get('results', data if isinstance(data, list) else [])
+        data = cuerpo_respuesta(response)
+        tipos = registros_de_pagina(data)
         if tipos:
             tipo_seleccionado = tipos[0]
             print(f"✓ Se encontraron {len(tipos)} tipos de consulta")
@@ -168,7 +121,7 @@ def crear_payment_intent(token, monto, tipo_consulta_id):
         descripcion="Crear Payment Intent"
     )
     
-    response = requests.post(url, json=payload, headers=headers)
+    response = cliente.post(url, json=payload, headers=headers)
     
     print_http_transaction(
         metodo="POST",
@@ -176,12 +129,12 @@ def crear_payment_intent(token, monto, tipo_consulta_id):
         headers=headers,
         body=payload,
         response_status=response.status_code,
-        response_body=response.json() if response.status_code == 200 else response.text,
+        response_body=cuerpo_respuesta(response),
         descripcion="Respuesta - Payment Intent creado"
     )
     
     if response.status_code == 200 or response.status_code == 201:
-        data = response.json()
+        data = cuerpo_respuesta(response)
         client_secret = data.get('client_secret')
         pago_id = data.get('pago_id')
         codigo_pago = data.get('codigo_pago')
@@ -217,7 +170,7 @@ def confirmar_pago(token, pago_id):
         descripcion="Confirmar pago"
     )
     
-    response = requests.post(url, json=payload, headers=headers)
+    response = cliente.post(url, json=payload, headers=headers)
     
     print_http_transaction(
         metodo="POST",
@@ -225,12 +178,12 @@ def confirmar_pago(token, pago_id):
         headers=headers,
         body=payload,
         response_status=response.status_code,
-        response_body=response.json() if response.status_code == 200 else response.text,
+        response_body=cuerpo_respuesta(response),
         descripcion="Respuesta - Pago confirmado"
     )
     
     if response.status_code == 200:
-        data = response.json()
+        data = cuerpo_respuesta(response)
         estado = data.get('estado')
         print(f"✓ Pago confirmado exitosamente")
         print(f"  Estado: {estado}")
@@ -271,7 +224,7 @@ def crear_cita_con_pago(token, pago_id, tipo_consulta_id):
         descripcion="Crear cita con pago vinculado"
     )
     
-    response = requests.post(url, json=payload, headers=headers)
+    response = cliente.post(url, json=payload, headers=headers)
     
     print_http_transaction(
         metodo="POST",
@@ -279,12 +232,12 @@ def crear_cita_con_pago(token, pago_id, tipo_consulta_id):
         headers=headers,
         body=payload,
         response_status=response.status_code,
-        response_body=response.json() if response.status_code == 200 else response.text,
+        response_body=cuerpo_respuesta(response),
         descripcion="Respuesta - Cita creada"
     )
     
     if response.status_code == 200 or response.status_code == 201:
-        data = response.json()
+        data = cuerpo_respuesta(response)
         consulta_id = data.get('codigo')
         pago_vinculado = data.get('pago_vinculado', False)
         print(f"✓ Cita creada exitosamente")
@@ -314,20 +267,20 @@ def verificar_vinculacion(token, consulta_id, pago_id):
         descripcion="Obtener detalles de consulta"
     )
     
-    response_consulta = requests.get(url_consulta, headers=headers)
+    response_consulta = cliente.get(url_consulta, headers=headers)
     
     print_http_transaction(
         metodo="GET",
         url=url_consulta,
         headers=headers,
         response_status=response_consulta.status_code,
-        response_body=response_consulta.json() if response_consulta.status_code == 200 else response_consulta.text,
+        response_body=cuerpo_respuesta(response_consulta),
         descripcion="Respuesta - Consulta"
     )
     
     consulta_ok = False
     if response_consulta.status_code == 200:
-        consulta_data = response_consulta.json()
+        consulta_data = cuerpo_respuesta(response_consulta)
         print(f"✓ Consulta obtenida - ID: {consulta_data.get('codigo')}")
         consulta_ok = True
     else:
@@ -344,21 +297,21 @@ def verificar_vinculacion(token, consulta_id, pago_id):
         descripcion="Obtener detalles de pago"
     )
     
-    response_pago = requests.get(url_pago, headers=headers)
+    response_pago = cliente.get(url_pago, headers=headers)
     
     print_http_transaction(
         metodo="GET",
         url=url_pago,
         headers=headers,
         response_status=response_pago.status_code,
-        response_body=response_pago.json() if response_pago.status_code == 200 else response_pago.text,
+        response_body=cuerpo_respuesta(response_pago),
         descripcion="Respuesta - Pago"
     )
     
     pago_ok = False
     vinculacion_ok = False
     if response_pago.status_code == 200:
-        pago_data = response_pago.json()
+        pago_data = cuerpo_respuesta(response_pago)
         consulta_vinculada = pago_data.get('consulta')
         print(f"✓ Pago obtenido - Estado: {pago_data.get('estado')}")
         print(f"  Consulta vinculada: {consulta_vinculada}")
@@ -389,31 +342,34 @@ def listar_pagos(token):
         descripcion="Listar pagos en linea"
     )
     
-    response = requests.get(url, headers=headers)
-    
-    print_http_transaction(
-        metodo="GET",
-        url=url,
-        headers=headers,
-        response_status=response.status_code,
-        response_body=response.json() if response.status_code == 200 else response.text,
-        descripcion="Respuesta - Lista de pagos"
-    )
-    
-    if response.status_code == 200:
-        data = response.json()
-        pagos = data.get('results', data if isinstance(data, list) else [])
-        print(f"✓ Se encontraron {len(pagos)} pagos en linea")
-        
-        if pagos:
-            print("\nUltimos 3 pagos:")
-            for pago in pagos[:3]:
-                print(f"  - ID {pago.get('codigo')}: ${pago.get('monto')} - Estado: {pago.get('estado')}")
-        
-        return True
-    else:
+    def registrar_pagina(response):
+        print_http_transaction(
+            metodo="GET",
+            url=response.url,
+            headers=headers,
+            response_status=response.status_code,
+            response_body=cuerpo_respuesta(response),
+            descripcion="Respuesta - Lista de pagos"
+        )
+    
+    # Se recorren todas las paginas; solo se guardan los 3 primeros para mostrarlos
+    primeros, total = [], 0
+    try:
+        for pago in iterar_registros(url, headers=headers, prefetch=True, al_recibir_pagina=registrar_pagina):
+            total += 1
+            if len(primeros) < 3:
+                primeros.append(pago)
+    except Exception:
         print("✗ Error al listar pagos")
         return False
+    
+    print(f"✓ Se encontraron {total} pagos en linea")
+    if primeros:
+        print("\nUltimos 3 pagos:")
+        for pago in primeros:
+            print(f"  - ID {pago.get('codigo')}: ${pago.get('monto')} - Estado: {pago.get('estado')}")
+    
+    return True
 
 
 def main():
@@ -424,6 +380,7 @@ def main():
     
     # Inicializar reporte JSON
     reporte = crear_reporte_json(9, "Pruebas de Integracion con Stripe")
+    transacciones = registrar_transacciones()
     
     # SECCION 1: Autenticacion
     exito_auth, admin_token, paciente_token = autenticar_usuarios()
@@ -437,8 +394,9 @@ def main():
         print("\n✗ No se puede continuar sin autenticacion")
         reporte.agregar_error("Autenticacion", "Fallo la autenticacion de usuarios")
         archivo_generado = reporte.generar_archivo()
+        enriquecer_reporte(archivo_generado, transacciones)
         print(f"\n✓ Reporte JSON generado: {archivo_generado}")
-        return
+        sys.exit(1)
     
     # Usar token de paciente para el flujo de pago
     token = paciente_token
@@ -455,8 +413,9 @@ def main():
         print("\n✗ No se puede continuar sin tipos de consulta")
         reporte.agregar_error("Tipos Consulta", "No hay tipos de consulta disponibles")
         archivo_generado = reporte.generar_archivo()
+        enriquecer_reporte(archivo_generado, transacciones)
         print(f"\n✓ Reporte JSON generado: {archivo_generado}")
-        return
+        sys.exit(1)
     
     tipo_consulta_id = tipo_consulta.get('id')
     tipo_consulta_nombre = tipo_consulta.get('nombre')
@@ -477,8 +436,9 @@ def main():
         print("\n✗ No se puede continuar sin Payment Intent")
         reporte.agregar_error("Payment Intent", "Error al crear Payment Intent en Stripe")
         archivo_generado = reporte.generar_archivo()
+        enriquecer_reporte(archivo_generado, transacciones)
         print(f"\n✓ Reporte JSON generado: {archivo_generado}")
-        return
+        sys.exit(1)
     
     reporte.agregar_dato_creado("pago", pago_id, {
         "codigo_pago": codigo_pago,
@@ -518,8 +478,9 @@ def main():
         print("\n✗ No se puede continuar sin confirmar el pago")
         reporte.agregar_error("Confirmar Pago", "Error al confirmar el pago")
         archivo_generado = reporte.generar_archivo()
+        enriquecer_reporte(archivo_generado, transacciones)
         print(f"\n✓ Reporte JSON generado: {archivo_generado}")
-        return
+        sys.exit(1)
     
     # SECCION 5: Crear cita con pago
     exito_cita, consulta_id = crear_cita_con_pago(token, pago_id, tipo_consulta_id)
@@ -554,6 +515,7 @@ def main():
     
     # Generar reporte JSON
     archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
     
     print("\n" + "=" * 60)
     print("RESUMEN DEL FLUJO 09")
@@ -571,7 +533,13 @@ def main():
         print(f"  - Consulta ID: {consulta_id}")
         print(f"  - Monto: ${monto}")
     print(f"\n✓ Reporte JSON generado: {archivo_generado}")
+    print(f"Conexiones HTTP: {cliente.resumen()}")
     print("=" * 60)
+    
+    fallidas = secciones_fallidas(reporte_final)
+    if fallidas:
+        print(f"✗ Secciones fallidas: {', '.join(fallidas)}")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
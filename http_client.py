@@ -0,0 +1,337 @@
+"""
+Cliente HTTP compartido por los flujos de prueba
+Una sola requests.Session con keep-alive: las peticiones al mismo host reutilizan
+la conexión TCP del pool en vez de abrir una nueva en cada llamada.
+
+Uso:
+    from http_client import cliente
+
+    response = cliente.post(url, json=body, headers=headers)
+    ...
+    print_info(f"Conexiones HTTP: {cliente.resumen()}")
+
+Variables de entorno:
+    FLUJO_POOL_SIZE   conexiones por host que se mantienen abiertas (default: 10)
+    FLUJO_TENANT      subdominio del tenant, enviado como X-Tenant-Subdomain
+                      en todas las peticiones (default: vacío = schema public)
+    FLUJO_CACHE_HTTP  1 responde los GET de catálogos desde cache_http
+                      (default: 0, desactivada)
+    FLUJO_MOTOR       'sync' (default) o 'async': con 'async' las peticiones pasan
+                      por el event loop de motor_async y reunir() ejecuta helpers
+                      independientes a la vez
+    FLUJO_CASETE      graba o reproduce las peticiones en este casete (ver casetes);
+                      FLUJO_CASETE_MODO = grabar | reproducir
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+POOL_SIZE = int(os.environ.get('FLUJO_POOL_SIZE', '10'))
+TENANT = os.environ.get('FLUJO_TENANT', '')
+MOTOR = os.environ.get('FLUJO_MOTOR', 'sync')
+CACHE_HTTP = os.environ.get('FLUJO_CACHE_HTTP', '0') == '1'
+CASETE = os.environ.get('FLUJO_CASETE', '')
+MODO_CASETE = os.environ.get('FLUJO_CASETE_MODO', '')
+
+
+# Tiempo de conexión TCP/TLS de la petición en curso en cada hilo
+_medicion = threading.local()
+
+
+def _medir_conexion(conexion):
+    """Envuelve conexion.connect para sumar su duración a la petición del hilo actual"""
+    conectar = conexion.connect
+
+    def connect_medido():
+        inicio = time.perf_counter()
+        try:
+            conectar()
+        finally:
+            _medicion.conexion = getattr(_medicion, 'conexion', 0.0) + time.perf_counter() - inicio
+
+    conexion.connect = connect_medido
+    return conexion
+
+
+class _AdaptadorContado(HTTPAdapter):
+    """HTTPAdapter que avisa al cliente cada vez que el pool abre una conexión nueva"""
+
+    def __init__(self, al_abrir_conexion, **kwargs):
+        self._al_abrir_conexion = al_abrir_conexion
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        avisar = self._al_abrir_conexion
+
+        class PoolHTTP(HTTPConnectionPool):
+            def _new_conn(self):
+                avisar()
+                return _medir_conexion(super()._new_conn())
+
+        class PoolHTTPS(HTTPSConnectionPool):
+            def _new_conn(self):
+                avisar()
+                return _medir_conexion(super()._new_conn())
+
+        self.poolmanager.pool_classes_by_scheme = {'http': PoolHTTP, 'https': PoolHTTPS}
+
+
+class ClienteHTTP:
+    """Session con pool de conexiones y contadores de conexiones abiertas/reutilizadas"""
+
+    def __init__(self, pool_size: int = POOL_SIZE):
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self.peticiones = 0
+        # Las que salieron a la red; las servidas por la caché o un casete no usan conexión
+        self.peticiones_red = 0
+        self.conexiones_abiertas = 0
+        # Función (metodo, url, **kwargs) -> Response que reemplaza a la Session
+        self.transporte = None
+        self.motor = None
+        # CacheHTTP para los GET de catálogos (ver usar_cache)
+        self.cache = None
+        # Casete donde se graban las respuestas (ver usar_casete)
+        self.casete = None
+        self.grabando = False
+        # Funciones (metodo, url, status, duracion_segundos, tiempos) avisadas al terminar
+        # cada petición; status y tiempos son None si la petición lanzó una excepción
+        self.observadores = []
+
+        self.session = requests.Session()
+        if TENANT:
+            self.session.headers['X-Tenant-Subdomain'] = TENANT
+        self.redimensionar_pool(pool_size)
+
+    def redimensionar_pool(self, pool_size: int):
+        """Monta un adaptador nuevo con pool_size conexiones por host (p. ej. una por usuario virtual)"""
+        self.pool_size = pool_size
+        adaptador = _AdaptadorContado(
+            self._contar_conexion,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size
+        )
+        self.session.mount('http://', adaptador)
+        self.session.mount('https://', adaptador)
+
+    def _contar_conexion(self):
+        with self._lock:
+            self.conexiones_abiertas += 1
+
+    def request(self, metodo: str, url: str, **kwargs) -> requests.Response:
+        """
+        Envía la petición y deja en response.tiempos el desglose medido con reloj
+        monotónico (ms): conexion_ms (TCP/TLS, 0 si se reutilizó la conexión),
+        ttfb_ms (hasta recibir los headers, incluye la conexión), transferencia_ms
+        (lectura del cuerpo) y total_ms, más bytes_enviados y bytes_recibidos.
+        """
+        with self._lock:
+            self.peticiones += 1
+        _medicion.conexion = 0.0
+        inicio = time.perf_counter()
+        try:
+            if self.cache is not None and self.cache.aplica(metodo, url):
+                response = self.cache.consultar(
+                    url, kwargs, lambda **kw: self._despachar(metodo, url, inicio, **kw)
+                )
+            else:
+                try:
+                    response = self._despachar(metodo, url, inicio, **kwargs)
+                finally:
+                    # Una escritura (aunque falle) deja obsoleto lo cacheado de ese catálogo
+                    if self.cache is not None and metodo.upper() not in ('GET', 'HEAD', 'OPTIONS'):
+                        self.cache.invalidar(url)
+        except Exception:
+            self._notificar(metodo, url, None, time.perf_counter() - inicio, None)
+            raise
+
+        duracion = time.perf_counter() - inicio
+        tiempos = getattr(response, 'tiempos', None) or {}
+        tiempos.setdefault('conexion_ms', None)
+        tiempos.setdefault('ttfb_ms', None)
+        tiempos.setdefault('transferencia_ms', None)
+        tiempos['total_ms'] = round(duracion * 1000, 2)
+        tiempos['bytes_enviados'] = _bytes_enviados(response, kwargs)
+        tiempos['bytes_recibidos'] = len(response._content) if isinstance(response._content, bytes) else None
+        if getattr(response, 'desde_cache', None):
+            tiempos['cache'] = response.desde_cache
+        response.tiempos = tiempos
+        if self.grabando:
+            self.casete.grabar(metodo, url, kwargs, response)
+        self._notificar(metodo, url, response.status_code, duracion, tiempos)
+        return response
+
+    def _despachar(self, metodo, url, inicio, **kwargs) -> requests.Response:
+        if self.transporte is None or (self.motor is not None and self.transporte == self.motor.request_sync):
+            with self._lock:
+                self.peticiones_red += 1
+        if self.transporte is not None:
+            return self.transporte(metodo, url, **kwargs)
+        return self._enviar(metodo, url, inicio, **kwargs)
+
+    def _enviar(self, metodo, url, inicio, **kwargs) -> requests.Response:
+        """Envía por la Session separando la espera del primer byte de la lectura del cuerpo"""
+        stream = kwargs.pop('stream', False)
+        response = self.session.request(metodo, url, stream=True, **kwargs)
+        primer_byte = time.perf_counter()
+        if not stream:
+            response.content  # lee el cuerpo completo y libera la conexión
+        fin = time.perf_counter()
+        response.tiempos = {
+            'conexion_ms': round(_medicion.conexion * 1000, 2),
+            'ttfb_ms': round((primer_byte - inicio) * 1000, 2),
+            'transferencia_ms': round((fin - primer_byte) * 1000, 2) if not stream else None
+        }
+        return response
+
+    def _notificar(self, metodo, url, status, duracion, tiempos):
+        for observador in self.observadores:
+            observador(metodo, url, status, duracion, tiempos)
+
+    def usar_transporte(self, transporte):
+        """Envía las peticiones por otro transporte (None vuelve a la Session)"""
+        self.transporte = transporte
+
+    def usar_cache(self, **opciones):
+        """Activa la caché en disco de los GET de catálogos (ver cache_http)"""
+        from cache_http import CacheHTTP
+
+        if self.cache is None:
+            self.cache = CacheHTTP(tenant=TENANT, **opciones)
+        return self.cache
+
+    def usar_casete(self, ruta: str, modo: str = ''):
+        """
+        Graba todas las respuestas en el casete (modo 'grabar', se guarda al
+        salir) o responde desde él sin red (modo 'reproducir', el default si
+        el archivo existe). La caché de catálogos se desactiva en ambos modos,
+        y token_cache deja de usar la suya mientras haya casete, para que lo
+        grabado y lo reproducido sean exactamente las peticiones del flujo.
+        """
+        from casetes import Casete
+
+        modo = modo or ('reproducir' if os.path.exists(ruta) else 'grabar')
+        if self.cache is not None:
+            self.cache.cerrar()
+            self.cache = None
+        if modo == 'grabar':
+            self.casete = Casete(ruta)
+            self.grabando = True
+            atexit.register(self.casete.guardar)
+        elif modo == 'reproducir':
+            self.casete = Casete(ruta).cargar()
+            self.usar_transporte(self.casete.reproducir)
+        else:
+            raise ValueError(f"Modo de casete desconocido: {modo}")
+        return self.casete
+
+    def usar_motor_async(self, limite_conexiones: int = None):
+        """
+        Pasa todas las peticiones por un MotorAsync compartido (default: 10 x
+        FLUJO_POOL_SIZE conexiones). Si el motor ya existe (FLUJO_MOTOR=async) y
+        se pide otro limite_conexiones, se cierra y se crea uno nuevo con ese
+        límite: llamarlo antes de empezar a enviar peticiones.
+        """
+        from motor_async import MotorAsync
+
+        if (self.motor is not None and limite_conexiones is not None
+                and limite_conexiones != self.motor.limite_conexiones):
+            self.motor.cerrar()
+            self.motor = None
+        if self.motor is None:
+            self.motor = MotorAsync(
+                limite_conexiones=limite_conexiones if limite_conexiones is not None else self.pool_size * 10,
+                headers=dict(self.session.headers),
+                al_abrir_conexion=self._contar_conexion
+            ).iniciar()
+        self.usar_transporte(self.motor.request_sync)
+        return self.motor
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    @property
+    def conexiones_reutilizadas(self) -> int:
+        return max(self.peticiones_red - self.conexiones_abiertas, 0)
+
+    def estadisticas(self) -> dict:
+        return {
+            'peticiones': self.peticiones,
+            'peticiones_red': self.peticiones_red,
+            'conexiones_abiertas': self.conexiones_abiertas,
+            'conexiones_reutilizadas': self.conexiones_reutilizadas,
+            'pool_size': self.pool_size,
+            'cache': self.cache.estadisticas() if self.cache is not None else None,
+            'casete': self.casete.resumen() if self.casete is not None else None
+        }
+
+    def resumen(self) -> str:
+        resumen = (f"{self.peticiones} peticiones ({self.peticiones_red} por red), "
+                   f"{self.conexiones_abiertas} conexiones abiertas, "
+                   f"{self.conexiones_reutilizadas} reutilizadas")
+        if self.cache is not None:
+            resumen += f"; caché de catálogos: {self.cache.resumen()}"
+        if self.casete is not None:
+            resumen += f"; casete: {self.casete.resumen()}"
+        return resumen
+
+    def cerrar(self):
+        if self.cache is not None:
+            self.cache.cerrar()
+            self.cache = None
+        if self.motor is not None:
+            self.motor.cerrar()
+            self.motor = None
+            self.transporte = None
+        self.session.close()
+
+
+def _bytes_enviados(response, kwargs) -> int:
+    """Tamaño del cuerpo enviado (el de la petición preparada o, si no hay, el de kwargs)"""
+    preparada = getattr(response, 'request', None)
+    cuerpo = preparada.body if preparada is not None else kwargs.get('data')
+    if cuerpo is None and kwargs.get('json') is not None:
+        cuerpo = json.dumps(kwargs['json'])
+    if cuerpo is None:
+        return 0
+    return len(cuerpo.encode('utf-8') if isinstance(cuerpo, str) else cuerpo)
+
+
+# Cliente compartido por todos los helpers de un flujo
+cliente = ClienteHTTP()
+if CACHE_HTTP:
+    cliente.usar_cache()
+if MOTOR == 'async':
+    cliente.usar_motor_async()
+if CASETE:
+    cliente.usar_casete(CASETE, MODO_CASETE)
+
+
+def reunir(*funciones) -> list:
+    """
+    Ejecuta funciones sin argumentos (normalmente lambdas sobre helpers) y
+    retorna sus resultados en orden. Con el motor async corren a la vez;
+    sin él, una detrás de otra.
+    """
+    if cliente.motor is not None:
+        return cliente.motor.reunir(*funciones)
+    return [funcion() for funcion in funciones]
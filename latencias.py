@@ -0,0 +1,64 @@
+"""
+Registro de latencias por endpoint para las pruebas de carga
+Se engancha como observador de http_client.cliente y agrupa cada petición por
+método + ruta normalizada (los ids numéricos y UUID se reemplazan por {id}).
+"""
+import re
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+_SEGMENTO_ID = re.compile(r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27})$')
+
+
+def normalizar_endpoint(metodo: str, url: str) -> str:
+    """'GET http://host/api/v1/citas/consultas/15/' -> 'GET /api/v1/citas/consultas/{id}/'"""
+    ruta = urlsplit(url).path
+    segmentos = ['{id}' if _SEGMENTO_ID.match(segmento) else segmento for segmento in ruta.split('/')]
+    return f"{metodo.upper()} {'/'.join(segmentos)}"
+
+
+def percentil(valores: list, p: float) -> float:
+    """Percentil p (0-100) con interpolación lineal; valores debe venir ordenado"""
+    if not valores:
+        return 0.0
+    posicion = (len(valores) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(valores) - 1)
+    return valores[inferior] + (valores[superior] - valores[inferior]) * (posicion - inferior)
+
+
+class RegistroLatencias:
+    """Observador de ClienteHTTP que acumula duraciones y errores por endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.duraciones = defaultdict(list)
+        self.errores = defaultdict(int)
+
+    def __call__(self, metodo, url, status, duracion, tiempos=None):
+        endpoint = normalizar_endpoint(metodo, url)
+        with self._lock:
+            self.duraciones[endpoint].append(duracion)
+            if status is None or status >= 400:
+                self.errores[endpoint] += 1
+
+    def resumen(self, duracion_total: float) -> dict:
+        """{endpoint: estadísticas} con latencias en milisegundos y throughput en peticiones/s"""
+        with self._lock:
+            copia = {endpoint: sorted(valores) for endpoint, valores in self.duraciones.items()}
+            errores = dict(self.errores)
+
+        resultado = {}
+        for endpoint, valores in sorted(copia.items()):
+            resultado[endpoint] = {
+                'peticiones': len(valores),
+                'errores': errores.get(endpoint, 0),
+                'throughput_rps': round(len(valores) / duracion_total, 2) if duracion_total else 0.0,
+                'media_ms': round(sum(valores) / len(valores) * 1000, 1),
+                'p50_ms': round(percentil(valores, 50) * 1000, 1),
+                'p95_ms': round(percentil(valores, 95) * 1000, 1),
+                'p99_ms': round(percentil(valores, 99) * 1000, 1),
+                'max_ms': round(valores[-1] * 1000, 1)
+            }
+        return resultado
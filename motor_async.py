@@ -0,0 +1,202 @@
+"""
+Motor asyncio para los flujos de prueba
+Un event loop en un hilo propio con una sola aiohttp.ClientSession: todas las
+peticiones en vuelo del proceso comparten ese loop y su pool de conexiones.
+
+Los helpers de los flujos (crear_cita, listar_facturas, enviar_mensaje...)
+siguen siendo funciones síncronas. Con el motor activo, http_client.cliente le
+entrega cada petición al loop y espera el resultado, así que varios helpers
+pueden estar esperando respuesta al mismo tiempo:
+
+    from http_client import cliente, reunir
+
+    cliente.usar_motor_async()
+    exito_citas, exito_facturas = reunir(
+        lambda: listar_citas(token, "Citas"),
+        lambda: listar_facturas(token, "Facturas"),
+    )
+    cliente.cerrar()
+
+Para simular cientos de usuarios desde un solo proceso, las corrutinas pueden
+usar directamente `await motor.request(...)`, que devuelve un requests.Response.
+Si hay más peticiones en vuelo que conexiones en el conector, las que sobran
+esperan un lugar: ese tiempo queda en response.tiempos['espera_conexion_ms']
+(o en el EsperaConexion que se pase con espera=, aunque la petición falle).
+
+También se activa para todos los flujos con FLUJO_MOTOR=async (ver http_client).
+
+Variables de entorno:
+    FLUJO_ASYNC_CONEXIONES   conexiones simultáneas del conector (default: 100)
+    FLUJO_ASYNC_HILOS        hilos para ejecutar helpers síncronos en paralelo (default: 32)
+
+Requiere aiohttp (pip install aiohttp).
+"""
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+try:
+    import aiohttp
+except ImportError:  # el motor es opcional; los flujos síncronos no lo necesitan
+    aiohttp = None
+
+LIMITE_CONEXIONES = int(os.environ.get('FLUJO_ASYNC_CONEXIONES', '100'))
+HILOS_HELPERS = int(os.environ.get('FLUJO_ASYNC_HILOS', '32'))
+
+
+class EsperaConexion:
+    """Tiempo que una petición pasó en la cola del conector esperando una conexión libre"""
+
+    def __init__(self):
+        self.segundos = 0.0
+        self._desde = None
+
+    @property
+    def en_cola(self) -> bool:
+        return self._desde is not None
+
+    def entrar(self):
+        self._desde = time.perf_counter()
+
+    def salir(self):
+        if self._desde is not None:
+            self.segundos += time.perf_counter() - self._desde
+            self._desde = None
+
+    def ms(self) -> float:
+        """Espera acumulada en ms, incluida la que sigue en curso"""
+        en_curso = time.perf_counter() - self._desde if self._desde is not None else 0.0
+        return round((self.segundos + en_curso) * 1000, 2)
+
+
+class MotorAsync:
+    """Event loop + aiohttp.ClientSession en segundo plano"""
+
+    def __init__(self, limite_conexiones: int = LIMITE_CONEXIONES, hilos: int = HILOS_HELPERS,
+                 headers: dict = None, al_abrir_conexion=None):
+        if aiohttp is None:
+            raise RuntimeError("El motor async requiere aiohttp: pip install aiohttp")
+        self.limite_conexiones = limite_conexiones
+        self.headers = dict(headers or {})
+        self.al_abrir_conexion = al_abrir_conexion
+        self.loop = asyncio.new_event_loop()
+        self._hilo = threading.Thread(target=self.loop.run_forever, name='motor-async', daemon=True)
+        self._hilos_helpers = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='helper')
+        self._session = None
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+    def iniciar(self) -> 'MotorAsync':
+        self._hilo.start()
+        self._ejecutar(self._abrir_session())
+        return self
+
+    async def _abrir_session(self):
+        traza = aiohttp.TraceConfig()
+
+        async def en_cola(session, contexto, params):
+            if isinstance(contexto.trace_request_ctx, EsperaConexion):
+                contexto.trace_request_ctx.entrar()
+
+        async def fuera_de_cola(session, contexto, params):
+            if isinstance(contexto.trace_request_ctx, EsperaConexion):
+                contexto.trace_request_ctx.salir()
+
+        traza.on_connection_queued_start.append(en_cola)
+        traza.on_connection_queued_end.append(fuera_de_cola)
+        if self.al_abrir_conexion:
+            async def conexion_creada(session, contexto, params):
+                self.al_abrir_conexion()
+
+            traza.on_connection_create_end.append(conexion_creada)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.limite_conexiones),
+            headers=self.headers,
+            trace_configs=[traza]
+        )
+
+    def cerrar(self):
+        if self._session is not None:
+            self._ejecutar(self._session.close())
+            self._session = None
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._hilo.join()
+        self._hilos_helpers.shutdown(wait=False)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _ejecutar(self, corrutina):
+        """Corre una corrutina en el loop del motor desde otro hilo y espera su resultado"""
+        return asyncio.run_coroutine_threadsafe(corrutina, self.loop).result()
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    async def request(self, metodo: str, url: str, params=None, json=None, data=None,
+                      headers=None, timeout=None, allow_redirects=True, espera: EsperaConexion = None,
+                      **_) -> requests.Response:
+        """
+        Petición asíncrona con la misma firma (parcial) que requests; retorna un
+        requests.Response. ttfb_ms incluye espera_conexion_ms.
+        """
+        espera = espera if espera is not None else EsperaConexion()
+        opciones = {}
+        if timeout is not None:
+            total = sum(timeout) if isinstance(timeout, tuple) else timeout
+            opciones['timeout'] = aiohttp.ClientTimeout(total=total)
+        inicio = time.perf_counter()
+        async with self._session.request(
+            metodo, url, params=params, json=json, data=data, headers=headers,
+            allow_redirects=allow_redirects, trace_request_ctx=espera, **opciones
+        ) as respuesta:
+            primer_byte = time.perf_counter()
+            contenido = await respuesta.read()
+            response = _a_response(respuesta, contenido)
+        response.tiempos = {
+            'espera_conexion_ms': espera.ms(),
+            'ttfb_ms': round((primer_byte - inicio) * 1000, 2),
+            'transferencia_ms': round((time.perf_counter() - primer_byte) * 1000, 2)
+        }
+        return response
+
+    def request_sync(self, metodo: str, url: str, **kwargs) -> requests.Response:
+        """Transporte para http_client: bloquea el hilo que llama, no el loop"""
+        return self._ejecutar(self.request(metodo, url, **kwargs))
+
+    # ------------------------------------------------------------------
+    # Helpers síncronos en paralelo
+    # ------------------------------------------------------------------
+    async def llamar(self, funcion, *args, **kwargs):
+        """Ejecuta un helper síncrono sin bloquear el loop; su HTTP pasa por el motor"""
+        return await self.loop.run_in_executor(
+            self._hilos_helpers, functools.partial(funcion, *args, **kwargs)
+        )
+
+    def reunir(self, *funciones) -> list:
+        """Ejecuta varias funciones sin argumentos a la vez y retorna sus resultados en orden"""
+        async def todas():
+            return await asyncio.gather(*(self.llamar(funcion) for funcion in funciones))
+        return self._ejecutar(todas())
+
+
+def _a_response(respuesta, contenido: bytes) -> requests.Response:
+    """Convierte la respuesta de aiohttp en un requests.Response para los helpers existentes"""
+    response = requests.Response()
+    response.status_code = respuesta.status
+    response.reason = respuesta.reason
+    response.url = str(respuesta.url)
+    response.headers = CaseInsensitiveDict(respuesta.headers)
+    response.encoding = respuesta.charset
+    response._content = contenido
+    return response
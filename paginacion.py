@@ -0,0 +1,85 @@
+"""
+Recorrido de endpoints de listado paginados (DRF)
+Los listados pueden responder con una lista simple o con la página de DRF
+{"count", "next", "previous", "results"}. registros_de_pagina() y
+total_registros() tratan ambos casos igual, e iterar_registros() sigue los
+enlaces "next" entregando los registros página a página, así que recorrer
+100k registros ocupa la memoria de una página (dos con prefetch: la actual y
+la que se está pidiendo).
+
+Uso:
+    for usuario in iterar_registros(f"{BASE_URL}/usuarios/", headers=headers, prefetch=True):
+        ...
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import cliente
+from registro_http import cuerpo_respuesta
+
+
+def registros_de_pagina(data) -> list:
+    """Registros de una respuesta de listado, paginada o no"""
+    if isinstance(data, dict):
+        return data.get('results') or []
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def total_registros(data) -> int:
+    """Total informado por el servidor ('count') o, si no está paginado, el largo de la lista"""
+    if isinstance(data, dict) and data.get('count') is not None:
+        return data['count']
+    return len(registros_de_pagina(data))
+
+
+def iterar_registros(url: str, headers: dict = None, params: dict = None, prefetch: bool = False,
+                     al_recibir_pagina=None):
+    """
+    Generador de registros que sigue los enlaces 'next'.
+
+    prefetch=True pide la página siguiente en segundo plano mientras se
+    consumen los registros de la actual. al_recibir_pagina(response), si se
+    indica, se llama con cada respuesta (por ejemplo para registrarla).
+    Un status distinto de 200 lanza requests.HTTPError.
+    """
+    def pedir(url_pagina, params_pagina):
+        return cliente.get(url_pagina, headers=headers, params=params_pagina)
+
+    hilo = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch') if prefetch else None
+    siguiente = None
+    try:
+        response = pedir(url, params)
+        while response is not None:
+            if al_recibir_pagina:
+                al_recibir_pagina(response)
+            if response.status_code != 200:
+                response.raise_for_status()
+                return
+            # Parseo compartido con al_recibir_pagina (print_http_transaction usa el mismo)
+            data = cuerpo_respuesta(response)
+            url_siguiente = data.get('next') if isinstance(data, dict) else None
+            if url_siguiente and hilo:
+                siguiente = hilo.submit(pedir, url_siguiente, None)
+
+            registros = registros_de_pagina(data)
+            yield from registros
+            # La respuesta guarda su cuerpo parseado: se suelta antes de pedir la
+            # siguiente página (con prefetch esa ya está en memoria)
+            response = data = registros = None
+
+            if siguiente is not None:
+                response, siguiente = siguiente.result(), None
+            elif url_siguiente:
+                response = pedir(url_siguiente, None)
+    finally:
+        if siguiente is not None:
+            siguiente.cancel()
+        if hilo:
+            hilo.shutdown(wait=False)
+
+
+def contar_registros(url: str, headers: dict = None, params: dict = None, prefetch: bool = True,
+                     al_recibir_pagina=None) -> int:
+    """Cuenta los registros recorriendo todas las páginas, sin acumularlos"""
+    return sum(1 for _ in iterar_registros(url, headers, params, prefetch, al_recibir_pagina))
@@ -0,0 +1,181 @@
+"""
+Registro de transacciones HTTP con buffer y muestreo
+Reemplaza a http_logger.print_http_transaction en los flujos, con la misma firma.
+
+Modos (FLUJO_LOG_MODO):
+    completo   (default) cada transacción se imprime al momento con http_logger,
+               igual que antes
+    muestreo   las transacciones se guardan en un buffer circular en memoria;
+               solo se escriben las fallidas (status >= 400), precedidas por
+               las que quedaron en el buffer como contexto, y una fracción
+               FLUJO_LOG_MUESTREO de las exitosas. La escritura la hace un
+               hilo en segundo plano, así que el flujo no espera a la terminal;
+               con FLUJO_LOG_ARCHIVO el hilo abre el archivo una sola vez y
+               escribe por lotes, con un flush por lote.
+    silencio   solo se mantiene el buffer circular (pruebas de carga)
+
+cuerpo_respuesta(response) parsea el cuerpo una sola vez y lo deja guardado en
+la respuesta, para que el log y el helper no vuelvan a hacer response.json().
+
+Variables de entorno:
+    FLUJO_LOG_MODO       completo | muestreo | silencio (default: completo)
+    FLUJO_LOG_MUESTREO   fracción de transacciones exitosas a escribir (default: 0.05)
+    FLUJO_LOG_BUFFER     transacciones que guarda el buffer circular (default: 200)
+    FLUJO_LOG_ARCHIVO    escribir en este archivo como JSON lines en vez de la terminal
+"""
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+from collections import deque
+from datetime import datetime
+
+import http_logger
+
+MODO = os.environ.get('FLUJO_LOG_MODO', 'completo')
+MUESTREO = float(os.environ.get('FLUJO_LOG_MUESTREO', '0.05'))
+TAMANO_BUFFER = int(os.environ.get('FLUJO_LOG_BUFFER', '200'))
+ARCHIVO = os.environ.get('FLUJO_LOG_ARCHIVO', '')
+
+_SIN_PARSEAR = object()
+
+
+def cuerpo_respuesta(response):
+    """JSON parseado (o texto si no es JSON) de la respuesta, calculado una sola vez"""
+    cuerpo = getattr(response, '_cuerpo_parseado', _SIN_PARSEAR)
+    if cuerpo is _SIN_PARSEAR:
+        if response.headers.get('Content-Type', '').startswith('application/json'):
+            try:
+                cuerpo = response.json()
+            except ValueError:
+                cuerpo = response.text
+        else:
+            cuerpo = response.text
+        response._cuerpo_parseado = cuerpo
+    return cuerpo
+
+
+class RegistroHTTP:
+    """Buffer circular de transacciones + hilo escritor"""
+
+    def __init__(self, modo=MODO, muestreo=MUESTREO, tamano_buffer=TAMANO_BUFFER, archivo=ARCHIVO):
+        self._lock = threading.Lock()
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._lock_archivo = threading.Lock()
+        self._archivo_abierto = None
+        self.modo = modo
+        self.muestreo = muestreo
+        self.buffer = deque(maxlen=tamano_buffer)
+        self.archivo = archivo
+        self.escritas = 0
+        self.descartadas = 0
+
+    def configurar(self, modo=None, muestreo=None, tamano_buffer=None, archivo=None):
+        """Cambia solo las opciones indicadas"""
+        with self._lock:
+            if modo is not None:
+                self.modo = modo
+            if muestreo is not None:
+                self.muestreo = muestreo
+            if tamano_buffer is not None:
+                self.buffer = deque(self.buffer, maxlen=tamano_buffer)
+            if archivo is not None:
+                self.archivo = archivo
+
+    def registrar(self, **transaccion):
+        if self.modo == 'completo':
+            http_logger.print_http_transaction(**transaccion)
+            return
+
+        transaccion.setdefault('timestamp', datetime.now().isoformat())
+        status = transaccion.get('response_status')
+        fallida = status is not None and status >= 400
+        with self._lock:
+            if self.modo == 'silencio':
+                self.buffer.append(transaccion)
+                return
+            if fallida:
+                # Contexto: lo que quedó en el buffer antes de la falla
+                pendientes = list(self.buffer) + [transaccion]
+                self.buffer.clear()
+            elif status is not None and random.random() < self.muestreo:
+                pendientes = [transaccion]
+            else:
+                if len(self.buffer) == self.buffer.maxlen:
+                    self.descartadas += 1
+                self.buffer.append(transaccion)
+                return
+        self._encolar(pendientes)
+
+    def recientes(self) -> list:
+        with self._lock:
+            return list(self.buffer)
+
+    def _encolar(self, transacciones):
+        # Bajo el lock: con varios hilos registrando debe arrancar un solo escritor
+        with self._lock:
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._escribir, name='registro-http', daemon=True)
+                self._hilo.start()
+                atexit.register(self.cerrar)
+        for transaccion in transacciones:
+            self._cola.put(transaccion)
+
+    def _escribir(self):
+        while True:
+            # Un lote: lo que haya en la cola cuando llega la primera transacción
+            lote = [self._cola.get()]
+            while True:
+                try:
+                    lote.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if self.archivo:
+                    with self._lock_archivo:
+                        archivo = self._abrir_archivo()
+                        archivo.writelines(
+                            json.dumps(transaccion, ensure_ascii=False, default=str) + '\n' for transaccion in lote
+                        )
+                        archivo.flush()
+                else:
+                    for transaccion in lote:
+                        transaccion = {k: v for k, v in transaccion.items() if k != 'timestamp'}
+                        http_logger.print_http_transaction(**transaccion)
+                self.escritas += len(lote)
+            finally:
+                for _ in lote:
+                    self._cola.task_done()
+
+    def _abrir_archivo(self):
+        """Archivo de salida abierto; se reabre solo si configurar() cambió la ruta"""
+        if self._archivo_abierto is not None and self._archivo_abierto.name != self.archivo:
+            self._archivo_abierto.close()
+            self._archivo_abierto = None
+        if self._archivo_abierto is None:
+            self._archivo_abierto = open(self.archivo, 'a', encoding='utf-8')
+        return self._archivo_abierto
+
+    def vaciar(self):
+        """Espera a que el hilo escritor termine lo que tiene en cola"""
+        if self._hilo is not None:
+            self._cola.join()
+
+    def cerrar(self):
+        """Vacía la cola y cierra el archivo de salida (se vuelve a abrir si llegan más)"""
+        self.vaciar()
+        with self._lock_archivo:
+            if self._archivo_abierto is not None:
+                self._archivo_abierto.close()
+                self._archivo_abierto = None
+
+
+registro = RegistroHTTP()
+
+
+def print_http_transaction(**transaccion):
+    """Misma firma que http_logger.print_http_transaction, según FLUJO_LOG_MODO"""
+    registro.registrar(**transaccion)
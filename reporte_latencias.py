@@ -0,0 +1,173 @@
+"""
+Desglose de latencias HTTP en los reportes salida_flujoNN.json
+Registra cada transacción del cliente compartido (conexión, tiempo hasta el
+primer byte, transferencia del cuerpo y tamaños, medidos con reloj monotónico)
+y, una vez generado el reporte del flujo, lo completa con:
+
+    transacciones             lista de todas las peticiones con su desglose
+    latencias_por_endpoint    p50/p95/p99 por método + ruta normalizada
+    secciones[n].http         resumen e histograma de las peticiones de esa sección
+
+Cada petición se asigna a la primera sección cuyo timestamp es posterior a
+ella (agregar_seccion se llama al terminar la sección).
+
+Uso en un flujo:
+    transacciones = registrar_transacciones()
+    ...
+    archivo_generado = reporte.generar_archivo()
+    reporte_final = enriquecer_reporte(archivo_generado, transacciones)
+    ...
+    if secciones_fallidas(reporte_final):
+        sys.exit(1)   # para que ejecutar_flujos marque el flujo como fallido
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from http_client import cliente
+from latencias import normalizar_endpoint, percentil
+
+# Límites superiores (ms) de las barras del histograma
+LIMITES_HISTOGRAMA_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class RegistroTransacciones:
+    """Observador de ClienteHTTP que guarda cada transacción con su desglose de tiempos"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origen = time.perf_counter()
+        self.transacciones = []
+
+    def __call__(self, metodo, url, status, duracion, tiempos=None):
+        transaccion = {
+            'timestamp': datetime.now().isoformat(),
+            'offset_ms': round((time.perf_counter() - self._origen) * 1000, 2),
+            'metodo': metodo.upper(),
+            'url': url,
+            'endpoint': normalizar_endpoint(metodo, url),
+            'status': status,
+            **(tiempos or {'total_ms': round(duracion * 1000, 2)})
+        }
+        with self._lock:
+            self.transacciones.append(transaccion)
+
+
+def registrar_transacciones() -> RegistroTransacciones:
+    """Empieza a registrar las transacciones de http_client.cliente"""
+    registro = RegistroTransacciones()
+    cliente.observadores.append(registro)
+    return registro
+
+
+def histograma(duraciones_ms: list) -> dict:
+    """{'<=5ms': n, ..., '>5000ms': n}"""
+    barras = {f"<={limite}ms": 0 for limite in LIMITES_HISTOGRAMA_MS}
+    barras[f">{LIMITES_HISTOGRAMA_MS[-1]}ms"] = 0
+    for duracion in duraciones_ms:
+        for limite in LIMITES_HISTOGRAMA_MS:
+            if duracion <= limite:
+                barras[f"<={limite}ms"] += 1
+                break
+        else:
+            barras[f">{LIMITES_HISTOGRAMA_MS[-1]}ms"] += 1
+    return barras
+
+
+def _sumar(transacciones, campo):
+    valores = [t[campo] for t in transacciones if t.get(campo) is not None]
+    return round(sum(valores), 2) if valores else None
+
+
+def resumen_http(transacciones: list) -> dict:
+    """Agregado de un grupo de transacciones: totales, percentiles, histograma y endpoints"""
+    duraciones = sorted(t['total_ms'] for t in transacciones)
+    por_endpoint = defaultdict(list)
+    for t in transacciones:
+        por_endpoint[t['endpoint']].append(t['total_ms'])
+    return {
+        'peticiones': len(transacciones),
+        'errores': sum(1 for t in transacciones if t['status'] is None or t['status'] >= 400),
+        'total_ms': round(sum(duraciones), 2),
+        'conexion_ms': _sumar(transacciones, 'conexion_ms'),
+        'ttfb_ms': _sumar(transacciones, 'ttfb_ms'),
+        'transferencia_ms': _sumar(transacciones, 'transferencia_ms'),
+        'bytes_enviados': _sumar(transacciones, 'bytes_enviados'),
+        'bytes_recibidos': _sumar(transacciones, 'bytes_recibidos'),
+        'p50_ms': round(percentil(duraciones, 50), 2),
+        'p95_ms': round(percentil(duraciones, 95), 2),
+        'max_ms': duraciones[-1] if duraciones else 0,
+        'histograma': histograma(duraciones),
+        'endpoints': {
+            endpoint: {'peticiones': len(valores), 'total_ms': round(sum(valores), 2), 'max_ms': max(valores)}
+            for endpoint, valores in sorted(por_endpoint.items())
+        }
+    }
+
+
+def latencias_por_endpoint(transacciones: list) -> dict:
+    por_endpoint = defaultdict(list)
+    for t in transacciones:
+        por_endpoint[t['endpoint']].append(t['total_ms'])
+    resultado = {}
+    for endpoint, valores in sorted(por_endpoint.items()):
+        valores.sort()
+        resultado[endpoint] = {
+            'peticiones': len(valores),
+            'p50_ms': round(percentil(valores, 50), 2),
+            'p95_ms': round(percentil(valores, 95), 2),
+            'p99_ms': round(percentil(valores, 99), 2),
+            'max_ms': valores[-1]
+        }
+    return resultado
+
+
+def _asignar_a_secciones(secciones: list, transacciones: list) -> dict:
+    """{indice_seccion o None: [transacciones]} según el timestamp de cada sección"""
+    limites = []
+    for indice, seccion in enumerate(secciones):
+        try:
+            limites.append((datetime.fromisoformat(seccion['timestamp']), indice))
+        except (KeyError, TypeError, ValueError):
+            continue
+    limites.sort()
+
+    grupos = defaultdict(list)
+    for t in transacciones:
+        momento = datetime.fromisoformat(t['timestamp'])
+        destino = next((indice for limite, indice in limites if momento <= limite), None)
+        grupos[destino].append(t)
+    return grupos
+
+
+def enriquecer_reporte(archivo: str, registro: RegistroTransacciones):
+    """Agrega transacciones, latencias por endpoint e histogramas por sección al reporte JSON"""
+    if registro in cliente.observadores:
+        cliente.observadores.remove(registro)
+    with registro._lock:
+        transacciones = list(registro.transacciones)
+
+    with open(archivo, encoding='utf-8') as f:
+        reporte = json.load(f)
+
+    secciones = reporte.get('secciones', [])
+    grupos = _asignar_a_secciones(secciones, transacciones)
+    for indice, seccion in enumerate(secciones):
+        seccion['http'] = resumen_http(grupos.get(indice, []))
+    if grupos.get(None):
+        reporte['http_sin_seccion'] = resumen_http(grupos[None])
+
+    reporte['http'] = resumen_http(transacciones)
+    reporte['latencias_por_endpoint'] = latencias_por_endpoint(transacciones)
+    reporte['transacciones'] = transacciones
+
+    with open(archivo, 'w', encoding='utf-8') as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False)
+    return reporte
+
+
+def secciones_fallidas(reporte: dict) -> list:
+    """Nombres de las secciones del reporte que no terminaron bien"""
+    return [str(s.get('nombre', s.get('numero'))) for s in reporte.get('secciones', []) if not s.get('exito')]
@@ -6,6 +6,17 @@ Destruye todos los datos existentes y crea un conjunto completo de datos de prue
 
 Ejecución:
     python seed_database.py
+    python seed_database.py --force          # sin confirmación
+    python seed_database.py --force --bulk   # INSERT por lotes (bulk_create)
+    python seed_database.py --force --scale 100   # dataset base + 100x datos sintéticos
+    python seed_database.py --force --fast-wipe   # TRUNCATE en lugar de delete() por ORM
+    python seed_database.py --force --hash-once   # un hash PBKDF2 por password distinta
+    python seed_database.py --upsert              # solo inserta/actualiza lo que falta o cambió
+    python seed_database.py --force --bulk --calendario 2025-01-01:2025-12-31 --ocupacion 0.75
+    python seed_database.py --force --tenants norte,sur,este --workers 8   # tenants en paralelo
+    python seed_database.py --upsert --importar Paciente=pacientes.csv --importar Consulta=consultas.jsonl
+    python seed_database.py --force --snapshot seed.snapshot.gz   # seed + guardar snapshot
+    python seed_database.py --force --restore seed.snapshot.gz    # restaurar (o re-seed si cambió)
 
 ADVERTENCIA: Este script eliminará TODOS los datos de la base de datos.
 """
@@ -13,15 +24,33 @@ ADVERTENCIA: Este script eliminará TODOS los datos de la base de datos.
 import os
 import django
 import sys
+import io
+import csv
+import gzip
+import json
+import contextlib
+import time
+import random
+import tracemalloc
+import hashlib
+import argparse
+import bisect
+import itertools
 from datetime import datetime, timedelta, date
 from decimal import Decimal
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Configurar Django
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
+from django.apps import apps as django_apps
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, connections, models, transaction
+from django.db.migrations.recorder import MigrationRecorder
 from rest_framework.authtoken.models import Token
 
 # Importar modelos
@@ -45,6 +74,105 @@ from apps.auditoria.models import Bitacora
 from apps.autenticacion.models import BloqueoUsuario
 
 
+# Tamaño de lote para los INSERT masivos (modo --bulk)
+BULK_BATCH_SIZE = 1000
+
+# Modo de escritura: 'individual' (un INSERT por fila) o 'bulk' (INSERT por lotes)
+modo_escritura = 'individual'
+
+# Hash de passwords: 'normal' (un hash por fila), 'cache' (un hash por password
+# distinta, reutilizado en todas las filas) o 'rapido' (cache + PBKDF2 con pocas
+# iteraciones; solo para bases de datos desechables de pruebas de carga)
+modo_hash = 'normal'
+ITERACIONES_HASH_RAPIDO = 1000
+_hashes_por_password = {}
+
+# Métricas por fase de la corrida actual (ver medir_fase)
+metricas_fases = []
+
+# Modo --upsert: clave natural de cada modelo del seeder. Las filas que ya existen
+# se actualizan solo si algún campo cambió; las que faltan se insertan.
+CLAVES_NATURALES = {
+    Tipodeusuario: ('rol',),
+    Horario: ('hora',),
+    Estadodeconsulta: ('estado',),
+    Tipodeconsulta: ('nombreconsulta',),
+    Tipopago: ('nombrepago',),
+    Estadodefactura: ('estado',),
+    User: ('username',),
+    Usuario: ('correoelectronico',),
+    Token: ('user',),
+    Odontologo: ('codusuario',),
+    Recepcionista: ('codusuario',),
+    Paciente: ('codusuario',),
+    Servicio: ('nombre',),
+    ComboServicio: ('nombre',),
+    ComboServicioDetalle: ('combo', 'servicio'),
+    Consulta: ('codpaciente', 'cododontologo', 'motivo_consulta'),
+    Historialclinico: ('pacientecodigo', 'motivoconsulta'),
+    PlanTratamiento: ('paciente', 'descripcion'),
+    Presupuesto: ('plan_tratamiento',),
+    ItemPresupuesto: ('presupuesto', 'servicio'),
+    Procedimiento: ('plan_tratamiento', 'servicio', 'numero_diente'),
+    HistorialPago: ('numero_comprobante',),
+    CategoriaInsumo: ('nombre',),
+    Proveedor: ('ruc',),
+    Insumo: ('codigo',),
+    AlertaInventario: ('insumo', 'tipo_alerta'),
+}
+
+# Campos que en modo --upsert solo se escriben al insertar: los tokens existentes
+# siguen siendo válidos y los passwords no se re-hashean en cada corrida.
+CAMPOS_SOLO_INSERCION = {
+    User: ('password',),
+    Token: ('key',),
+}
+
+# Filas insertadas/actualizadas/sin cambios por modelo en la última corrida --upsert
+estadisticas_upsert = {}
+
+# Dataset sintético (--scale N): semilla fija para que las corridas sean reproducibles
+SCALE_SEED = 20251103
+
+# Filas por unidad de escala; --scale N genera N veces estas cantidades
+ESCALA_POR_UNIDAD = {
+    'odontologos': 3,
+    'pacientes': 5,
+    'consultas': 4,
+    'historiales': 2,
+    'movimientos_inventario': 2,
+}
+
+# Ventana de fechas de las consultas sintéticas, en días relativos a hoy
+ESCALA_VENTANA_DIAS = (-180, 30)
+
+# Calendario de consultas (--calendario): ocupación por defecto de la grilla y
+# distribución de estados/tipos (pesos relativos)
+CALENDARIO_OCUPACION = 0.7
+CALENDARIO_ESTADOS_PASADOS = {'completada': 78, 'cancelada': 12, 'no_asistio': 10}
+CALENDARIO_ESTADOS_FUTUROS = {'confirmada': 55, 'pendiente': 38, 'cancelada': 7}
+CALENDARIO_TIPOS = {'control': 45, 'primera_vez': 25, 'tratamiento': 20, 'urgencia': 10}
+CALENDARIO_COSTOS = {
+    'control': Decimal('100.00'),
+    'primera_vez': Decimal('150.00'),
+    'tratamiento': Decimal('300.00'),
+    'urgencia': Decimal('200.00'),
+}
+
+NOMBRES_SINTETICOS = [
+    'Ana', 'Carlos', 'Beatriz', 'Diego', 'Elena', 'Fernando', 'Gabriela', 'Hugo',
+    'Isabel', 'Jorge', 'Karina', 'Luis', 'Mónica', 'Nicolás', 'Olga', 'Pablo',
+]
+APELLIDOS_SINTETICOS = [
+    'López', 'Rodríguez', 'Sánchez', 'Torres', 'Vargas', 'Mamani', 'Quispe', 'Pérez',
+    'García', 'Martínez', 'Rojas', 'Castro', 'Flores', 'Gutiérrez', 'Choque', 'Vega',
+]
+MOTIVOS_SINTETICOS = [
+    'Revisión general', 'Limpieza dental', 'Dolor de muela', 'Control de ortodoncia',
+    'Sensibilidad dental', 'Control post-tratamiento', 'Sangrado de encías', 'Urgencia',
+]
+
+
 def print_section(title):
     """Imprime un título de sección"""
     print(f"\n{'='*60}")
@@ -52,74 +180,190 @@ def print_section(title):
     print(f"{'='*60}")
 
 
-def destroy_all_data():
-    """Elimina TODOS los datos de todas las tablas"""
-    print_section("🗑️  DESTRUYENDO TODOS LOS DATOS")
+def _valor_comparable(campo, valor):
+    """Normaliza un valor de fila para compararlo con el atributo de una instancia"""
+    if campo.is_relation:
+        return valor.pk if isinstance(valor, models.Model) else valor
+    return campo.to_python(valor)
+
+
+def upsert_filas(modelo, filas):
+    """
+    Inserta o actualiza las filas de `modelo` usando su clave natural
+    (CLAVES_NATURALES). Cuesta un SELECT, y solo si hace falta un INSERT y un
+    UPDATE por lotes; si la base de datos ya está al día no escribe nada.
+    Retorna las instancias en el mismo orden que `filas`.
+    """
+    meta = modelo._meta
+    clave = CLAVES_NATURALES[modelo]
+    sin_actualizar = CAMPOS_SOLO_INSERCION.get(modelo, ())
+    
+    normalizadas = [
+        {nombre: _valor_comparable(meta.get_field(nombre), valor) for nombre, valor in fila.items()}
+        for fila in filas
+    ]
+    claves = [tuple(norm[nombre] for nombre in clave) for norm in normalizadas]
+    
+    existentes = {}
+    filtro = {f'{meta.get_field(clave[0]).attname}__in': {k[0] for k in claves}}
+    for obj in modelo.objects.filter(**filtro):
+        existentes[tuple(getattr(obj, meta.get_field(nombre).attname) for nombre in clave)] = obj
+    
+    nuevos, cambiados, campos_cambiados, resultado = [], [], set(), []
+    for fila, norm, k in zip(filas, normalizadas, claves):
+        obj = existentes.get(k)
+        if obj is None:
+            obj = modelo(**fila)
+            nuevos.append(obj)
+        else:
+            cambios = [
+                nombre for nombre, valor in norm.items()
+                if nombre not in sin_actualizar
+                and getattr(obj, meta.get_field(nombre).attname) != valor
+            ]
+            for nombre in cambios:
+                setattr(obj, meta.get_field(nombre).attname, norm[nombre])
+            if cambios:
+                cambiados.append(obj)
+                campos_cambiados.update(cambios)
+        resultado.append(obj)
+    
+    if nuevos:
+        modelo.objects.bulk_create(nuevos, batch_size=BULK_BATCH_SIZE)
+    if cambiados:
+        modelo.objects.bulk_update(cambiados, sorted(campos_cambiados), batch_size=BULK_BATCH_SIZE)
+    estadisticas_upsert[meta.label] = {
+        'insertadas': len(nuevos),
+        'actualizadas': len(cambiados),
+        'sin_cambios': len(filas) - len(nuevos) - len(cambiados),
+    }
+    return resultado
+
+
+def guardar_filas(modelo, filas):
+    """
+    Crea las filas de `modelo` (lista de dicts campo -> valor) y retorna las
+    instancias en el mismo orden.
+
+    En modo 'bulk' se usa bulk_create por lotes de BULK_BATCH_SIZE: un round trip
+    por lote en lugar de uno por fila. PostgreSQL (y SQLite >= 3.35) devuelven los
+    PKs generados, así que las instancias pueden usarse directamente como FK del
+    siguiente modelo. Ojo: bulk_create no llama a save() ni emite señales.
     
+    En modo 'upsert' delega en upsert_filas().
+    """
+    if modo_escritura == 'upsert':
+        return upsert_filas(modelo, filas)
+    if modo_escritura == 'bulk':
+        return modelo.objects.bulk_create(
+            [modelo(**campos) for campos in filas],
+            batch_size=BULK_BATCH_SIZE
+        )
+    return [modelo.objects.create(**campos) for campos in filas]
+
+
+def hash_password(password):
+    """
+    Retorna el hash a guardar en User.password según modo_hash.
+    
+    Los hashes 'rapido' siguen siendo PBKDF2 válidos (Django lee las iteraciones
+    del propio hash), así que el backend los acepta sin cambiar su configuración;
+    al primer login exitoso Django los re-hashea con las iteraciones por defecto.
+    """
+    if modo_hash == 'normal':
+        return make_password(password)
+    if password not in _hashes_por_password:
+        if modo_hash == 'rapido':
+            hasher = PBKDF2PasswordHasher()
+            _hashes_por_password[password] = hasher.encode(
+                password, hasher.salt(), iterations=ITERACIONES_HASH_RAPIDO
+            )
+        else:
+            _hashes_por_password[password] = make_password(password)
+    return _hashes_por_password[password]
+
+
+def modelos_a_destruir():
+    """
+    Modelos del seeder agrupados para el borrado, en el orden CORRECTO de
+    dependencias (de más dependiente a menos dependiente).
+    """
     from apps.sistema_pagos.models import PagoEnLinea
     
+    return [
+        ("Bitácora y Bloqueos", [Bitacora, BloqueoUsuario]),
+        # PRIMERO: tiene PROTECT con Consulta
+        ("Pagos en Línea (PROTECT)", [PagoEnLinea]),
+        ("Pagos y Facturas", [Pago, Itemdefactura, Factura, Estadodefactura, Tipopago]),
+        ("Tratamientos", [
+            SesionTratamiento, HistorialPago, Procedimiento,
+            ItemPresupuesto, Presupuesto, PlanTratamiento
+        ]),
+        ("Inventario", [
+            AlertaInventario, MovimientoInventario, Insumo, Proveedor, CategoriaInsumo
+        ]),
+        ("Historial Clínico", [
+            TratamientoOdontologico, ConsentimientoInformado, DocumentoClinico,
+            Odontograma, Historialclinico
+        ]),
+        ("Servicios y Combos", [ComboServicioDetalle, ComboServicio, Servicio]),
+        ("Citas y Consultas", [Consulta, Tipodeconsulta, Estadodeconsulta, Horario]),
+        ("Profesionales", [Recepcionista, Odontologo]),
+        ("Pacientes y Usuarios", [Paciente, Usuario, Tipodeusuario]),
+        # Incluye TODOS los usuarios Django (también superusuarios)
+        ("Tokens y Usuarios Django", [Token, User]),
+    ]
+
+
+def truncate_all_data():
+    """
+    Vacía las tablas del seeder con el SQL de flush propio de la base de datos:
+    TRUNCATE ... RESTART IDENTITY CASCADE en PostgreSQL, DELETE + reinicio de
+    sqlite_sequence en SQLite. No carga filas en Python ni emite señales.
+    
+    Retorna {tabla: segundos}.
+    """
+    tiempos = {}
     with transaction.atomic():
-        # Orden CORRECTO de dependencias (de más dependiente a menos dependiente)
-        print("Eliminando: Bitácora y Bloqueos...")
-        Bitacora.objects.all().delete()
-        BloqueoUsuario.objects.all().delete()
-        
-        print("Eliminando: Pagos en Línea (PROTECT)...")
-        PagoEnLinea.objects.all().delete()  # PRIMERO: tiene PROTECT con Consulta
-        
-        print("Eliminando: Pagos y Facturas...")
-        Pago.objects.all().delete()
-        Itemdefactura.objects.all().delete()
-        Factura.objects.all().delete()
-        Estadodefactura.objects.all().delete()
-        Tipopago.objects.all().delete()
-        
-        print("Eliminando: Tratamientos...")
-        SesionTratamiento.objects.all().delete()
-        HistorialPago.objects.all().delete()
-        Procedimiento.objects.all().delete()
-        ItemPresupuesto.objects.all().delete()
-        Presupuesto.objects.all().delete()
-        PlanTratamiento.objects.all().delete()
-        
-        print("Eliminando: Inventario...")
-        AlertaInventario.objects.all().delete()
-        MovimientoInventario.objects.all().delete()
-        Insumo.objects.all().delete()
-        Proveedor.objects.all().delete()
-        CategoriaInsumo.objects.all().delete()
-        
-        print("Eliminando: Historial Clínico...")
-        TratamientoOdontologico.objects.all().delete()
-        ConsentimientoInformado.objects.all().delete()
-        DocumentoClinico.objects.all().delete()
-        Odontograma.objects.all().delete()
-        Historialclinico.objects.all().delete()
-        
-        print("Eliminando: Servicios y Combos...")
-        ComboServicioDetalle.objects.all().delete()
-        ComboServicio.objects.all().delete()
-        Servicio.objects.all().delete()
-        
-        print("Eliminando: Citas y Consultas...")
-        Consulta.objects.all().delete()
-        Tipodeconsulta.objects.all().delete()
-        Estadodeconsulta.objects.all().delete()
-        Horario.objects.all().delete()
-        
-        print("Eliminando: Profesionales...")
-        Recepcionista.objects.all().delete()
-        Odontologo.objects.all().delete()
-        
-        print("Eliminando: Pacientes y Usuarios...")
-        Paciente.objects.all().delete()
-        Usuario.objects.all().delete()
-        Tipodeusuario.objects.all().delete()
-        
-        print("Eliminando: Tokens y Usuarios Django...")
-        Token.objects.all().delete()
-        # Eliminar TODOS los usuarios Django (incluyendo superusuarios)
-        User.objects.all().delete()
+        for grupo, modelos in modelos_a_destruir():
+            print(f"Vaciando: {grupo}...")
+            for modelo in modelos:
+                tabla = modelo._meta.db_table
+                sql = connection.ops.sql_flush(
+                    no_style(), [tabla], reset_sequences=True, allow_cascade=True
+                )
+                inicio = time.perf_counter()
+                connection.ops.execute_sql_flush(sql)
+                tiempos[tabla] = time.perf_counter() - inicio
+                print(f"  ✓ {tabla}: {tiempos[tabla] * 1000:.1f} ms")
+    return tiempos
+
+
+def destroy_all_data(fast=False):
+    """
+    Elimina TODOS los datos de todas las tablas.
+    
+    Con fast=True intenta primero truncate_all_data(); si el motor no lo
+    soporta se usa el borrado por ORM (delete() con cascadas y señales).
+    """
+    print_section("🗑️  DESTRUYENDO TODOS LOS DATOS")
+    
+    if fast:
+        print(f"⚡ Borrado rápido ({connection.vendor})")
+        try:
+            tiempos = truncate_all_data()
+            print(f"✅ {len(tiempos)} tablas vaciadas en {sum(tiempos.values()):.2f}s")
+            return
+        except DatabaseError as e:
+            print(f"⚠️  Borrado rápido no disponible ({e}), usando el ORM...")
+    
+    with transaction.atomic():
+        for grupo, modelos in modelos_a_destruir():
+            print(f"Eliminando: {grupo}...")
+            for modelo in modelos:
+                inicio = time.perf_counter()
+                modelo.objects.all().delete()
+                print(f"  ✓ {modelo._meta.db_table}: {(time.perf_counter() - inicio) * 1000:.1f} ms")
     
     print("✅ Todos los datos eliminados exitosamente")
 
@@ -130,87 +374,94 @@ def create_base_data():
     
     # Tipos de Usuario
     print("Creando tipos de usuario...")
-    tipo_admin = Tipodeusuario.objects.create(
-        rol='Administrador',
-        descripcion='Usuario administrador del sistema'
-    )
-    tipo_odontologo = Tipodeusuario.objects.create(
-        rol='Odontólogo',
-        descripcion='Profesional odontólogo'
-    )
-    tipo_recepcionista = Tipodeusuario.objects.create(
-        rol='Recepcionista',
-        descripcion='Personal de recepción'
-    )
-    tipo_paciente = Tipodeusuario.objects.create(
-        rol='Paciente',
-        descripcion='Paciente de la clínica'
-    )
+    tipo_admin, tipo_odontologo, tipo_recepcionista, tipo_paciente = guardar_filas(Tipodeusuario, [
+        {'rol': 'Administrador', 'descripcion': 'Usuario administrador del sistema'},
+        {'rol': 'Odontólogo', 'descripcion': 'Profesional odontólogo'},
+        {'rol': 'Recepcionista', 'descripcion': 'Personal de recepción'},
+        {'rol': 'Paciente', 'descripcion': 'Paciente de la clínica'},
+    ])
     
     # Horarios (8:00 AM - 6:00 PM cada 30 minutos)
     print("Creando horarios...")
-    horarios = []
-    for hour in range(8, 18):
-        for minute in [0, 30]:
-            horario = Horario.objects.create(hora=f"{hour:02d}:{minute:02d}:00")
-            horarios.append(horario)
+    horarios = guardar_filas(Horario, [
+        {'hora': f"{hour:02d}:{minute:02d}:00"}
+        for hour in range(8, 18)
+        for minute in [0, 30]
+    ])
     
     # Estados de Consulta
     print("Creando estados de consulta...")
-    estados = {
-        'pendiente': Estadodeconsulta.objects.create(estado='Pendiente'),
-        'confirmada': Estadodeconsulta.objects.create(estado='Confirmada'),
-        'en_consulta': Estadodeconsulta.objects.create(estado='En Consulta'),
-        'completada': Estadodeconsulta.objects.create(estado='Completada'),
-        'cancelada': Estadodeconsulta.objects.create(estado='Cancelada'),
-        'no_asistio': Estadodeconsulta.objects.create(estado='No Asistió'),
+    estados_data = {
+        'pendiente': 'Pendiente',
+        'confirmada': 'Confirmada',
+        'en_consulta': 'En Consulta',
+        'completada': 'Completada',
+        'cancelada': 'Cancelada',
+        'no_asistio': 'No Asistió',
     }
+    estados = dict(zip(estados_data, guardar_filas(Estadodeconsulta, [
+        {'estado': estado} for estado in estados_data.values()
+    ])))
     
     # Tipos de Consulta
     print("Creando tipos de consulta...")
-    tipos_consulta = {
-        'primera_vez': Tipodeconsulta.objects.create(
-            nombreconsulta='Primera Vez',
-            permite_agendamiento_web=True,
-            requiere_aprobacion=False,
-            es_urgencia=False,
-            duracion_estimada=60
-        ),
-        'control': Tipodeconsulta.objects.create(
-            nombreconsulta='Control',
-            permite_agendamiento_web=True,
-            requiere_aprobacion=False,
-            es_urgencia=False,
-            duracion_estimada=30
-        ),
-        'tratamiento': Tipodeconsulta.objects.create(
-            nombreconsulta='Tratamiento',
-            permite_agendamiento_web=False,
-            requiere_aprobacion=True,
-            es_urgencia=False,
-            duracion_estimada=90
-        ),
-        'urgencia': Tipodeconsulta.objects.create(
-            nombreconsulta='Urgencia',
-            permite_agendamiento_web=True,
-            requiere_aprobacion=False,
-            es_urgencia=True,
-            duracion_estimada=45
-        ),
+    tipos_consulta_data = {
+        'primera_vez': {
+            'nombreconsulta': 'Primera Vez',
+            'permite_agendamiento_web': True,
+            'requiere_aprobacion': False,
+            'es_urgencia': False,
+            'duracion_estimada': 60
+        },
+        'control': {
+            'nombreconsulta': 'Control',
+            'permite_agendamiento_web': True,
+            'requiere_aprobacion': False,
+            'es_urgencia': False,
+            'duracion_estimada': 30
+        },
+        'tratamiento': {
+            'nombreconsulta': 'Tratamiento',
+            'permite_agendamiento_web': False,
+            'requiere_aprobacion': True,
+            'es_urgencia': False,
+            'duracion_estimada': 90
+        },
+        'urgencia': {
+            'nombreconsulta': 'Urgencia',
+            'permite_agendamiento_web': True,
+            'requiere_aprobacion': False,
+            'es_urgencia': True,
+            'duracion_estimada': 45
+        },
     }
+    tipos_consulta = dict(zip(
+        tipos_consulta_data,
+        guardar_filas(Tipodeconsulta, list(tipos_consulta_data.values()))
+    ))
     
     # Tipos de Pago
     print("Creando tipos de pago...")
-    tipo_efectivo = Tipopago.objects.create(nombrepago='Efectivo')
-    tipo_tarjeta = Tipopago.objects.create(nombrepago='Tarjeta')
-    tipo_transferencia = Tipopago.objects.create(nombrepago='Transferencia')
-    tipo_qr = Tipopago.objects.create(nombrepago='QR')
+    tipos_pago_data = {
+        'efectivo': 'Efectivo',
+        'tarjeta': 'Tarjeta',
+        'transferencia': 'Transferencia',
+        'qr': 'QR',
+    }
+    tipos_pago = dict(zip(tipos_pago_data, guardar_filas(Tipopago, [
+        {'nombrepago': nombre} for nombre in tipos_pago_data.values()
+    ])))
     
     # Estados de Factura
     print("Creando estados de factura...")
-    estado_pendiente = Estadodefactura.objects.create(estado='Pendiente')
-    estado_pagada = Estadodefactura.objects.create(estado='Pagada')
-    estado_anulada = Estadodefactura.objects.create(estado='Anulada')
+    estados_factura_data = {
+        'pendiente': 'Pendiente',
+        'pagada': 'Pagada',
+        'anulada': 'Anulada',
+    }
+    estados_factura = dict(zip(estados_factura_data, guardar_filas(Estadodefactura, [
+        {'estado': estado} for estado in estados_factura_data.values()
+    ])))
     
     print("✅ Datos base creados")
     
@@ -224,17 +475,8 @@ def create_base_data():
         'horarios': horarios,
         'estados_consulta': estados,
         'tipos_consulta': tipos_consulta,
-        'tipos_pago': {
-            'efectivo': tipo_efectivo,
-            'tarjeta': tipo_tarjeta,
-            'transferencia': tipo_transferencia,
-            'qr': tipo_qr
-        },
-        'estados_factura': {
-            'pendiente': estado_pendiente,
-            'pagada': estado_pagada,
-            'anulada': estado_anulada
-        }
+        'tipos_pago': tipos_pago,
+        'estados_factura': estados_factura
     }
 
 
@@ -242,27 +484,28 @@ def create_users(base_data):
     """Crea usuarios del sistema"""
     print_section("👤 CREANDO USUARIOS")
     
-    usuarios = {}
+    tipos_usuario = base_data['tipos_usuario']
+    
+    # Cada cuenta: clave en el dict de salida, password, flags de Django,
+    # campos de Usuario y (opcional) modelo de perfil con sus campos.
+    cuentas = []
     
     # 1. ADMINISTRADOR
     print("Creando administrador...")
-    admin_django = User.objects.create_user(
-        username='admin@clinica.com',
-        email='admin@clinica.com',
-        password='admin123',
-        is_staff=True,
-        is_superuser=True
-    )
-    admin_usuario = Usuario.objects.create(
-        nombre='Admin',
-        apellido='Sistema',
-        correoelectronico='admin@clinica.com',
-        sexo='M',
-        telefono='70000000',
-        idtipousuario=base_data['tipos_usuario']['admin']
-    )
-    Token.objects.create(user=admin_django)
-    usuarios['admin'] = {'django': admin_django, 'usuario': admin_usuario}
+    cuentas.append({
+        'clave': 'admin',
+        'password': 'admin123',
+        'staff': True,
+        'usuario': {
+            'nombre': 'Admin',
+            'apellido': 'Sistema',
+            'correoelectronico': 'admin@clinica.com',
+            'sexo': 'M',
+            'telefono': '70000000',
+            'idtipousuario': tipos_usuario['admin']
+        },
+        'perfil': None,
+    })
     
     # 2. ODONTÓLOGOS
     print("Creando odontólogos...")
@@ -285,57 +528,43 @@ def create_users(base_data):
     ]
     
     for idx, data in enumerate(odontologos_data, 1):
-        django_user = User.objects.create_user(
-            username=data['email'],
-            email=data['email'],
-            password='odontologo123'
-        )
-        usuario = Usuario.objects.create(
-            nombre=data['nombre'],
-            apellido=data['apellido'],
-            correoelectronico=data['email'],
-            sexo='M' if idx % 2 == 1 else 'F',
-            telefono=f'7000000{idx}',
-            idtipousuario=base_data['tipos_usuario']['odontologo']
-        )
-        odontologo = Odontologo.objects.create(
-            codusuario=usuario,
-            especialidad=data['especialidad'],
-            nromatricula=data['matricula'],
-            experienciaprofesional=data['experiencia']
-        )
-        Token.objects.create(user=django_user)
-        usuarios[f'odontologo_{idx}'] = {
-            'django': django_user,
-            'usuario': usuario,
-            'odontologo': odontologo
-        }
+        cuentas.append({
+            'clave': f'odontologo_{idx}',
+            'password': 'odontologo123',
+            'staff': False,
+            'usuario': {
+                'nombre': data['nombre'],
+                'apellido': data['apellido'],
+                'correoelectronico': data['email'],
+                'sexo': 'M' if idx % 2 == 1 else 'F',
+                'telefono': f'7000000{idx}',
+                'idtipousuario': tipos_usuario['odontologo']
+            },
+            'perfil': (Odontologo, {
+                'especialidad': data['especialidad'],
+                'nromatricula': data['matricula'],
+                'experienciaprofesional': data['experiencia']
+            }),
+        })
     
     # 3. RECEPCIONISTA
     print("Creando recepcionista...")
-    recep_django = User.objects.create_user(
-        username='recepcion@clinica.com',
-        email='recepcion@clinica.com',
-        password='recepcion123'
-    )
-    recep_usuario = Usuario.objects.create(
-        nombre='Laura',
-        apellido='Morales Quispe',
-        correoelectronico='recepcion@clinica.com',
-        sexo='F',
-        telefono='70000010',
-        idtipousuario=base_data['tipos_usuario']['recepcionista']
-    )
-    recepcionista = Recepcionista.objects.create(
-        codusuario=recep_usuario,
-        habilidadessoftware='Microsoft Office, Software de gestión clínica'
-    )
-    Token.objects.create(user=recep_django)
-    usuarios['recepcionista'] = {
-        'django': recep_django,
-        'usuario': recep_usuario,
-        'recepcionista': recepcionista
-    }
+    cuentas.append({
+        'clave': 'recepcionista',
+        'password': 'recepcion123',
+        'staff': False,
+        'usuario': {
+            'nombre': 'Laura',
+            'apellido': 'Morales Quispe',
+            'correoelectronico': 'recepcion@clinica.com',
+            'sexo': 'F',
+            'telefono': '70000010',
+            'idtipousuario': tipos_usuario['recepcionista']
+        },
+        'perfil': (Recepcionista, {
+            'habilidadessoftware': 'Microsoft Office, Software de gestión clínica'
+        }),
+    })
     
     # 4. PACIENTES
     print("Creando pacientes...")
@@ -368,39 +597,86 @@ def create_users(base_data):
     ]
     
     for idx, data in enumerate(pacientes_data, 1):
-        django_user = User.objects.create_user(
-            username=data['email'],
-            email=data['email'],
-            password='paciente123'
-        )
-        usuario = Usuario.objects.create(
-            nombre=data['nombre'],
-            apellido=data['apellido'],
-            correoelectronico=data['email'],
-            sexo='F' if idx % 2 == 1 else 'M',
-            telefono=f'7000001{idx}',
-            idtipousuario=base_data['tipos_usuario']['paciente'],
-            recibir_notificaciones=True,
-            notificaciones_email=True,
-            notificaciones_push=False
-        )
-        paciente = Paciente.objects.create(
-            codusuario=usuario,
-            carnetidentidad=data['ci'],
-            fechanacimiento=data['fecha_nac'],
-            direccion=data['direccion']
-        )
-        Token.objects.create(user=django_user)
-        usuarios[f'paciente_{idx}'] = {
-            'django': django_user,
-            'usuario': usuario,
-            'paciente': paciente
-        }
+        cuentas.append({
+            'clave': f'paciente_{idx}',
+            'password': 'paciente123',
+            'staff': False,
+            'usuario': {
+                'nombre': data['nombre'],
+                'apellido': data['apellido'],
+                'correoelectronico': data['email'],
+                'sexo': 'F' if idx % 2 == 1 else 'M',
+                'telefono': f'7000001{idx}',
+                'idtipousuario': tipos_usuario['paciente'],
+                'recibir_notificaciones': True,
+                'notificaciones_email': True,
+                'notificaciones_push': False
+            },
+            'perfil': (Paciente, {
+                'carnetidentidad': data['ci'],
+                'fechanacimiento': data['fecha_nac'],
+                'direccion': data['direccion']
+            }),
+        })
+    
+    usuarios = guardar_cuentas(cuentas)
     
     print(f"✅ {len(usuarios)} usuarios creados")
     return usuarios
 
 
+def guardar_cuentas(cuentas):
+    """
+    Persiste una lista de cuentas (ver create_users) modelo por modelo:
+    User -> Usuario -> Token -> perfiles (Odontologo/Recepcionista/Paciente).
+
+    Retorna {clave: {'django', 'usuario', '<perfil>'}} con el mismo formato
+    que usan el resto de funciones create_*.
+
+    En modo 'upsert' el password solo se escribe al insertar, así que solo se
+    hashea el de las cuentas cuyo User todavía no existe.
+    """
+    existentes = set()
+    if modo_escritura == 'upsert':
+        existentes = set(User.objects.filter(
+            username__in=[cuenta['usuario']['correoelectronico'] for cuenta in cuentas]
+        ).values_list('username', flat=True))
+    django_users = guardar_filas(User, [
+        {
+            'username': cuenta['usuario']['correoelectronico'],
+            'email': cuenta['usuario']['correoelectronico'],
+            **({} if cuenta['usuario']['correoelectronico'] in existentes
+               else {'password': hash_password(cuenta['password'])}),
+            'is_staff': cuenta['staff'],
+            'is_superuser': cuenta['staff']
+        }
+        for cuenta in cuentas
+    ])
+    registros = guardar_filas(Usuario, [cuenta['usuario'] for cuenta in cuentas])
+    guardar_filas(Token, [
+        {'user': django_user, 'key': Token.generate_key()}
+        for django_user in django_users
+    ])
+    
+    usuarios = {}
+    perfiles_por_modelo = {}
+    for cuenta, django_user, usuario in zip(cuentas, django_users, registros):
+        usuarios[cuenta['clave']] = {'django': django_user, 'usuario': usuario}
+        if cuenta['perfil']:
+            modelo, campos = cuenta['perfil']
+            perfiles_por_modelo.setdefault(modelo, []).append(
+                (cuenta['clave'], dict(campos, codusuario=usuario))
+            )
+    
+    # Un INSERT (o lote) por modelo de perfil
+    for modelo, pendientes in perfiles_por_modelo.items():
+        perfiles = guardar_filas(modelo, [campos for _, campos in pendientes])
+        for (clave, _), perfil in zip(pendientes, perfiles):
+            usuarios[clave][modelo.__name__.lower()] = perfil
+    
+    return usuarios
+
+
 def create_servicios():
     """Crea servicios odontológicos"""
     print_section("🦷 CREANDO SERVICIOS")
@@ -418,39 +694,45 @@ def create_servicios():
         {'nombre': 'Prótesis Total', 'costo': 2500.00, 'duracion': 90},
     ]
     
+    creados = guardar_filas(Servicio, [
+        {
+            'nombre': data['nombre'],
+            'descripcion': f"Servicio de {data['nombre'].lower()}",
+            'costobase': Decimal(str(data['costo'])),
+            'duracion': data['duracion'],
+            'activo': True
+        }
+        for data in servicios_data
+    ])
+    
     servicios = {}
-    for data in servicios_data:
-        servicio = Servicio.objects.create(
-            nombre=data['nombre'],
-            descripcion=f"Servicio de {data['nombre'].lower()}",
-            costobase=Decimal(str(data['costo'])),
-            duracion=data['duracion'],
-            activo=True
-        )
+    for data, servicio in zip(servicios_data, creados):
         servicios[data['nombre']] = servicio
         print(f"  ✓ {data['nombre']}: ${data['costo']}")
     
     # Crear combos
     print("\nCreando combos de servicios...")
-    combo1 = ComboServicio.objects.create(
-        nombre='Paquete Limpieza Completa',
-        descripcion='Limpieza + Blanqueamiento',
-        tipo_precio='PORCENTAJE',
-        valor_precio=Decimal('15.00'),  # 15% descuento
-        activo=True
-    )
-    ComboServicioDetalle.objects.create(
-        combo=combo1,
-        servicio=servicios['Limpieza Dental'],
-        cantidad=1,
-        orden=1
-    )
-    ComboServicioDetalle.objects.create(
-        combo=combo1,
-        servicio=servicios['Blanqueamiento Dental'],
-        cantidad=1,
-        orden=2
-    )
+    [combo1] = guardar_filas(ComboServicio, [{
+        'nombre': 'Paquete Limpieza Completa',
+        'descripcion': 'Limpieza + Blanqueamiento',
+        'tipo_precio': 'PORCENTAJE',
+        'valor_precio': Decimal('15.00'),  # 15% descuento
+        'activo': True
+    }])
+    guardar_filas(ComboServicioDetalle, [
+        {
+            'combo': combo1,
+            'servicio': servicios['Limpieza Dental'],
+            'cantidad': 1,
+            'orden': 1
+        },
+        {
+            'combo': combo1,
+            'servicio': servicios['Blanqueamiento Dental'],
+            'cantidad': 1,
+            'orden': 2
+        },
+    ])
     
     print(f"✅ {len(servicios)} servicios y 1 combo creados")
     return servicios
@@ -460,69 +742,63 @@ def create_consultas(usuarios, base_data):
     """Crea consultas de prueba"""
     print_section("📅 CREANDO CONSULTAS")
     
-    consultas = []
     hoy = datetime.now().date()
     
-    # Consulta 1: Paciente 1 con Odontólogo 1 (Completada - hace 3 días)
-    consulta1 = Consulta.objects.create(
-        fecha=hoy - timedelta(days=3),
-        codpaciente=usuarios['paciente_1']['paciente'],
-        cododontologo=usuarios['odontologo_1']['odontologo'],
-        codrecepcionista=usuarios['recepcionista']['recepcionista'],
-        idhorario=base_data['horarios'][4],  # 10:00 AM
-        idtipoconsulta=base_data['tipos_consulta']['primera_vez'],
-        idestadoconsulta=base_data['estados_consulta']['completada'],
-        estado='completada',
-        motivo_consulta='Revisión general y limpieza',
-        diagnostico='Paciente con buena salud dental. Se realizó limpieza.',
-        tratamiento='Limpieza dental completa',
-        costo_consulta=Decimal('150.00'),
-        requiere_pago=True
-    )
-    consultas.append(consulta1)
-    
-    # Consulta 2: Paciente 2 con Odontólogo 2 (Confirmada - mañana)
-    consulta2 = Consulta.objects.create(
-        fecha=hoy + timedelta(days=1),
-        codpaciente=usuarios['paciente_2']['paciente'],
-        cododontologo=usuarios['odontologo_2']['odontologo'],
-        codrecepcionista=usuarios['recepcionista']['recepcionista'],
-        idhorario=base_data['horarios'][8],  # 12:00 PM
-        idtipoconsulta=base_data['tipos_consulta']['control'],
-        idestadoconsulta=base_data['estados_consulta']['confirmada'],
-        estado='confirmada',
-        motivo_consulta='Control post-tratamiento de conducto',
-        notas_recepcion='Paciente solicita atención preferente'
-    )
-    consultas.append(consulta2)
-    
-    # Consulta 3: Paciente 3 con Odontólogo 3 (Pendiente - en 5 días)
-    consulta3 = Consulta.objects.create(
-        fecha=hoy + timedelta(days=5),
-        codpaciente=usuarios['paciente_3']['paciente'],
-        cododontologo=usuarios['odontologo_3']['odontologo'],
-        idhorario=base_data['horarios'][6],  # 11:00 AM
-        idtipoconsulta=base_data['tipos_consulta']['urgencia'],
-        idestadoconsulta=base_data['estados_consulta']['pendiente'],
-        estado='pendiente',
-        motivo_consulta='Dolor intenso en muela',
-        tipo_consulta='urgencia'
-    )
-    consultas.append(consulta3)
-    
-    # Consulta 4: Paciente 4 con Odontólogo 1 (Cancelada)
-    consulta4 = Consulta.objects.create(
-        fecha=hoy - timedelta(days=1),
-        codpaciente=usuarios['paciente_4']['paciente'],
-        cododontologo=usuarios['odontologo_1']['odontologo'],
-        idhorario=base_data['horarios'][10],  # 13:00 PM
-        idtipoconsulta=base_data['tipos_consulta']['control'],
-        idestadoconsulta=base_data['estados_consulta']['cancelada'],
-        estado='cancelada',
-        motivo_consulta='Control rutinario',
-        motivo_cancelacion='Paciente tuvo un imprevisto laboral'
-    )
-    consultas.append(consulta4)
+    consultas = guardar_filas(Consulta, [
+        # Consulta 1: Paciente 1 con Odontólogo 1 (Completada - hace 3 días)
+        {
+            'fecha': hoy - timedelta(days=3),
+            'codpaciente': usuarios['paciente_1']['paciente'],
+            'cododontologo': usuarios['odontologo_1']['odontologo'],
+            'codrecepcionista': usuarios['recepcionista']['recepcionista'],
+            'idhorario': base_data['horarios'][4],  # 10:00 AM
+            'idtipoconsulta': base_data['tipos_consulta']['primera_vez'],
+            'idestadoconsulta': base_data['estados_consulta']['completada'],
+            'estado': 'completada',
+            'motivo_consulta': 'Revisión general y limpieza',
+            'diagnostico': 'Paciente con buena salud dental. Se realizó limpieza.',
+            'tratamiento': 'Limpieza dental completa',
+            'costo_consulta': Decimal('150.00'),
+            'requiere_pago': True
+        },
+        # Consulta 2: Paciente 2 con Odontólogo 2 (Confirmada - mañana)
+        {
+            'fecha': hoy + timedelta(days=1),
+            'codpaciente': usuarios['paciente_2']['paciente'],
+            'cododontologo': usuarios['odontologo_2']['odontologo'],
+            'codrecepcionista': usuarios['recepcionista']['recepcionista'],
+            'idhorario': base_data['horarios'][8],  # 12:00 PM
+            'idtipoconsulta': base_data['tipos_consulta']['control'],
+            'idestadoconsulta': base_data['estados_consulta']['confirmada'],
+            'estado': 'confirmada',
+            'motivo_consulta': 'Control post-tratamiento de conducto',
+            'notas_recepcion': 'Paciente solicita atención preferente'
+        },
+        # Consulta 3: Paciente 3 con Odontólogo 3 (Pendiente - en 5 días)
+        {
+            'fecha': hoy + timedelta(days=5),
+            'codpaciente': usuarios['paciente_3']['paciente'],
+            'cododontologo': usuarios['odontologo_3']['odontologo'],
+            'idhorario': base_data['horarios'][6],  # 11:00 AM
+            'idtipoconsulta': base_data['tipos_consulta']['urgencia'],
+            'idestadoconsulta': base_data['estados_consulta']['pendiente'],
+            'estado': 'pendiente',
+            'motivo_consulta': 'Dolor intenso en muela',
+            'tipo_consulta': 'urgencia'
+        },
+        # Consulta 4: Paciente 4 con Odontólogo 1 (Cancelada)
+        {
+            'fecha': hoy - timedelta(days=1),
+            'codpaciente': usuarios['paciente_4']['paciente'],
+            'cododontologo': usuarios['odontologo_1']['odontologo'],
+            'idhorario': base_data['horarios'][10],  # 13:00 PM
+            'idtipoconsulta': base_data['tipos_consulta']['control'],
+            'idestadoconsulta': base_data['estados_consulta']['cancelada'],
+            'estado': 'cancelada',
+            'motivo_consulta': 'Control rutinario',
+            'motivo_cancelacion': 'Paciente tuvo un imprevisto laboral'
+        },
+    ])
     
     print(f"✅ {len(consultas)} consultas creadas")
     return consultas
@@ -532,42 +808,44 @@ def create_historiales(usuarios, consultas):
     """Crea historiales clínicos"""
     print_section("📋 CREANDO HISTORIALES CLÍNICOS")
     
-    historiales = []
-    
-    # Historial para Paciente 1 (relacionado con consulta completada)
-    historial1 = Historialclinico.objects.create(
-        pacientecodigo=usuarios['paciente_1']['paciente'],
-        motivoconsulta='Revisión general y limpieza dental',
-        diagnostico='Paciente con buena salud dental general. Sin caries detectadas.',
-        tratamiento='Se realizó limpieza dental profunda con ultrasonido.',
-        alergias='Ninguna conocida',
-        enfermedades='Ninguna',
-        examenbucal='Encías sanas, sin sangrado. Placa dental moderada.',
-        receta='Enjuague bucal con clorhexidina 0.12% por 7 días'
-    )
-    historiales.append(historial1)
+    historiales = guardar_filas(Historialclinico, [
+        # Historial para Paciente 1 (relacionado con consulta completada)
+        {
+            'pacientecodigo': usuarios['paciente_1']['paciente'],
+            'motivoconsulta': 'Revisión general y limpieza dental',
+            'diagnostico': 'Paciente con buena salud dental general. Sin caries detectadas.',
+            'tratamiento': 'Se realizó limpieza dental profunda con ultrasonido.',
+            'alergias': 'Ninguna conocida',
+            'enfermedades': 'Ninguna',
+            'examenbucal': 'Encías sanas, sin sangrado. Placa dental moderada.',
+            'receta': 'Enjuague bucal con clorhexidina 0.12% por 7 días'
+        },
+        # Historial para Paciente 2
+        {
+            'pacientecodigo': usuarios['paciente_2']['paciente'],
+            'motivoconsulta': 'Control post-endodoncia',
+            'diagnostico': 'Evolución favorable del tratamiento de conducto',
+            'tratamiento': 'Control radiográfico',
+            'alergias': 'Alergia a penicilina',
+            'enfermedades': 'Hipertensión controlada',
+            'examenbucal': 'Zona tratada sin inflamación ni dolor'
+        },
+    ])
     
-    # Crear odontograma para Paciente 1
-    odontograma1 = Odontograma.objects.create(
+    # Crear odontograma para Paciente 1 (usa la lógica del modelo, siempre fila por fila)
+    existe_odontograma = modo_escritura == 'upsert' and Odontograma.objects.filter(
         paciente=usuarios['paciente_1']['paciente'],
-        odontologo=usuarios['odontologo_1']['odontologo'],
-        observaciones_generales='Estado general bueno'
-    )
-    odontograma1.inicializar_dientes()
-    odontograma1.actualizar_diente(18, 'obturacion', ['oclusal'], 'Obturación antigua en buen estado')
-    odontograma1.actualizar_diente(36, 'caries', ['oclusal', 'mesial'], 'Caries superficial')
-    
-    # Historial para Paciente 2
-    historial2 = Historialclinico.objects.create(
-        pacientecodigo=usuarios['paciente_2']['paciente'],
-        motivoconsulta='Control post-endodoncia',
-        diagnostico='Evolución favorable del tratamiento de conducto',
-        tratamiento='Control radiográfico',
-        alergias='Alergia a penicilina',
-        enfermedades='Hipertensión controlada',
-        examenbucal='Zona tratada sin inflamación ni dolor'
-    )
-    historiales.append(historial2)
+        odontologo=usuarios['odontologo_1']['odontologo']
+    ).exists()
+    if not existe_odontograma:
+        odontograma1 = Odontograma.objects.create(
+            paciente=usuarios['paciente_1']['paciente'],
+            odontologo=usuarios['odontologo_1']['odontologo'],
+            observaciones_generales='Estado general bueno'
+        )
+        odontograma1.inicializar_dientes()
+        odontograma1.actualizar_diente(18, 'obturacion', ['oclusal'], 'Obturación antigua en buen estado')
+        odontograma1.actualizar_diente(36, 'caries', ['oclusal', 'mesial'], 'Caries superficial')
     
     print(f"✅ {len(historiales)} historiales clínicos creados")
     return historiales
@@ -577,97 +855,99 @@ def create_planes_tratamiento(usuarios, servicios):
     """Crea planes de tratamiento y presupuestos"""
     print_section("💰 CREANDO PLANES Y PRESUPUESTOS")
     
-    # Plan para Paciente 3
-    plan1 = PlanTratamiento.objects.create(
-        paciente=usuarios['paciente_3']['paciente'],
-        odontologo=usuarios['odontologo_3']['odontologo'],
-        descripcion='Plan de extracción y restauración',
-        diagnostico='Muela con caries profunda y fractura',
-        estado='aprobado',
-        duracion_estimada_dias=30
-    )
-    
-    # Crear presupuesto para el plan
-    presupuesto1 = Presupuesto.objects.create(
-        plan_tratamiento=plan1,
-        subtotal=Decimal('600.00'),
-        descuento=Decimal('50.00'),
-        impuesto=Decimal('0.00'),
-        total=Decimal('550.00'),
-        estado='aprobado',
-        fecha_vencimiento=datetime.now().date() + timedelta(days=30)
-    )
+    plan1, plan2 = guardar_filas(PlanTratamiento, [
+        # Plan para Paciente 3
+        {
+            'paciente': usuarios['paciente_3']['paciente'],
+            'odontologo': usuarios['odontologo_3']['odontologo'],
+            'descripcion': 'Plan de extracción y restauración',
+            'diagnostico': 'Muela con caries profunda y fractura',
+            'estado': 'aprobado',
+            'duracion_estimada_dias': 30
+        },
+        # Plan para Paciente 5 (ortodoncia)
+        {
+            'paciente': usuarios['paciente_5']['paciente'],
+            'odontologo': usuarios['odontologo_1']['odontologo'],
+            'descripcion': 'Plan de ortodoncia - 12 meses',
+            'diagnostico': 'Maloclusión clase II, apiñamiento dental',
+            'estado': 'en_proceso',
+            'duracion_estimada_dias': 365
+        },
+    ])
     
-    # Items del presupuesto
-    ItemPresupuesto.objects.create(
-        presupuesto=presupuesto1,
-        servicio=servicios['Extracción Compleja'],
-        cantidad=1,
-        precio_unitario=Decimal('400.00'),
-        total=Decimal('400.00'),
-        numero_diente=36
-    )
+    # Crear presupuestos para los planes
+    presupuesto1, presupuesto2 = guardar_filas(Presupuesto, [
+        {
+            'plan_tratamiento': plan1,
+            'subtotal': Decimal('600.00'),
+            'descuento': Decimal('50.00'),
+            'impuesto': Decimal('0.00'),
+            'total': Decimal('550.00'),
+            'estado': 'aprobado',
+            'fecha_vencimiento': datetime.now().date() + timedelta(days=30)
+        },
+        {
+            'plan_tratamiento': plan2,
+            'subtotal': Decimal('6000.00'),
+            'descuento': Decimal('500.00'),
+            'impuesto': Decimal('0.00'),
+            'total': Decimal('5500.00'),
+            'estado': 'aprobado'
+        },
+    ])
     
-    ItemPresupuesto.objects.create(
-        presupuesto=presupuesto1,
-        servicio=servicios['Obturación (Resina)'],
-        cantidad=1,
-        precio_unitario=Decimal('250.00'),
-        descuento_item=Decimal('50.00'),
-        total=Decimal('200.00'),
-        numero_diente=37
-    )
+    # Items de los presupuestos
+    guardar_filas(ItemPresupuesto, [
+        {
+            'presupuesto': presupuesto1,
+            'servicio': servicios['Extracción Compleja'],
+            'cantidad': 1,
+            'precio_unitario': Decimal('400.00'),
+            'total': Decimal('400.00'),
+            'numero_diente': 36
+        },
+        {
+            'presupuesto': presupuesto1,
+            'servicio': servicios['Obturación (Resina)'],
+            'cantidad': 1,
+            'precio_unitario': Decimal('250.00'),
+            'descuento_item': Decimal('50.00'),
+            'total': Decimal('200.00'),
+            'numero_diente': 37
+        },
+        {
+            'presupuesto': presupuesto2,
+            'servicio': servicios['Ortodoncia (Mes)'],
+            'cantidad': 12,
+            'precio_unitario': Decimal('500.00'),
+            'descuento_item': Decimal('500.00'),
+            'total': Decimal('5500.00')
+        },
+    ])
     
     # Crear procedimientos
-    Procedimiento.objects.create(
-        plan_tratamiento=plan1,
-        servicio=servicios['Extracción Compleja'],
-        odontologo=usuarios['odontologo_3']['odontologo'],
-        numero_diente=36,
-        descripcion='Extracción de muela con caries profunda',
-        estado='pendiente',
-        fecha_planificada=datetime.now().date() + timedelta(days=7),
-        costo_estimado=Decimal('400.00')
-    )
-    
-    # Plan para Paciente 5 (ortodoncia)
-    plan2 = PlanTratamiento.objects.create(
-        paciente=usuarios['paciente_5']['paciente'],
-        odontologo=usuarios['odontologo_1']['odontologo'],
-        descripcion='Plan de ortodoncia - 12 meses',
-        diagnostico='Maloclusión clase II, apiñamiento dental',
-        estado='en_proceso',
-        duracion_estimada_dias=365
-    )
-    
-    presupuesto2 = Presupuesto.objects.create(
-        plan_tratamiento=plan2,
-        subtotal=Decimal('6000.00'),
-        descuento=Decimal('500.00'),
-        impuesto=Decimal('0.00'),
-        total=Decimal('5500.00'),
-        estado='aprobado'
-    )
-    
-    ItemPresupuesto.objects.create(
-        presupuesto=presupuesto2,
-        servicio=servicios['Ortodoncia (Mes)'],
-        cantidad=12,
-        precio_unitario=Decimal('500.00'),
-        descuento_item=Decimal('500.00'),
-        total=Decimal('5500.00')
-    )
+    guardar_filas(Procedimiento, [{
+        'plan_tratamiento': plan1,
+        'servicio': servicios['Extracción Compleja'],
+        'odontologo': usuarios['odontologo_3']['odontologo'],
+        'numero_diente': 36,
+        'descripcion': 'Extracción de muela con caries profunda',
+        'estado': 'pendiente',
+        'fecha_planificada': datetime.now().date() + timedelta(days=7),
+        'costo_estimado': Decimal('400.00')
+    }])
     
     # Registrar pago inicial
-    HistorialPago.objects.create(
-        plan_tratamiento=plan2,
-        presupuesto=presupuesto2,
-        monto=Decimal('1500.00'),
-        metodo_pago='tarjeta',
-        estado='completado',
-        numero_comprobante='REC-001',
-        registrado_por='Recepcionista Laura Morales'
-    )
+    guardar_filas(HistorialPago, [{
+        'plan_tratamiento': plan2,
+        'presupuesto': presupuesto2,
+        'monto': Decimal('1500.00'),
+        'metodo_pago': 'tarjeta',
+        'estado': 'completado',
+        'numero_comprobante': 'REC-001',
+        'registrado_por': 'Recepcionista Laura Morales'
+    }])
     
     print("✅ 2 planes de tratamiento con presupuestos creados")
 
@@ -677,81 +957,913 @@ def create_inventario():
     print_section("📦 CREANDO INVENTARIO")
     
     # Categorías
-    cat_material = CategoriaInsumo.objects.create(
-        nombre='Material Dental',
-        descripcion='Materiales de uso odontológico'
-    )
-    cat_medicamento = CategoriaInsumo.objects.create(
-        nombre='Medicamentos',
-        descripcion='Medicamentos y anestésicos'
-    )
-    cat_instrumental = CategoriaInsumo.objects.create(
-        nombre='Instrumental',
-        descripcion='Instrumental odontológico'
-    )
+    cat_material, cat_medicamento, cat_instrumental = guardar_filas(CategoriaInsumo, [
+        {'nombre': 'Material Dental', 'descripcion': 'Materiales de uso odontológico'},
+        {'nombre': 'Medicamentos', 'descripcion': 'Medicamentos y anestésicos'},
+        {'nombre': 'Instrumental', 'descripcion': 'Instrumental odontológico'},
+    ])
     
     # Proveedores
-    prov1 = Proveedor.objects.create(
-        nombre='Dental Supply SA',
-        ruc='1234567890',
-        direccion='Av. Libertador #123',
-        telefono='2-2222222',
-        email='ventas@dentalsupply.com',
-        contacto_nombre='José Pérez',
-        contacto_telefono='70123456'
-    )
+    [prov1] = guardar_filas(Proveedor, [{
+        'nombre': 'Dental Supply SA',
+        'ruc': '1234567890',
+        'direccion': 'Av. Libertador #123',
+        'telefono': '2-2222222',
+        'email': 'ventas@dentalsupply.com',
+        'contacto_nombre': 'José Pérez',
+        'contacto_telefono': '70123456'
+    }])
     
     # Insumos
-    insumo1 = Insumo.objects.create(
-        codigo='INS-001',
-        nombre='Resina Composite A2',
-        descripcion='Resina fotopolimerizable color A2',
-        categoria=cat_material,
-        proveedor_principal=prov1,
-        stock_actual=Decimal('25.00'),
-        stock_minimo=Decimal('10.00'),
-        stock_maximo=Decimal('50.00'),
-        unidad_medida='unidad',
-        precio_compra=Decimal('80.00'),
-        precio_venta=Decimal('120.00')
-    )
+    insumo1, insumo2 = guardar_filas(Insumo, [
+        {
+            'codigo': 'INS-001',
+            'nombre': 'Resina Composite A2',
+            'descripcion': 'Resina fotopolimerizable color A2',
+            'categoria': cat_material,
+            'proveedor_principal': prov1,
+            'stock_actual': Decimal('25.00'),
+            'stock_minimo': Decimal('10.00'),
+            'stock_maximo': Decimal('50.00'),
+            'unidad_medida': 'unidad',
+            'precio_compra': Decimal('80.00'),
+            'precio_venta': Decimal('120.00')
+        },
+        {
+            'codigo': 'INS-002',
+            'nombre': 'Anestesia Lidocaína 2%',
+            'descripcion': 'Anestésico local con epinefrina',
+            'categoria': cat_medicamento,
+            'proveedor_principal': prov1,
+            'stock_actual': Decimal('8.00'),
+            'stock_minimo': Decimal('15.00'),  # Stock bajo!
+            'stock_maximo': Decimal('100.00'),
+            'unidad_medida': 'caja',
+            'precio_compra': Decimal('45.00'),
+            'requiere_vencimiento': True,
+            'fecha_vencimiento': date(2026, 12, 31)
+        },
+    ])
+    
+    # Crear alerta de stock bajo
+    guardar_filas(AlertaInventario, [{
+        'insumo': insumo2,
+        'tipo_alerta': 'stock_bajo',
+        'mensaje': f'Stock de {insumo2.nombre} por debajo del mínimo (8 < 15)',
+        'prioridad': 'alta'
+    }])
     
-    insumo2 = Insumo.objects.create(
-        codigo='INS-002',
-        nombre='Anestesia Lidocaína 2%',
-        descripcion='Anestésico local con epinefrina',
-        categoria=cat_medicamento,
-        proveedor_principal=prov1,
-        stock_actual=Decimal('8.00'),
-        stock_minimo=Decimal('15.00'),  # Stock bajo!
-        stock_maximo=Decimal('100.00'),
-        unidad_medida='caja',
-        precio_compra=Decimal('45.00'),
-        requiere_vencimiento=True,
-        fecha_vencimiento=date(2026, 12, 31)
+    print("✅ Inventario creado con 2 insumos y 1 alerta")
+    return [insumo1, insumo2]
+
+
+def _lotes(iterable, tamano):
+    """Agrupa un iterable en listas de `tamano` elementos (la última puede ser menor)"""
+    iterador = iter(iterable)
+    while True:
+        lote = list(itertools.islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def guardar_en_lotes(modelo, filas):
+    """
+    Consume el iterable `filas` (dicts campo -> valor) en lotes de BULK_BATCH_SIZE
+    y los inserta con bulk_create. Retorna solo los PKs creados para no mantener
+    millones de instancias en memoria; las FKs se enlazan con `<campo>_id`.
+    """
+    pks = []
+    for lote in _lotes(filas, BULK_BATCH_SIZE):
+        creados = modelo.objects.bulk_create([modelo(**campos) for campos in lote])
+        pks.extend(obj.pk for obj in creados)
+    return pks
+
+
+def _guardar_cuentas_sinteticas(prefijo, cantidad, password_hash, tipo_usuario, rng, perfil):
+    """
+    Crea `cantidad` cuentas sintéticas (User, Token, Usuario y perfil) por lotes.
+    `perfil(i, rng)` retorna los campos del perfil de la cuenta i (sin codusuario).
+    Retorna los PKs de los perfiles creados.
+    """
+    correos = [f'{prefijo}{i}@seed.clinica.com' for i in range(1, cantidad + 1)]
+    
+    user_pks = guardar_en_lotes(User, (
+        {'username': correo, 'email': correo, 'password': password_hash}
+        for correo in correos
+    ))
+    guardar_en_lotes(Token, ({'user_id': pk, 'key': Token.generate_key()} for pk in user_pks))
+    usuario_pks = guardar_en_lotes(Usuario, (
+        {
+            'nombre': rng.choice(NOMBRES_SINTETICOS),
+            'apellido': f'{rng.choice(APELLIDOS_SINTETICOS)} {rng.choice(APELLIDOS_SINTETICOS)}',
+            'correoelectronico': correo,
+            'sexo': rng.choice('MF'),
+            'telefono': f'7{rng.randrange(10**7):07d}',
+            'idtipousuario': tipo_usuario
+        }
+        for correo in correos
+    ))
+    modelo, campos_perfil = perfil
+    return guardar_en_lotes(modelo, (
+        dict(campos_perfil(i, rng), codusuario_id=pk)
+        for i, pk in enumerate(usuario_pks, 1)
+    ))
+
+
+def _dias_habiles(desde, hasta):
+    """Lista de fechas entre desde y hasta (inclusive) sin domingos"""
+    dias = []
+    dia = desde
+    while dia <= hasta:
+        if dia.weekday() != 6:
+            dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+def horarios_del_dia(fecha, horarios):
+    """
+    Horarios de atención de la clínica en `fecha`: lunes a viernes toda la grilla,
+    sábados hasta las 13:00 y domingos ninguno. Lo usan --scale y --calendario.
+    """
+    if fecha.weekday() == 6:
+        return []
+    if fecha.weekday() == 5:
+        return [h for h in horarios if str(h.hora) < '13:00']
+    return list(horarios)
+
+
+def create_scaled_dataset(base_data, insumos, scale, seed=SCALE_SEED):
+    """
+    Genera un dataset sintético de `scale` veces el tamaño del dataset base
+    (ver ESCALA_POR_UNIDAD). Usa un RNG con semilla fija, así que dos corridas
+    con el mismo --scale producen los mismos datos.
+    
+    Todo se inserta por lotes con bulk_create, independientemente de --bulk.
+    """
+    print_section(f"📈 GENERANDO DATASET SINTÉTICO (--scale {scale})")
+    
+    rng = random.Random(seed)
+    hoy = datetime.now().date()
+    cantidades = {nombre: por_unidad * scale for nombre, por_unidad in ESCALA_POR_UNIDAD.items()}
+    
+    # Un solo hash por password: todas las cuentas sintéticas comparten credenciales
+    hash_odontologo = hash_password('odontologo123')
+    hash_paciente = hash_password('paciente123')
+    
+    print(f"Creando {cantidades['odontologos']} odontólogos...")
+    especialidades = ['Ortodoncia', 'Endodoncia', 'Cirugía Oral', 'Periodoncia', 'Odontopediatría']
+    odontologo_pks = _guardar_cuentas_sinteticas(
+        'odontologo', cantidades['odontologos'], hash_odontologo,
+        base_data['tipos_usuario']['odontologo'], rng,
+        (Odontologo, lambda i, rng: {
+            'especialidad': rng.choice(especialidades),
+            'nromatricula': f'ODO-S{i:07d}',
+            'experienciaprofesional': f'{rng.randint(1, 30)} años de experiencia'
+        })
     )
     
-    # Crear alerta de stock bajo
-    AlertaInventario.objects.create(
-        insumo=insumo2,
-        tipo_alerta='stock_bajo',
-        mensaje=f'Stock de {insumo2.nombre} por debajo del mínimo (8 < 15)',
-        prioridad='alta'
+    print(f"Creando {cantidades['pacientes']} pacientes...")
+    paciente_pks = _guardar_cuentas_sinteticas(
+        'paciente', cantidades['pacientes'], hash_paciente,
+        base_data['tipos_usuario']['paciente'], rng,
+        (Paciente, lambda i, rng: {
+            'carnetidentidad': str(10_000_000 + i),
+            'fechanacimiento': date(1950, 1, 1) + timedelta(days=rng.randrange(365 * 55)),
+            'direccion': f'Calle {rng.choice(APELLIDOS_SINTETICOS)} #{rng.randint(1, 999)}'
+        })
     )
     
-    print("✅ Inventario creado con 2 insumos y 1 alerta")
+    # Consultas: se muestrean celdas únicas de la grilla (día hábil x horario x odontólogo),
+    # así no hay dos consultas del mismo odontólogo en el mismo horario. Cada día usa
+    # horarios_del_dia, igual que --calendario.
+    print(f"Creando {cantidades['consultas']} consultas sobre la grilla de horarios...")
+    horarios = base_data['horarios']
+    dias = _dias_habiles(hoy + timedelta(days=ESCALA_VENTANA_DIAS[0]),
+                         hoy + timedelta(days=ESCALA_VENTANA_DIAS[1]))
+    grilla = [horarios_del_dia(dia, horarios) for dia in dias]
+    while sum(map(len, grilla)) * len(odontologo_pks) < cantidades['consultas']:
+        extra = _dias_habiles(dias[-1] + timedelta(days=1), dias[-1] + timedelta(days=30))
+        dias.extend(extra)
+        grilla.extend(horarios_del_dia(dia, horarios) for dia in extra)
+    # inicio_dia[d] = índice de la primera celda del día d
+    inicio_dia = list(itertools.accumulate((len(h) * len(odontologo_pks) for h in grilla), initial=0))
+    celdas = sorted(rng.sample(range(inicio_dia[-1]), cantidades['consultas']))
+    
+    estados = base_data['estados_consulta']
+    tipos = list(base_data['tipos_consulta'].values())
+    estados_pasados = (['completada'] * 7) + (['cancelada'] * 2) + ['no_asistio']
+    estados_futuros = (['confirmada'] * 3) + (['pendiente'] * 2)
+    completadas = []  # (índice de consulta, paciente, fecha, costo)
+    
+    def filas_consultas():
+        for n, celda in enumerate(celdas):
+            dia = bisect.bisect_right(inicio_dia, celda) - 1
+            idx_horario, idx_odontologo = divmod(celda - inicio_dia[dia], len(odontologo_pks))
+            fecha = dias[dia]
+            estado = rng.choice(estados_pasados if fecha < hoy else estados_futuros)
+            paciente_pk = rng.choice(paciente_pks)
+            costo = Decimal(rng.choice([100, 150, 200, 250, 300]))
+            if estado == 'completada':
+                completadas.append((n, paciente_pk, fecha, costo))
+            yield {
+                'fecha': fecha,
+                'codpaciente_id': paciente_pk,
+                'cododontologo_id': odontologo_pks[idx_odontologo],
+                'idhorario': grilla[dia][idx_horario],
+                'idtipoconsulta': rng.choice(tipos),
+                'idestadoconsulta': estados[estado],
+                'estado': estado,
+                'motivo_consulta': rng.choice(MOTIVOS_SINTETICOS),
+                'costo_consulta': costo,
+                'requiere_pago': estado == 'completada'
+            }
+    
+    consulta_pks = guardar_en_lotes(Consulta, filas_consultas())
+    
+    print(f"Creando {cantidades['historiales']} historiales clínicos...")
+    guardar_en_lotes(Historialclinico, (
+        {
+            'pacientecodigo_id': rng.choice(paciente_pks),
+            'motivoconsulta': rng.choice(MOTIVOS_SINTETICOS),
+            'diagnostico': 'Dataset sintético',
+            'tratamiento': 'Dataset sintético',
+            'alergias': rng.choice(['Ninguna conocida', 'Alergia a penicilina', 'Alergia al látex']),
+            'enfermedades': rng.choice(['Ninguna', 'Hipertensión controlada', 'Diabetes tipo 2']),
+            'examenbucal': 'Dataset sintético'
+        }
+        for _ in range(cantidades['historiales'])
+    ))
+    
+    # Una factura por consulta completada; el 80% queda pagada con su Pago
+    print(f"Creando {len(completadas)} facturas y sus pagos...")
+    estados_factura = base_data['estados_factura']
+    tipos_pago = list(base_data['tipos_pago'].values())
+    pagadas = [rng.random() < 0.8 for _ in completadas]
+    factura_pks = guardar_en_lotes(Factura, (
+        {
+            'consulta_id': consulta_pks[n],
+            'paciente_id': paciente_pk,
+            'fechaemision': fecha,
+            'montototal': costo,
+            'idestadofactura': estados_factura['pagada' if pagada else 'pendiente']
+        }
+        for (n, paciente_pk, fecha, costo), pagada in zip(completadas, pagadas)
+    ))
+    guardar_en_lotes(Pago, (
+        {
+            'idfactura_id': factura_pk,
+            'idtipopago': rng.choice(tipos_pago),
+            'montopagado': costo,
+            'fechapago': fecha
+        }
+        for factura_pk, (_, _, fecha, costo), pagada in zip(factura_pks, completadas, pagadas)
+        if pagada
+    ))
+    
+    print(f"Creando {cantidades['movimientos_inventario']} movimientos de inventario...")
+    guardar_en_lotes(MovimientoInventario, (
+        {
+            'insumo': rng.choice(insumos),
+            'tipo_movimiento': rng.choice(['entrada', 'salida', 'salida', 'ajuste']),
+            'cantidad': Decimal(rng.randint(1, 20)),
+            'motivo': 'Dataset sintético'
+        }
+        for _ in range(cantidades['movimientos_inventario'])
+    ))
+    
+    print(f"✅ Dataset x{scale}: {len(paciente_pks)} pacientes, {len(consulta_pks)} consultas, "
+          f"{len(factura_pks)} facturas")
+
+
+def generar_calendario_consultas(base_data, desde, hasta, ocupacion=CALENDARIO_OCUPACION, seed=SCALE_SEED):
+    """
+    Llena el rango [desde, hasta] con consultas de todos los odontólogos sobre la
+    grilla de Horario de cada día (ver horarios_del_dia).
+    Cada celda se ocupa con probabilidad `ocupacion`; el estado sigue
+    CALENDARIO_ESTADOS_PASADOS o CALENDARIO_ESTADOS_FUTUROS según la fecha.
+    
+    Los números aleatorios se sortean para todas las celdas, ocupadas o no, así
+    que repetir la corrida con la misma semilla no duplica consultas: las celdas
+    que ya tienen consulta se saltan.
+    """
+    print_section(f"🗓️  GENERANDO CALENDARIO {desde} → {hasta} (ocupación {ocupacion:.0%})")
+    
+    rng = random.Random(seed)
+    hoy = datetime.now().date()
+    horarios = base_data['horarios']
+    odontologo_pks = list(Odontologo.objects.order_by('pk').values_list('pk', flat=True))
+    paciente_pks = list(Paciente.objects.order_by('pk').values_list('pk', flat=True))
+    if not odontologo_pks or not paciente_pks:
+        print("⚠️  No hay odontólogos o pacientes; se omite el calendario")
+        return 0
+    
+    ocupadas = set(Consulta.objects.filter(fecha__range=(desde, hasta)).values_list(
+        'cododontologo_id', 'fecha', 'idhorario_id'
+    ))
+    estados = base_data['estados_consulta']
+    tipos = base_data['tipos_consulta']
+    
+    def elegir(distribucion):
+        return rng.choices(list(distribucion), weights=list(distribucion.values()))[0]
+    
+    def filas():
+        for fecha in _dias_habiles(desde, hasta):
+            for horario in horarios_del_dia(fecha, horarios):
+                for odontologo_pk in odontologo_pks:
+                    # Sorteos fijos por celda, aunque la celda no se use
+                    ocupada = rng.random() < ocupacion
+                    estado = elegir(CALENDARIO_ESTADOS_PASADOS if fecha < hoy else CALENDARIO_ESTADOS_FUTUROS)
+                    tipo = elegir(CALENDARIO_TIPOS)
+                    paciente_pk = rng.choice(paciente_pks)
+                    motivo = rng.choice(MOTIVOS_SINTETICOS)
+                    if not ocupada or (odontologo_pk, fecha, horario.pk) in ocupadas:
+                        continue
+                    fila = {
+                        'fecha': fecha,
+                        'codpaciente_id': paciente_pk,
+                        'cododontologo_id': odontologo_pk,
+                        'idhorario': horario,
+                        'idtipoconsulta': tipos[tipo],
+                        'idestadoconsulta': estados[estado],
+                        'estado': estado,
+                        'motivo_consulta': motivo,
+                        'costo_consulta': CALENDARIO_COSTOS[tipo],
+                        'requiere_pago': estado == 'completada',
+                    }
+                    if tipo == 'urgencia':
+                        fila['tipo_consulta'] = 'urgencia'
+                    if estado == 'cancelada':
+                        fila['motivo_cancelacion'] = 'Cancelada por el paciente'
+                    yield fila
+    
+    creadas = len(guardar_en_lotes(Consulta, filas()))
+    print(f"✅ {creadas} consultas para {len(odontologo_pks)} odontólogos")
+    return creadas
+
+
+def _rango_calendario(texto):
+    """Convierte 'AAAA-MM-DD:AAAA-MM-DD' en (desde, hasta) para --calendario"""
+    try:
+        desde, hasta = (date.fromisoformat(parte) for parte in texto.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError("use el formato AAAA-MM-DD:AAAA-MM-DD")
+    if desde > hasta:
+        raise argparse.ArgumentTypeError("la fecha inicial es posterior a la final")
+    return desde, hasta
+
+
+def modelos_snapshot():
+    """
+    Modelos incluidos en un snapshot, en orden de carga: primero los del seeder
+    (orden inverso al de borrado) y luego el resto de modelos de las mismas apps
+    (p. ej. tablas de detalle y M2M auto-creadas). De las apps de Django solo se
+    toman User y Token; permisos y grupos los gestionan las migraciones.
+    """
+    modelos = [m for _, grupo in reversed(modelos_a_destruir()) for m in reversed(grupo)]
+    apps_externas = {User._meta.app_label, Token._meta.app_label}
+    for etiqueta in sorted({m._meta.app_label for m in modelos} - apps_externas):
+        for modelo in django_apps.get_app_config(etiqueta).get_models(include_auto_created=True):
+            if modelo not in modelos and not modelo._meta.proxy:
+                modelos.append(modelo)
+    return modelos
+
+
+def checksum_seeder(args):
+    """
+    Checksum del estado que produciría esta corrida: código del seeder, migraciones
+    aplicadas y opciones que cambian los datos.
+
+    La fecha no entra: las fechas relativas a hoy (consultas, vencimientos) quedan
+    como el día en que se grabó el snapshot, en vez de invalidarlo cada medianoche
+    y volver a poblar todo. El encabezado guarda ese día en 'creado'.
+    """
+    digest = hashlib.sha256()
+    with open(os.path.abspath(__file__), 'rb') as fuente:
+        digest.update(fuente.read())
+    migraciones = sorted(MigrationRecorder(connection).applied_migrations())
+    digest.update(json.dumps(migraciones).encode())
+    digest.update(json.dumps({
+        'scale': args.scale,
+        'seed': args.seed,
+        'fast_hasher': args.fast_hasher,
+        'calendario': [d.isoformat() for d in args.calendario] if args.calendario else None,
+        'ocupacion': args.ocupacion,
+    }, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def guardar_snapshot(ruta, checksum):
+    """
+    Vuelca las tablas de modelos_snapshot() a `ruta` (JSON lines comprimido con gzip).
+    La primera línea es el encabezado con el checksum; luego un bloque por modelo
+    con los nombres de columna y las filas en lotes de BULK_BATCH_SIZE.
+    """
+    print_section("💾 GUARDANDO SNAPSHOT")
+    inicio = time.perf_counter()
+    modelos = modelos_snapshot()
+    total = 0
+    
+    with gzip.open(ruta, 'wt', encoding='utf-8') as archivo:
+        archivo.write(json.dumps({
+            'checksum': checksum,
+            'creado': datetime.now().isoformat(),
+            'modelos': [m._meta.label for m in modelos],
+        }) + '\n')
+        for modelo in modelos:
+            campos = [f.attname for f in modelo._meta.concrete_fields]
+            filas = modelo.objects.order_by('pk').values_list(*campos).iterator(chunk_size=BULK_BATCH_SIZE)
+            for lote in _lotes(filas, BULK_BATCH_SIZE):
+                archivo.write(json.dumps(
+                    {'modelo': modelo._meta.label, 'campos': campos, 'filas': lote},
+                    cls=DjangoJSONEncoder
+                ) + '\n')
+                total += len(lote)
+    
+    print(f"✅ {total} filas de {len(modelos)} modelos en {ruta} ({time.perf_counter() - inicio:.2f}s)")
+
+
+def leer_encabezado_snapshot(ruta):
+    """Retorna el encabezado del snapshot, o None si no existe o no se puede leer"""
+    try:
+        with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+            return json.loads(archivo.readline())
+    except (OSError, ValueError):
+        return None
+
+
+@contextlib.contextmanager
+def sin_auto_now(modelos):
+    """
+    Desactiva auto_now/auto_now_add en los campos de `modelos` mientras dura el
+    bloque, para que bulk_create guarde las fechas tal como vienen.
+    """
+    campos = [
+        (campo, campo.auto_now, campo.auto_now_add)
+        for modelo in modelos for campo in modelo._meta.concrete_fields
+        if getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+    ]
+    for campo, _, _ in campos:
+        campo.auto_now = campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, auto_now, auto_now_add in campos:
+            campo.auto_now, campo.auto_now_add = auto_now, auto_now_add
+
+
+def restaurar_snapshot(ruta):
+    """
+    Vacía las tablas del snapshot y las vuelve a cargar con bulk_create, conservando
+    los PKs y las fechas auto_now/auto_now_add originales; al final reinicia las
+    secuencias de autoincremento.
+
+    Siempre vacía y recarga, aunque la base ya coincida con el snapshot: --restore
+    sirve para volver al estado conocido después de que los flujos escribieron, y
+    comprobar que nada cambió exigiría leer todas las tablas, casi lo mismo que
+    recargarlas.
+    """
+    print_section("♻️  RESTAURANDO SNAPSHOT")
+    inicio = time.perf_counter()
+    modelos = {m._meta.label: m for m in modelos_snapshot()}
+    total = 0
+    
+    with transaction.atomic(), sin_auto_now(modelos.values()):
+        tablas = [m._meta.db_table for m in modelos.values()]
+        connection.ops.execute_sql_flush(
+            connection.ops.sql_flush(no_style(), tablas, allow_cascade=True)
+        )
+        
+        with gzip.open(ruta, 'rt', encoding='utf-8') as archivo:
+            archivo.readline()  # encabezado
+            for linea in archivo:
+                bloque = json.loads(linea)
+                modelo = modelos[bloque['modelo']]
+                por_attname = {f.attname: f for f in modelo._meta.concrete_fields}
+                campos = [por_attname[attname] for attname in bloque['campos']]
+                modelo.objects.bulk_create([
+                    modelo(**{
+                        campo.attname: campo.to_python(valor)
+                        for campo, valor in zip(campos, fila)
+                    })
+                    for fila in bloque['filas']
+                ])
+                total += len(bloque['filas'])
+        
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), list(modelos.values())):
+                cursor.execute(sql)
+    
+    print(f"✅ {total} filas restauradas en {time.perf_counter() - inicio:.2f}s")
+
+
+def modelos_importables():
+    """Modelos importados al inicio de este script, por nombre de clase"""
+    return {
+        nombre: objeto for nombre, objeto in globals().items()
+        if isinstance(objeto, type) and issubclass(objeto, models.Model)
+    }
+
+
+def leer_filas(ruta):
+    """
+    Genera un dict por fila de un archivo CSV (con encabezado) o JSONL, sin cargar
+    el archivo completo. Acepta archivos comprimidos con gzip (.csv.gz, .jsonl.gz).
+    """
+    abrir = gzip.open if ruta.endswith('.gz') else open
+    nombre = ruta[:-3] if ruta.endswith('.gz') else ruta
+    with abrir(ruta, 'rt', encoding='utf-8', newline='') as archivo:
+        if nombre.endswith('.csv'):
+            yield from csv.DictReader(archivo)
+        elif nombre.endswith(('.jsonl', '.ndjson')):
+            for linea in archivo:
+                if linea.strip():
+                    yield json.loads(linea)
+        else:
+            raise ValueError(f"Formato no soportado: {ruta} (use .csv o .jsonl)")
+
+
+def _campos_de_archivo(modelo, columnas):
+    """Relaciona cada columna del archivo con un campo concreto (por nombre o attname)"""
+    campos = {}
+    for campo in modelo._meta.concrete_fields:
+        campos[campo.name] = campo
+        campos[campo.attname] = campo
+    desconocidas = [c for c in columnas if c not in campos]
+    if desconocidas:
+        raise ValueError(f"{modelo.__name__} no tiene los campos: {', '.join(desconocidas)}")
+    return {columna: campos[columna] for columna in columnas}
+
+
+def _instancia_desde_fila(modelo, campos, fila):
+    """Construye una instancia sin guardar; '' en CSV equivale a NULL salvo en campos de texto"""
+    if fila.keys() - campos.keys():
+        campos.update(_campos_de_archivo(modelo, list(fila.keys() - campos.keys())))
+    valores = {}
+    for columna, valor in fila.items():
+        campo = campos[columna]
+        if valor == '' and (campo.null or not isinstance(campo, (models.CharField, models.TextField))):
+            valor = None
+        valores[campo.attname] = campo.to_python(valor) if valor is not None else None
+    return modelo(**valores)
+
+
+def _valor_copy(campo, obj):
+    """Representación de texto de un campo para COPY ... (FORMAT csv, NULL '\\N')"""
+    valor = campo.get_prep_value(campo.pre_save(obj, True))
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    if isinstance(valor, (dict, list)):
+        return json.dumps(valor)
+    return str(valor)
+
+
+def _copiar_lote(modelo, instancias, campos_destino):
+    """Inserta un lote con COPY FROM STDIN (psycopg2 o psycopg 3)"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    for obj in instancias:
+        escritor.writerow([_valor_copy(campo, obj) for campo in campos_destino])
+    buffer.seek(0)
+    
+    tabla = connection.ops.quote_name(modelo._meta.db_table)
+    columnas = ', '.join(connection.ops.quote_name(c.column) for c in campos_destino)
+    sql = f"COPY {tabla} ({columnas}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    with connection.cursor() as cursor:
+        crudo = cursor.cursor
+        if hasattr(crudo, 'copy_expert'):
+            crudo.copy_expert(sql, buffer)
+        else:
+            with crudo.copy(sql) as copia:
+                copia.write(buffer.getvalue())
+
+
+def importar_archivo(modelo, ruta, tamano_lote):
+    """
+    Importa `ruta` en `modelo` en lotes de `tamano_lote` filas; la memoria usada
+    depende del lote, no del tamaño del archivo. En PostgreSQL usa COPY, en otros
+    motores bulk_create. Si el archivo trae PKs se reinician las secuencias al final.
+    """
+    filas = leer_filas(ruta)
+    primera = next(filas, None)
+    if primera is None:
+        print(f"  {ruta}: vacío")
+        return 0
+    
+    campos = _campos_de_archivo(modelo, list(primera.keys()))
+    usar_copy = connection.vendor == 'postgresql'
+    trae_pk = modelo._meta.pk in campos.values()
+    campos_destino = [c for c in modelo._meta.concrete_fields if trae_pk or not c.primary_key]
+    
+    inicio = time.perf_counter()
+    total = 0
+    for lote in _lotes(itertools.chain([primera], filas), tamano_lote):
+        instancias = [_instancia_desde_fila(modelo, campos, fila) for fila in lote]
+        if usar_copy:
+            _copiar_lote(modelo, instancias, campos_destino)
+        else:
+            modelo.objects.bulk_create(instancias)
+        total += len(instancias)
+        print(f"  {modelo.__name__}: {total} filas...", end='\r')
+    
+    if trae_pk:
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [modelo]):
+                cursor.execute(sql)
+    
+    segundos = time.perf_counter() - inicio
+    metodo = 'COPY' if usar_copy else 'bulk_create'
+    print(f"  ✓ {modelo.__name__} <- {ruta}: {total} filas en {segundos:.2f}s ({metodo})")
+    return total
+
+
+def importar_archivos(especificaciones, tamano_lote):
+    """
+    Importa cada 'Modelo=ruta' en el orden dado (las FKs deben existir antes).
+    Retorna el total de filas importadas.
+    """
+    print_section("📥 IMPORTANDO ARCHIVOS")
+    disponibles = modelos_importables()
+    total = 0
+    with transaction.atomic():
+        for especificacion in especificaciones:
+            nombre, _, ruta = especificacion.partition('=')
+            if nombre not in disponibles or not ruta:
+                raise ValueError(
+                    f"--importar espera Modelo=ruta con un modelo de: {', '.join(sorted(disponibles))}"
+                )
+            total += importar_archivo(disponibles[nombre], ruta, tamano_lote)
+    return total
+
+
+@contextlib.contextmanager
+def medir_fase(nombre):
+    """
+    Mide una fase del seeder: tiempo de reloj, queries SQL ejecutadas, filas
+    escritas (rowcount de INSERT/UPDATE/DELETE) y pico de memoria de Python
+    (si tracemalloc está activo). El resultado se agrega a metricas_fases.
+    
+    Lo que no pasa por el cursor de Django (p. ej. COPY) se puede sumar a mano
+    a fase['filas_escritas'].
+    """
+    fase = {'fase': nombre, 'consultas_sql': 0, 'filas_escritas': 0}
+    
+    def contar(execute, sql, params, many, context):
+        resultado = execute(sql, params, many, context)
+        fase['consultas_sql'] += 1
+        if sql.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE'):
+            fase['filas_escritas'] += max(context['cursor'].rowcount, 0)
+        return resultado
+    
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        memoria_inicial = tracemalloc.get_traced_memory()[0]
+    inicio = time.perf_counter()
+    try:
+        with connection.execute_wrapper(contar):
+            yield fase
+    finally:
+        fase['segundos'] = round(time.perf_counter() - inicio, 4)
+        fase['memoria_pico_mb'] = (
+            round((tracemalloc.get_traced_memory()[1] - memoria_inicial) / 1024 / 1024, 2)
+            if tracemalloc.is_tracing() else None
+        )
+        metricas_fases.append(fase)
+        memoria = f" | pico {fase['memoria_pico_mb']} MB" if fase['memoria_pico_mb'] is not None else ""
+        print(f"   ⏱️  {nombre}: {fase['segundos']:.2f}s | {fase['consultas_sql']} queries | "
+              f"{fase['filas_escritas']} filas{memoria}")
+
+
+def guardar_metricas(ruta, args, inicio, fin):
+    """Escribe el resumen de fases en JSON (mismo estilo que los salida_flujoNN.json)"""
+    resumen = {
+        'seeder': {
+            'inicio': inicio.isoformat(),
+            'fin': fin.isoformat(),
+            'duracion_segundos': round((fin - inicio).total_seconds(), 2),
+            'modo_escritura': modo_escritura,
+            'modo_hash': modo_hash,
+            'base_de_datos': connection.vendor,
+            'opciones': {k: v for k, v in vars(args).items() if k != 'force'},
+        },
+        'fases': metricas_fases,
+        'totales': {
+            'consultas_sql': sum(f['consultas_sql'] for f in metricas_fases),
+            'filas_escritas': sum(f['filas_escritas'] for f in metricas_fases),
+            'memoria_pico_mb': max(
+                (f['memoria_pico_mb'] for f in metricas_fases if f['memoria_pico_mb'] is not None),
+                default=None
+            ),
+        },
+    }
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(resumen, archivo, indent=2, ensure_ascii=False, cls=DjangoJSONEncoder)
+    print(f"📊 Métricas por fase: {ruta}")
+
+
+def parse_args():
+    """Lee las opciones de línea de comandos"""
+    parser = argparse.ArgumentParser(description='Seeder de base de datos - Clínica Dental')
+    parser.add_argument('--force', action='store_true',
+                        help='Eliminar datos sin pedir confirmación')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Insertar por lotes con bulk_create (un round trip por lote y modelo)')
+    parser.add_argument('--upsert', action='store_true',
+                        help='No destruir datos: insertar o actualizar por clave natural '
+                             '(correo, hora, estado, nombre...) solo lo que falta o cambió')
+    parser.add_argument('--batch-size', type=int, default=BULK_BATCH_SIZE,
+                        help=f'Filas por lote en modo --bulk (default: {BULK_BATCH_SIZE})')
+    parser.add_argument('--fast-wipe', action='store_true',
+                        help='Vaciar tablas con TRUNCATE/flush SQL en lugar de delete() por ORM')
+    parser.add_argument('--hash-once', action='store_true',
+                        help='Hashear cada password distinta una sola vez y reutilizar el hash')
+    parser.add_argument('--fast-hasher', action='store_true',
+                        help=f'Como --hash-once pero con PBKDF2 de {ITERACIONES_HASH_RAPIDO} iteraciones '
+                             '(solo para bases de datos desechables)')
+    parser.add_argument('--snapshot', metavar='ARCHIVO',
+                        help='Después de poblar, guardar el estado en un snapshot comprimido')
+    parser.add_argument('--restore', metavar='ARCHIVO',
+                        help='Vaciar la base y restaurar el snapshot si su checksum coincide con el '
+                             'seeder y el esquema actuales; si no, poblar normalmente y regenerarlo. '
+                             'Las fechas quedan como el día en que se grabó el snapshot')
+    parser.add_argument('--calendario', type=_rango_calendario, metavar='DESDE:HASTA',
+                        help='Llenar el rango (AAAA-MM-DD:AAAA-MM-DD) con consultas de todos los '
+                             'odontólogos sobre la grilla de horarios')
+    parser.add_argument('--ocupacion', type=float, default=CALENDARIO_OCUPACION,
+                        help=f'Fracción de horarios ocupados en --calendario (default: {CALENDARIO_OCUPACION})')
+    parser.add_argument('--tenants', metavar='SCHEMA1,SCHEMA2,...',
+                        help='Poblar estos schemas de tenant (django-tenants) en paralelo')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Procesos para --tenants (default: número de CPUs)')
+    parser.add_argument('--importar', action='append', default=[], metavar='MODELO=ARCHIVO',
+                        help='Después de poblar, importar un CSV/JSONL (opcionalmente .gz) en el '
+                             'modelo indicado; se puede repetir y se respeta el orden')
+    parser.add_argument('--chunk-size', type=int, default=BULK_BATCH_SIZE,
+                        help=f'Filas por lote al importar (default: {BULK_BATCH_SIZE})')
+    parser.add_argument('--metricas', default='salida_seeder.json', metavar='ARCHIVO',
+                        help='Resumen JSON de tiempo, queries, filas y memoria por fase '
+                             '(default: salida_seeder.json; vacío para desactivar)')
+    parser.add_argument('--sin-memoria', action='store_true',
+                        help='No medir el pico de memoria (tracemalloc agrega overhead)')
+    parser.add_argument('--scale', type=int, default=0, metavar='N',
+                        help='Además del dataset base, generar N veces el dataset con datos sintéticos')
+    parser.add_argument('--seed', type=int, default=SCALE_SEED,
+                        help=f'Semilla del generador sintético (default: {SCALE_SEED})')
+    return parser.parse_args()
+
+
+def configurar_modos(args):
+    """Aplica a las variables globales los modos elegidos por línea de comandos"""
+    global modo_escritura, modo_hash, BULK_BATCH_SIZE
+    
+    if args.bulk:
+        modo_escritura = 'bulk'
+        BULK_BATCH_SIZE = args.batch_size
+        print(f"⚡ Modo BULK: INSERT por lotes de {BULK_BATCH_SIZE} filas")
+    
+    if args.upsert:
+        modo_escritura = 'upsert'
+        BULK_BATCH_SIZE = args.batch_size
+        print("♻️  Modo UPSERT: sin borrar datos, PKs y tokens existentes se conservan")
+    
+    if args.fast_hasher:
+        modo_hash = 'rapido'
+        print(f"⚡ Hash RÁPIDO: PBKDF2 con {ITERACIONES_HASH_RAPIDO} iteraciones (solo pruebas de carga)")
+    elif args.hash_once or args.upsert:
+        modo_hash = 'cache'
+        print("⚡ Hash por password: un PBKDF2 por password distinta")
+
+
+def poblar(args):
+    """Ejecuta todas las fases del seeder en una sola transacción"""
+    with transaction.atomic():
+        # 1. Destruir datos (salvo en modo upsert)
+        if modo_escritura != 'upsert':
+            with medir_fase('destroy_all_data'):
+                destroy_all_data(fast=args.fast_wipe)
+        
+        # 2. Crear datos base
+        with medir_fase('create_base_data'):
+            base_data = create_base_data()
+        
+        # 3. Crear usuarios
+        with medir_fase('create_users'):
+            usuarios = create_users(base_data)
+        
+        # 4. Crear servicios
+        with medir_fase('create_servicios'):
+            servicios = create_servicios()
+        
+        # 5. Crear consultas
+        with medir_fase('create_consultas'):
+            consultas = create_consultas(usuarios, base_data)
+        
+        # 6. Crear historiales
+        with medir_fase('create_historiales'):
+            historiales = create_historiales(usuarios, consultas)
+        
+        # 7. Crear planes y presupuestos
+        with medir_fase('create_planes_tratamiento'):
+            create_planes_tratamiento(usuarios, servicios)
+        
+        # 8. Crear inventario
+        with medir_fase('create_inventario'):
+            insumos = create_inventario()
+        
+        # 9. Dataset sintético escalado
+        if args.scale > 0:
+            if modo_escritura == 'upsert' and User.objects.filter(
+                username='paciente1@seed.clinica.com'
+            ).exists():
+                print("ℹ️  Dataset sintético ya presente, se omite en modo upsert")
+            else:
+                with medir_fase('create_scaled_dataset'):
+                    create_scaled_dataset(base_data, insumos, args.scale, seed=args.seed)
+        
+        # 10. Calendario de consultas
+        if args.calendario:
+            with medir_fase('generar_calendario_consultas'):
+                generar_calendario_consultas(base_data, *args.calendario,
+                                             ocupacion=args.ocupacion, seed=args.seed)
+
+
+def seed_tenant(schema, args):
+    """
+    Puebla el schema de un tenant (django-tenants) en el proceso actual.
+    Se ejecuta en un worker del pool: la salida por consola se descarta y se
+    retorna un resumen con la duración o el error.
+    """
+    from django_tenants.utils import schema_context
+    
+    inicio = time.perf_counter()
+    try:
+        with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo):
+            configurar_modos(args)
+            with schema_context(schema):
+                poblar(args)
+        return {'tenant': schema, 'exito': True, 'segundos': time.perf_counter() - inicio}
+    except Exception as e:
+        return {'tenant': schema, 'exito': False, 'segundos': time.perf_counter() - inicio,
+                'error': str(e)}
+    finally:
+        connections.close_all()
+
+
+def seed_tenants_en_paralelo(args):
+    """
+    Puebla varios tenants a la vez con un pool de procesos (una transacción por
+    tenant) e imprime el tiempo de cada uno. Retorna True si todos terminaron bien.
+    """
+    try:
+        import django_tenants  # noqa: F401
+    except ImportError:
+        print("❌ --tenants requiere django-tenants instalado en el backend")
+        return False
+    
+    tenants = [t.strip() for t in args.tenants.split(',') if t.strip()]
+    workers = min(args.workers or os.cpu_count() or 1, len(tenants))
+    print_section(f"🏢 POBLANDO {len(tenants)} TENANTS ({workers} procesos)")
+    
+    # Cada proceso abre sus propias conexiones; no heredar las del padre
+    connections.close_all()
+    
+    inicio = time.perf_counter()
+    resultados = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(seed_tenant, tenant, args) for tenant in tenants]
+        for futuro in as_completed(futuros):
+            resultado = futuro.result()
+            resultados.append(resultado)
+            estado = "✓" if resultado['exito'] else f"✗ {resultado['error']}"
+            print(f"  {resultado['tenant']:<20} {resultado['segundos']:>7.2f}s  {estado}")
+    
+    total = time.perf_counter() - inicio
+    secuencial = sum(r['segundos'] for r in resultados)
+    fallidos = [r for r in resultados if not r['exito']]
+    print(f"\n⏱️  Total: {total:.2f}s (suma por tenant: {secuencial:.2f}s, "
+          f"aceleración x{secuencial / total if total else 0:.1f})")
+    if fallidos:
+        print(f"❌ {len(fallidos)} tenants fallaron")
+    return not fallidos
 
 
 def main():
     """Función principal"""
+    args = parse_args()
+    
     print("\n" + "="*60)
     print("  🏥 SEEDER DE BASE DE DATOS - CLÍNICA DENTAL")
     print("="*60)
     
-    # Permitir --force para saltar confirmación
-    if len(sys.argv) > 1 and sys.argv[1] == '--force':
+    configurar_modos(args)
+    
+    # Permitir --force para saltar confirmación (--upsert no elimina nada)
+    if args.force:
         print("⚠️  Modo FORCE: Eliminando datos sin confirmación...")
-    else:
+    elif not args.upsert:
         print("\n⚠️  ADVERTENCIA: Este script eliminará TODOS los datos")
         print("¿Desea continuar? (s/n): ", end='')
         
@@ -760,33 +1872,52 @@ def main():
             print("❌ Operación cancelada")
             return
     
+    if args.tenants:
+        if not seed_tenants_en_paralelo(args):
+            sys.exit(1)
+        return
+    
+    inicio = time.perf_counter()
+    fecha_inicio = datetime.now()
+    if not args.sin_memoria:
+        tracemalloc.start()
+    
     try:
-        with transaction.atomic():
-            # 1. Destruir datos
-            destroy_all_data()
-            
-            # 2. Crear datos base
-            base_data = create_base_data()
-            
-            # 3. Crear usuarios
-            usuarios = create_users(base_data)
-            
-            # 4. Crear servicios
-            servicios = create_servicios()
-            
-            # 5. Crear consultas
-            consultas = create_consultas(usuarios, base_data)
-            
-            # 6. Crear historiales
-            historiales = create_historiales(usuarios, consultas)
-            
-            # 7. Crear planes y presupuestos
-            create_planes_tratamiento(usuarios, servicios)
+        checksum = checksum_seeder(args)
+        restaurado = False
+        if args.restore:
+            encabezado = leer_encabezado_snapshot(args.restore)
+            if encabezado and encabezado.get('checksum') == checksum:
+                print(f"ℹ️  Snapshot del {encabezado.get('creado', '?')[:10]}: "
+                      f"las fechas relativas (consultas, vencimientos) son las de ese día")
+                with medir_fase('restaurar_snapshot'):
+                    restaurar_snapshot(args.restore)
+                restaurado = True
+            else:
+                print("ℹ️  Snapshot inexistente o desactualizado: se ejecuta el seeder completo")
+        
+        if not restaurado:
+            poblar(args)
             
-            # 8. Crear inventario
-            create_inventario()
+            ruta_snapshot = args.restore or args.snapshot
+            if ruta_snapshot:
+                with medir_fase('guardar_snapshot'):
+                    guardar_snapshot(ruta_snapshot, checksum)
+        
+        if args.importar:
+            with medir_fase('importar_archivos') as fase:
+                importados = importar_archivos(args.importar, args.chunk_size)
+                if connection.vendor == 'postgresql':
+                    fase['filas_escritas'] += importados
         
         print_section("✅ SEEDER COMPLETADO EXITOSAMENTE")
+        print(f"⏱️  Duración: {time.perf_counter() - inicio:.2f}s (modo {modo_escritura})")
+        if args.metricas:
+            guardar_metricas(args.metricas, args, fecha_inicio, datetime.now())
+        if estadisticas_upsert:
+            insertadas = sum(e['insertadas'] for e in estadisticas_upsert.values())
+            actualizadas = sum(e['actualizadas'] for e in estadisticas_upsert.values())
+            print(f"♻️  Upsert: {insertadas} filas insertadas, {actualizadas} actualizadas")
         print("\n📝 CREDENCIALES DE ACCESO:")
         print("-" * 60)
         print("ADMIN:")
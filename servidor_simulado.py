@@ -0,0 +1,702 @@
+"""
+Backend simulado en memoria para la superficie /api/v1 que usan los flujos
+Implementa los endpoints que llaman flujo_00 a flujo_10, carga_virtual y
+token_cache (auth, usuarios, catálogos, citas, historia clínica, tratamientos,
+facturas, pagos, Stripe y chatbot) sobre colecciones en memoria con índices
+por los campos que se filtran, sin Django ni PostgreSQL. Sirve para medir el
+techo de rendimiento del propio arnés y para probar reintentos y concurrencia
+en condiciones controladas.
+
+    - Los datos iniciales usan los mismos ids que los flujos tienen fijos
+      (odontólogo 637, paciente 641, horarios desde 982, tipo de consulta 203,
+      estado de factura 148, tipo de pago 198) y los usuarios del seeder.
+    - Los listados responden paginados como DRF ({count, next, previous,
+      results}); los GET llevan ETag y responden 304 a If-None-Match.
+    - --latencia/--jitter agregan una demora artificial por petición y
+      --errores inyecta respuestas 503 (con Retry-After) en una fracción de
+      ellas, opcionalmente solo en las rutas que coinciden con --errores-ruta.
+    - chatbot/historial/ acepta desde_id=N para responder solo los mensajes
+      posteriores al N (historial incremental, ver flujo_07). conversacion_id
+      cambia cuando la conversación se reinicia, porque los ids vuelven a 1.
+    - GET /__simulado/estadisticas/ devuelve peticiones, errores inyectados
+      y tiempos por ruta; POST /__simulado/reiniciar/ vuelve a los datos iniciales.
+
+Ejecución:
+    python servidor_simulado.py
+    python servidor_simulado.py --puerto 8000 --latencia 20 --jitter 10 --errores 0.02
+    python servidor_simulado.py --pacientes 5000 --pagina 50 --errores 0.1 --errores-ruta 'citas/'
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+PREFIJO = '/api/v1/'
+
+
+class ErrorAPI(Exception):
+    """Respuesta de error con el formato {'error': ...} del backend"""
+
+    def __init__(self, status: int, mensaje: str):
+        super().__init__(mensaje)
+        self.status = status
+        self.mensaje = mensaje
+
+
+class Coleccion:
+    """Registros por id con índices secundarios (campo -> valor -> ids)"""
+
+    def __init__(self, campo_id: str, indices=(), primer_id: int = 1):
+        self.campo_id = campo_id
+        self.registros = {}
+        self.indices = {campo: defaultdict(set) for campo in indices}
+        self._siguiente = primer_id
+
+    def insertar(self, registro: dict) -> dict:
+        registro_id = registro.get(self.campo_id) or self._siguiente
+        self._siguiente = max(self._siguiente, registro_id + 1)
+        registro[self.campo_id] = registro['id'] = registro_id
+        self.registros[registro_id] = registro
+        self._indexar(registro)
+        return registro
+
+    def obtener(self, registro_id) -> dict:
+        registro = self.registros.get(_entero(registro_id))
+        if registro is None:
+            raise ErrorAPI(404, 'No encontrado.')
+        return registro
+
+    def actualizar(self, registro_id, cambios: dict) -> dict:
+        registro = self.obtener(registro_id)
+        self._desindexar(registro)
+        registro.update({k: v for k, v in cambios.items() if k not in (self.campo_id, 'id')})
+        self._indexar(registro)
+        return registro
+
+    def filtrar(self, **criterios) -> list:
+        """Registros que cumplen todos los criterios; los campos indexados no recorren la colección"""
+        criterios = {k: v for k, v in criterios.items() if v is not None}
+        indexados = [k for k in criterios if k in self.indices]
+        if indexados:
+            ids = set.intersection(*(self.indices[k].get(_clave(criterios[k]), set()) for k in indexados))
+            candidatos = [self.registros[i] for i in sorted(ids)]
+        else:
+            candidatos = list(self.registros.values())
+        resto = [k for k in criterios if k not in self.indices]
+        return [r for r in candidatos if all(_clave(r.get(k)) == _clave(criterios[k]) for k in resto)]
+
+    def _indexar(self, registro):
+        for campo, indice in self.indices.items():
+            indice[_clave(registro.get(campo))].add(registro[self.campo_id])
+
+    def _desindexar(self, registro):
+        for campo, indice in self.indices.items():
+            indice[_clave(registro.get(campo))].discard(registro[self.campo_id])
+
+
+def _clave(valor):
+    """Los filtros llegan como texto en la query string: se comparan como texto"""
+    return str(valor) if valor is not None else None
+
+
+def _entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorAPI(404, 'No encontrado.')
+
+
+class Almacen:
+    """Todas las colecciones del backend simulado y las sesiones abiertas"""
+
+    def __init__(self, pacientes_extra: int = 0, seed: int = 42):
+        self.lock = threading.RLock()
+        self.usuarios = Coleccion('codigo', indices=('correo', 'tipo_usuario'), primer_id=630)
+        self.tokens = {}
+        self.horarios = Coleccion('idhorario', primer_id=982)
+        self.tipos_consulta = Coleccion('idtipoconsulta', primer_id=203)
+        self.estados_consulta = Coleccion('idestadoconsulta', primer_id=150)
+        self.estados_factura = Coleccion('idestadofactura', primer_id=148)
+        self.tipos_pago = Coleccion('idtipopago', primer_id=198)
+        self.servicios = Coleccion('idservicio', primer_id=1)
+        self.procedimientos = Coleccion('idprocedimiento', primer_id=1)
+        self.consultas = Coleccion('codigo', indices=('codpaciente', 'cododontologo', 'fecha'), primer_id=1000)
+        self.historias = Coleccion('codigo', indices=('pacientecodigo',), primer_id=1)
+        self.planes = Coleccion('idplantratamiento', indices=('paciente',), primer_id=1)
+        self.presupuestos = Coleccion('idpresupuesto', indices=('plan_tratamiento',), primer_id=1)
+        self.facturas = Coleccion('idfactura', indices=('codpaciente',), primer_id=1)
+        self.pagos = Coleccion('idpago', indices=('idfactura',), primer_id=1)
+        self.pagos_online = Coleccion('codigo', indices=('paciente',), primer_id=1)
+        self.chat = defaultdict(list)
+        self.conversaciones = {}  # session_id -> conversacion_id, nuevo en cada reinicio
+        self._sembrar(pacientes_extra, random.Random(seed))
+
+    def _sembrar(self, pacientes_extra: int, rng: random.Random):
+        for correo, password, nombre, apellido, tipo, codigo in (
+            ('admin@clinica.com', 'admin123', 'Admin', 'Sistema', 'Administrador', 630),
+            ('dr.perez@clinica.com', 'odontologo123', 'Juan', 'Pérez', 'Odontologo', 637),
+            ('dra.lopez@clinica.com', 'odontologo123', 'María', 'López', 'Odontologo', 638),
+            ('ana.lopez@email.com', 'paciente123', 'Ana', 'López', 'Paciente', 641),
+            ('juan.perez@email.com', 'paciente123', 'Juan', 'Pérez', 'Paciente', 642),
+        ):
+            self.crear_usuario({'codigo': codigo, 'correo': correo, 'password': password, 'nombre': nombre,
+                                'apellido': apellido, 'tipo_usuario': tipo})
+        for i in range(pacientes_extra):
+            self.crear_usuario({'correo': f'paciente{i}@simulado.com', 'password': 'paciente123',
+                                'nombre': f'Paciente{i}', 'apellido': rng.choice(['Rojas', 'Vargas', 'Flores']),
+                                'tipo_usuario': 'Paciente'})
+
+        for minutos in range(8 * 60, 18 * 60, 30):
+            self.horarios.insertar({'hora': f"{minutos // 60:02d}:{minutos % 60:02d}:00"})
+        for nombre, duracion, costo in (('Primera Vez', 45, 150.0), ('Control', 30, 100.0),
+                                        ('Urgencia', 30, 200.0), ('Limpieza', 60, 180.0)):
+            self.tipos_consulta.insertar({'nombre': nombre, 'duracion_estimada': duracion, 'costo': costo})
+        for estado in ('Agendada', 'Confirmada', 'Atendida', 'Cancelada'):
+            self.estados_consulta.insertar({'estado': estado})
+        for estado in ('Pendiente', 'Pagada', 'Anulada'):
+            self.estados_factura.insertar({'estado': estado})
+        for nombre in ('Efectivo', 'Tarjeta', 'Transferencia', 'QR'):
+            self.tipos_pago.insertar({'nombrepago': nombre})
+        for nombre, precio in (('Limpieza dental', 180.0), ('Obturacion de resina', 250.0),
+                               ('Extraccion simple', 200.0), ('Endodoncia', 900.0)):
+            self.servicios.insertar({'nombre': nombre, 'descripcion': nombre, 'precio': precio, 'activo': True})
+            self.procedimientos.insertar({'nombre': nombre, 'costo': precio})
+
+    def crear_usuario(self, datos: dict) -> dict:
+        if self.usuarios.filtrar(correo=datos['correo']):
+            raise ErrorAPI(400, 'Ya existe un usuario con este correo.')
+        return self.usuarios.insertar({k: v for k, v in datos.items() if k != 'password_confirmacion'})
+
+    def abrir_sesion(self, usuario: dict) -> str:
+        token = secrets.token_hex(20)
+        self.tokens[token] = usuario['codigo']
+        return token
+
+
+def _publico(usuario: dict) -> dict:
+    return {k: v for k, v in usuario.items() if k != 'password'}
+
+
+# ----------------------------------------------------------------------
+# Handlers: (almacen, peticion) -> (status, cuerpo)
+# ----------------------------------------------------------------------
+def login(almacen, p):
+    usuarios = almacen.usuarios.filtrar(correo=p.cuerpo.get('correo'))
+    if not usuarios or usuarios[0].get('password') != p.cuerpo.get('password'):
+        raise ErrorAPI(400, 'Credenciales inválidas')
+    return 200, {'token': almacen.abrir_sesion(usuarios[0]), 'usuario': _publico(usuarios[0])}
+
+
+def registro(almacen, p):
+    faltantes = [c for c in ('correo', 'password', 'nombre', 'apellido') if not p.cuerpo.get(c)]
+    if faltantes:
+        raise ErrorAPI(400, f"Campos obligatorios: {', '.join(faltantes)}")
+    if p.cuerpo.get('password_confirmacion', p.cuerpo['password']) != p.cuerpo['password']:
+        raise ErrorAPI(400, 'Las contraseñas no coinciden')
+    usuario = almacen.crear_usuario(dict(p.cuerpo, tipo_usuario=p.cuerpo.get('tipo_usuario', 'Paciente')))
+    return 201, {'token': almacen.abrir_sesion(usuario), 'usuario': _publico(usuario)}
+
+
+def perfil(almacen, p):
+    if p.metodo == 'PATCH':
+        cambios = {k: v for k, v in p.cuerpo.items() if k not in ('password', 'correo', 'tipo_usuario')}
+        almacen.usuarios.actualizar(p.usuario['codigo'], cambios)
+    return 200, _publico(p.usuario)
+
+
+def cambiar_password(almacen, p):
+    if p.cuerpo.get('password_actual') != p.usuario.get('password'):
+        raise ErrorAPI(400, 'La contraseña actual no es correcta')
+    if p.cuerpo.get('password_nuevo') != p.cuerpo.get('password_confirmacion', p.cuerpo.get('password_nuevo')):
+        raise ErrorAPI(400, 'Las contraseñas no coinciden')
+    almacen.usuarios.actualizar(p.usuario['codigo'], {'password': p.cuerpo['password_nuevo']})
+    return 200, {'mensaje': 'Contraseña actualizada'}
+
+
+def logout(almacen, p):
+    almacen.tokens.pop(p.token, None)
+    return 200, {'mensaje': 'Sesión cerrada'}
+
+
+def verificar_token(almacen, p):
+    return 200, {'valido': True, 'usuario': _publico(p.usuario)}
+
+
+def listar_usuarios(almacen, p):
+    if p.usuario['tipo_usuario'] != 'Administrador':
+        raise ErrorAPI(403, 'No tiene permiso para realizar esta acción.')
+    return 200, [_publico(u) for u in almacen.usuarios.filtrar(tipo_usuario=p.params.get('tipo_usuario'))]
+
+
+def listar_odontologos(almacen, p):
+    return 200, [_publico(u) for u in almacen.usuarios.filtrar(tipo_usuario='Odontologo')]
+
+
+def catalogo(nombre):
+    def listar(almacen, p):
+        return 200, list(getattr(almacen, nombre).registros.values())
+    return listar
+
+
+def horarios_disponibles(almacen, p):
+    fecha, odontologo = p.params.get('fecha'), p.params.get('odontologo_id')
+    if not fecha or not odontologo:
+        raise ErrorAPI(400, 'Se requieren fecha y odontologo_id')
+    ocupados = {c['idhorario'] for c in almacen.consultas.filtrar(cododontologo=odontologo, fecha=fecha)
+                if c['estado'] != 'cancelada'}
+    # Lista simple, no paginada: así responde la acción del backend
+    return 200, _SinPaginar(h for h in almacen.horarios.registros.values() if h['idhorario'] not in ocupados)
+
+
+def listar_consultas(almacen, p):
+    criterios = {'codpaciente': p.params.get('paciente'), 'cododontologo': p.params.get('odontologo'),
+                 'fecha': p.params.get('fecha'), 'estado': p.params.get('estado')}
+    if p.usuario['tipo_usuario'] == 'Paciente':
+        criterios['codpaciente'] = p.usuario['codigo']
+    elif p.usuario['tipo_usuario'] == 'Odontologo':
+        criterios['cododontologo'] = p.usuario['codigo']
+    return 200, almacen.consultas.filtrar(**criterios)
+
+
+def crear_consulta(almacen, p):
+    datos = p.cuerpo
+    faltantes = [c for c in ('codpaciente', 'cododontologo', 'fecha', 'idhorario') if not datos.get(c)]
+    if faltantes:
+        raise ErrorAPI(400, f"Campos obligatorios: {', '.join(faltantes)}")
+    almacen.horarios.obtener(datos['idhorario'])
+    ocupado = any(c['idhorario'] == datos['idhorario'] and c['estado'] != 'cancelada'
+                  for c in almacen.consultas.filtrar(cododontologo=datos['cododontologo'], fecha=datos['fecha']))
+    if ocupado:
+        raise ErrorAPI(400, 'El horario ya está ocupado para este odontólogo')
+    consulta = almacen.consultas.insertar(dict(datos, estado='agendada', creado=datetime.now().isoformat()))
+    pago_id = datos.get('pago_id')
+    if pago_id and pago_id in almacen.pagos_online.registros:
+        almacen.pagos_online.actualizar(pago_id, {'consulta': consulta['codigo']})
+        consulta['pago_vinculado'] = True
+    return 201, consulta
+
+
+def detalle(nombre):
+    def obtener(almacen, p):
+        return 200, getattr(almacen, nombre).obtener(p.ids[0])
+    return obtener
+
+
+def actualizar(nombre):
+    def modificar(almacen, p):
+        return 200, getattr(almacen, nombre).actualizar(p.ids[0], p.cuerpo)
+    return modificar
+
+
+def cancelar_consulta(almacen, p):
+    consulta = almacen.consultas.obtener(p.ids[0])
+    if consulta['estado'] == 'cancelada':
+        raise ErrorAPI(400, 'La consulta ya está cancelada')
+    return 200, almacen.consultas.actualizar(p.ids[0], {
+        'estado': 'cancelada', 'motivo_cancelacion': p.cuerpo.get('motivo_cancelacion', '')
+    })
+
+
+def listar_historias(almacen, p):
+    return 200, almacen.historias.filtrar(pacientecodigo=p.params.get('paciente'))
+
+
+def crear_historia(almacen, p):
+    if not p.cuerpo.get('pacientecodigo'):
+        raise ErrorAPI(400, 'pacientecodigo es obligatorio')
+    almacen.usuarios.obtener(p.cuerpo['pacientecodigo'])
+    return 201, almacen.historias.insertar(dict(p.cuerpo, diagnosticos=[], fecha=date.today().isoformat()))
+
+
+def agregar_diagnostico(almacen, p):
+    historia = almacen.historias.obtener(p.ids[0])
+    diagnostico = dict(p.cuerpo, id=len(historia['diagnosticos']) + 1)
+    historia['diagnosticos'].append(diagnostico)
+    return 201, diagnostico
+
+
+def listar_planes(almacen, p):
+    return 200, almacen.planes.filtrar(paciente=p.params.get('paciente'))
+
+
+def crear_en(nombre, obligatorios=()):
+    def crear(almacen, p):
+        faltantes = [c for c in obligatorios if p.cuerpo.get(c) in (None, '')]
+        if faltantes:
+            raise ErrorAPI(400, f"Campos obligatorios: {', '.join(faltantes)}")
+        return 201, getattr(almacen, nombre).insertar(dict(p.cuerpo))
+    return crear
+
+
+def listar_facturas(almacen, p):
+    return 200, almacen.facturas.filtrar(codpaciente=p.params.get('paciente'))
+
+
+def registrar_pago(almacen, p):
+    if not p.cuerpo.get('idfactura'):
+        raise ErrorAPI(400, 'idfactura es obligatorio')
+    factura = almacen.facturas.obtener(p.cuerpo['idfactura'])
+    pago = almacen.pagos.insertar(dict(p.cuerpo))
+    pagado = sum(float(x.get('montopagado') or 0) for x in almacen.pagos.filtrar(idfactura=factura['idfactura']))
+    if pagado >= float(factura.get('montototal') or 0):
+        almacen.facturas.actualizar(factura['idfactura'], {'estado': 'pagada'})
+    return 201, pago
+
+
+def listar_pagos(almacen, p):
+    return 200, almacen.pagos.filtrar(idfactura=p.params.get('factura'))
+
+
+def crear_intencion(almacen, p):
+    tipo = almacen.tipos_consulta.obtener(p.cuerpo.get('tipo_consulta_id'))
+    pago = almacen.pagos_online.insertar({
+        'paciente': p.usuario['codigo'],
+        'monto': p.cuerpo.get('monto') or tipo['costo'],
+        'estado': 'pendiente',
+        'payment_intent': f"pi_{secrets.token_hex(12)}",
+        'consulta': None
+    })
+    return 201, {'client_secret': f"{pago['payment_intent']}_secret_{secrets.token_hex(8)}",
+                 'pago_id': pago['codigo'], 'codigo_pago': f"PAGO-{pago['codigo']:06d}"}
+
+
+def confirmar_pago(almacen, p):
+    pago = almacen.pagos_online.actualizar(p.cuerpo.get('pago_id'), {'estado': 'aprobado'})
+    return 200, {'estado': pago['estado'], 'pago_id': pago['codigo']}
+
+
+def listar_pagos_online(almacen, p):
+    if p.usuario['tipo_usuario'] == 'Paciente':
+        return 200, almacen.pagos_online.filtrar(paciente=p.usuario['codigo'])
+    return 200, list(almacen.pagos_online.registros.values())
+
+
+def chatbot_mensaje(almacen, p):
+    session_id = p.cuerpo.get('session_id') or str(uuid.uuid4())
+    if not p.cuerpo.get('mensaje'):
+        raise ErrorAPI(400, 'El mensaje es obligatorio')
+    historial = almacen.chat[session_id]
+    almacen.conversaciones.setdefault(session_id, str(uuid.uuid4()))
+    ahora = datetime.now().isoformat()
+    respuesta = f"Recibido: {p.cuerpo['mensaje'][:80]}. ¿En qué más puedo ayudarle?"
+    historial.append({'id': len(historial) + 1, 'rol': 'usuario', 'mensaje': p.cuerpo['mensaje'], 'fecha': ahora})
+    historial.append({'id': len(historial) + 1, 'rol': 'bot', 'mensaje': respuesta, 'fecha': ahora})
+    return 200, {'session_id': session_id, 'mensaje': respuesta, 'total_mensajes': len(historial)}
+
+
+def chatbot_historial(almacen, p):
+    session_id = p.params.get('session_id')
+    if not session_id:
+        raise ErrorAPI(400, 'session_id es obligatorio')
+    mensajes = almacen.chat.get(session_id, [])
+    respuesta = {
+        'session_id': session_id,
+        'conversacion_id': almacen.conversaciones.get(session_id),
+        'ultimo_id': mensajes[-1]['id'] if mensajes else 0
+    }
+    if 'desde_id' not in p.params:
+        return 200, dict(respuesta, mensajes=list(mensajes))
+    # Incremental: los ids son la posición en la conversación, así que basta un corte
+    try:
+        desde = max(int(p.params['desde_id']), 0)
+    except ValueError:
+        raise ErrorAPI(400, 'desde_id debe ser un número')
+    return 200, dict(respuesta, desde_id=desde, mensajes=mensajes[desde:])
+
+
+def chatbot_reset(almacen, p):
+    almacen.chat.pop(p.cuerpo.get('session_id'), None)
+    almacen.conversaciones.pop(p.cuerpo.get('session_id'), None)
+    return 200, {'mensaje': 'Conversación reiniciada'}
+
+
+class _SinPaginar(list):
+    """Listado que se responde tal cual, sin envolver en la página de DRF"""
+
+
+# (método, ruta relativa a /api/v1/, handler, requiere token)
+RUTAS = [
+    ('POST', r'auth/login/', login, False),
+    ('POST', r'auth/registro/', registro, False),
+    ('GET', r'auth/perfil/', perfil, True),
+    ('PATCH', r'auth/perfil/', perfil, True),
+    ('POST', r'auth/cambiar-password/', cambiar_password, True),
+    ('POST', r'auth/logout/', logout, True),
+    ('GET', r'auth/verificar-token/', verificar_token, True),
+    ('GET', r'usuarios/', listar_usuarios, True),
+    ('GET', r'profesionales/odontologos/', listar_odontologos, True),
+    ('GET', r'servicios/servicios/', catalogo('servicios'), True),
+    ('GET', r'citas/horarios/', catalogo('horarios'), True),
+    ('GET', r'citas/tipos-consulta/', catalogo('tipos_consulta'), True),
+    ('GET', r'citas/estados-consulta/', catalogo('estados_consulta'), True),
+    ('GET', r'citas/horarios-disponibles/', horarios_disponibles, True),
+    ('GET', r'citas/consultas/', listar_consultas, True),
+    ('POST', r'citas/consultas/', crear_consulta, True),
+    ('GET', r'citas/consultas/(\d+)/', detalle('consultas'), True),
+    ('PATCH', r'citas/consultas/(\d+)/', actualizar('consultas'), True),
+    ('POST', r'citas/consultas/(\d+)/cancelar/', cancelar_consulta, True),
+    ('GET', r'historia-clinica/', listar_historias, True),
+    ('POST', r'historia-clinica/', crear_historia, True),
+    ('GET', r'historia-clinica/(\d+)/', detalle('historias'), True),
+    ('PATCH', r'historia-clinica/(\d+)/', actualizar('historias'), True),
+    ('POST', r'historia-clinica/(\d+)/diagnosticos/', agregar_diagnostico, True),
+    ('GET', r'tratamientos/procedimientos/', catalogo('procedimientos'), True),
+    ('GET', r'tratamientos/planes-tratamiento/', listar_planes, True),
+    ('POST', r'tratamientos/planes-tratamiento/', crear_en('planes', ('paciente', 'odontologo')), True),
+    ('POST', r'tratamientos/presupuestos/', crear_en('presupuestos', ('plan_tratamiento',)), True),
+    ('GET', r'tratamientos/presupuestos/(\d+)/', detalle('presupuestos'), True),
+    ('GET', r'pagos/estados-factura/', catalogo('estados_factura'), True),
+    ('GET', r'pagos/tipos-pago/', catalogo('tipos_pago'), True),
+    ('GET', r'pagos/facturas/', listar_facturas, True),
+    ('POST', r'pagos/facturas/', crear_en('facturas', ('montototal',)), True),
+    ('GET', r'pagos/facturas/(\d+)/', detalle('facturas'), True),
+    ('GET', r'pagos/', listar_pagos, True),
+    ('POST', r'pagos/', registrar_pago, True),
+    ('POST', r'pagos/stripe/crear-intencion-consulta/', crear_intencion, True),
+    ('POST', r'pagos/stripe/confirmar-pago/', confirmar_pago, True),
+    ('GET', r'pagos/pagos-online/', listar_pagos_online, True),
+    ('GET', r'pagos/pagos-online/(\d+)/', detalle('pagos_online'), True),
+    ('POST', r'chatbot/mensaje/', chatbot_mensaje, False),
+    ('GET', r'chatbot/historial/', chatbot_historial, False),
+    ('POST', r'chatbot/reset/', chatbot_reset, False),
+]
+_RUTAS = [(metodo, ruta, re.compile(f"^{ruta}$"), handler, privada) for metodo, ruta, handler, privada in RUTAS]
+
+
+def _plantilla(relativa: str) -> str:
+    """Ruta de RUTAS que atiende la petición (agrupa las estadísticas sin los ids)"""
+    return next((ruta for _, ruta, patron, _, _ in _RUTAS if patron.match(relativa)), relativa)
+
+
+class Peticion:
+    def __init__(self, metodo, params, cuerpo, ids, token=None, usuario=None):
+        self.metodo = metodo
+        self.params = params
+        self.cuerpo = cuerpo
+        self.ids = ids
+        self.token = token
+        self.usuario = usuario
+
+
+class Estadisticas:
+    """Peticiones, errores inyectados y tiempo de servicio por ruta"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+        self.por_ruta = defaultdict(lambda: {'peticiones': 0, 'errores_inyectados': 0, 'total_ms': 0.0})
+
+    def registrar(self, ruta: str, duracion: float, inyectado: bool):
+        with self._lock:
+            entrada = self.por_ruta[ruta]
+            entrada['peticiones'] += 1
+            entrada['errores_inyectados'] += int(inyectado)
+            entrada['total_ms'] += duracion * 1000
+
+    def resumen(self) -> dict:
+        with self._lock:
+            peticiones = sum(e['peticiones'] for e in self.por_ruta.values())
+            segundos = max(time.time() - self.inicio, 1e-9)
+            return {
+                'peticiones': peticiones,
+                'peticiones_por_segundo': round(peticiones / segundos, 2),
+                'errores_inyectados': sum(e['errores_inyectados'] for e in self.por_ruta.values()),
+                'rutas': {ruta: dict(e, promedio_ms=round(e['total_ms'] / e['peticiones'], 3),
+                                     total_ms=round(e['total_ms'], 3))
+                          for ruta, e in sorted(self.por_ruta.items())}
+            }
+
+
+class ManejadorSimulado(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'ServidorSimulado/1.0'
+    # Se completan en crear_servidor()
+    almacen = None
+    estadisticas = None
+    opciones = None
+
+    def log_message(self, formato, *args):
+        if self.opciones.verbose:
+            super().log_message(formato, *args)
+
+    def do_GET(self):
+        self._atender('GET')
+
+    def do_POST(self):
+        self._atender('POST')
+
+    def do_PATCH(self):
+        self._atender('PATCH')
+
+    def do_PUT(self):
+        self._atender('PUT')
+
+    def do_DELETE(self):
+        self._atender('DELETE')
+
+    def _atender(self, metodo: str):
+        inicio = time.perf_counter()
+        partes = urlsplit(self.path)
+        ruta = partes.path
+        largo = int(self.headers.get('Content-Length') or 0)
+        crudo = self.rfile.read(largo) if largo else b''
+
+        if ruta.startswith('/__simulado/'):
+            self._administrar(metodo, ruta)
+            return
+
+        opciones = self.opciones
+        if opciones.latencia or opciones.jitter:
+            time.sleep(max(opciones.latencia + random.uniform(-opciones.jitter, opciones.jitter), 0) / 1000)
+
+        relativa = ruta[len(PREFIJO):] if ruta.startswith(PREFIJO) else None
+        inyectar = bool(relativa is not None and opciones.errores > 0
+                        and (not opciones.errores_ruta or re.search(opciones.errores_ruta, relativa))
+                        and random.random() < opciones.errores)
+        if inyectar:
+            status, cuerpo, extra = 503, {'error': 'Error inyectado por el servidor simulado'}, {'Retry-After': '0'}
+            plantilla = _plantilla(relativa)
+        else:
+            status, cuerpo, plantilla = self._resolver(metodo, relativa, partes.query, crudo)
+            extra = {}
+        self._responder(metodo, status, cuerpo, extra)
+        self.estadisticas.registrar(f"{metodo} {plantilla or ruta}", time.perf_counter() - inicio, inyectar)
+
+    def _resolver(self, metodo, relativa, query, crudo):
+        """(status, cuerpo, plantilla de la ruta) de una petición a /api/v1/"""
+        if relativa is None:
+            return 404, {'detail': 'No encontrado.'}, None
+        coincidencias = [r for r in _RUTAS if r[2].match(relativa)]
+        if not coincidencias:
+            return 404, {'detail': 'No encontrado.'}, None
+        elegida = next((c for c in coincidencias if c[0] == metodo), None)
+        if elegida is None:
+            return 405, {'detail': f'Método "{metodo}" no permitido.'}, coincidencias[0][1]
+        _, plantilla, patron, handler, privada = elegida
+
+        try:
+            cuerpo = json.loads(crudo) if crudo else {}
+        except ValueError:
+            return 400, {'detail': 'JSON inválido.'}, plantilla
+        params = dict(parse_qsl(query))
+        with self.almacen.lock:
+            peticion = Peticion(metodo, params, cuerpo, patron.match(relativa).groups())
+            autorizacion = self.headers.get('Authorization', '')
+            if autorizacion.startswith('Token '):
+                peticion.token = autorizacion[len('Token '):]
+                codigo = self.almacen.tokens.get(peticion.token)
+                peticion.usuario = self.almacen.usuarios.registros.get(codigo)
+            if privada and peticion.usuario is None:
+                return 401, {'detail': 'Las credenciales de autenticación no se proveyeron.'}, plantilla
+            try:
+                status, respuesta = handler(self.almacen, peticion)
+            except ErrorAPI as e:
+                return e.status, {'error': e.mensaje}, plantilla
+            except Exception as e:
+                return 500, {'error': f"{type(e).__name__}: {e}"}, plantilla
+            paginar = metodo == 'GET' and isinstance(respuesta, list) and not isinstance(respuesta, _SinPaginar)
+            # Se copia dentro del lock: los registros pueden cambiar en otro hilo
+            respuesta = json.loads(json.dumps(respuesta, default=str))
+        if paginar:
+            respuesta = self._paginar(relativa, params, respuesta)
+        return status, respuesta, plantilla
+
+    def _paginar(self, relativa, params, registros):
+        tamano = int(params.get('page_size') or self.opciones.pagina)
+        if tamano <= 0:
+            return registros
+        pagina = max(int(params.get('page') or 1), 1)
+        base = f"http://{self.headers.get('Host', 'localhost')}{PREFIJO}{relativa}"
+
+        def enlace(numero):
+            return f"{base}?{urlencode(dict(params, page=numero))}"
+
+        return {
+            'count': len(registros),
+            'next': enlace(pagina + 1) if pagina * tamano < len(registros) else None,
+            'previous': enlace(pagina - 1) if pagina > 1 else None,
+            'results': registros[(pagina - 1) * tamano:pagina * tamano]
+        }
+
+    def _responder(self, metodo, status, cuerpo, extra):
+        contenido = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json', **extra}
+        if metodo == 'GET' and status == 200:
+            etag = f'"{hashlib.sha1(contenido).hexdigest()}"'
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                status, contenido = 304, b''
+        self.send_response(status)
+        for nombre, valor in headers.items():
+            self.send_header(nombre, valor)
+        self.send_header('Content-Length', str(len(contenido)))
+        self.end_headers()
+        if contenido:
+            self.wfile.write(contenido)
+
+    def _administrar(self, metodo, ruta):
+        if metodo == 'GET' and ruta == '/__simulado/estadisticas/':
+            self._responder(metodo, 200, self.estadisticas.resumen(), {'Cache-Control': 'no-store'})
+        elif metodo == 'POST' and ruta == '/__simulado/reiniciar/':
+            ManejadorSimulado.almacen = Almacen(self.opciones.pacientes, self.opciones.seed)
+            ManejadorSimulado.estadisticas = Estadisticas()
+            self._responder(metodo, 200, {'mensaje': 'Datos reiniciados'}, {})
+        else:
+            self._responder(metodo, 404, {'detail': 'No encontrado.'}, {})
+
+
+def crear_servidor(opciones) -> ThreadingHTTPServer:
+    ManejadorSimulado.almacen = Almacen(opciones.pacientes, opciones.seed)
+    ManejadorSimulado.estadisticas = Estadisticas()
+    ManejadorSimulado.opciones = opciones
+    servidor = ThreadingHTTPServer((opciones.host, opciones.puerto), ManejadorSimulado)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Backend simulado en memoria para los flujos de prueba')
+    parser.add_argument('--host', default='127.0.0.1', help='Interfaz donde escuchar (default: 127.0.0.1)')
+    parser.add_argument('--puerto', type=int, default=8000, help='Puerto (default: 8000, el de los flujos)')
+    parser.add_argument('--latencia', type=float, default=0.0, help='Demora artificial por petición en ms')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Variación aleatoria (+/- ms) de la demora')
+    parser.add_argument('--errores', type=float, default=0.0,
+                        help='Fracción de peticiones que responden 503 (default: 0)')
+    parser.add_argument('--errores-ruta', default='',
+                        help='Inyectar errores solo en rutas que coinciden con esta regex (relativa a /api/v1/)')
+    parser.add_argument('--pagina', type=int, default=20,
+                        help='Registros por página de los listados; 0 responde listas sin paginar (default: 20)')
+    parser.add_argument('--pacientes', type=int, default=0, help='Pacientes extra generados al iniciar')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla de los datos generados')
+    parser.add_argument('--verbose', action='store_true', help='Imprimir cada petición recibida')
+    return parser.parse_args(argv)
+
+
+def main():
+    opciones = parse_args()
+    servidor = crear_servidor(opciones)
+    print(f"🦷 Servidor simulado en http://{opciones.host}:{opciones.puerto}{PREFIJO}")
+    print(f"   Latencia: {opciones.latencia} ms ± {opciones.jitter} ms | Errores 503: {opciones.errores:.1%}"
+          f"{f' en {opciones.errores_ruta!r}' if opciones.errores_ruta else ''} | Página: {opciones.pagina}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        resumen = ManejadorSimulado.estadisticas.resumen()
+        print(f"\n📊 {resumen['peticiones']} peticiones ({resumen['peticiones_por_segundo']}/s), "
+              f"{resumen['errores_inyectados']} errores inyectados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Pruebas de la compuerta de regresiones de comparar_rendimiento.py
+
+Ejecución:
+    python -m pytest test_comparar_rendimiento.py
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
+
+import comparar_rendimiento
+
+ENDPOINT = 'GET /api/v1/citas/{id}/'
+
+
+def _reporte(directorio, nombre, duraciones_ms):
+    """Escribe un salida_flujo02.json mínimo con una transacción por duración"""
+    ruta = os.path.join(directorio, nombre)
+    os.makedirs(ruta)
+    with open(os.path.join(ruta, 'salida_flujo02.json'), 'w', encoding='utf-8') as f:
+        json.dump({
+            'flujo': {'numero': 2, 'nombre': 'Gestion de Citas'},
+            'secciones': [],
+            'transacciones': [{'endpoint': ENDPOINT, 'total_ms': ms} for ms in duraciones_ms]
+        }, f)
+    return ruta
+
+
+def _comparar(base_ms, nuevo_ms, *opciones):
+    """Corre la compuerta y retorna (código de salida, comparación guardada)"""
+    directorio = tempfile.mkdtemp()
+    salida = os.path.join(directorio, 'comparacion.json')
+    argv = ['comparar_rendimiento.py', _reporte(directorio, 'base', base_ms),
+            _reporte(directorio, 'nuevo', nuevo_ms), '--salida', salida, *opciones]
+    codigo = 0
+    with mock.patch.object(sys, 'argv', argv), redirect_stdout(StringIO()):
+        try:
+            comparar_rendimiento.main()
+        except SystemExit as e:
+            codigo = e.code
+    with open(salida, encoding='utf-8') as f:
+        return codigo, json.load(f)
+
+
+class CompuertaTest(unittest.TestCase):
+
+    def test_pocas_muestras_con_regresion_fallan(self):
+        codigo, comparacion = _comparar([20, 22, 21], [200, 215, 210])
+        endpoint = comparacion['flujos'][0]['endpoints'][0]
+        self.assertEqual(codigo, 1)
+        self.assertEqual(endpoint['prueba'], 'solo_umbral')
+        self.assertTrue(endpoint['regresion'])
+
+    def test_pocas_muestras_sin_cambio_pasan(self):
+        codigo, comparacion = _comparar([20, 22, 21], [21, 20, 23])
+        self.assertEqual(codigo, 0)
+        self.assertEqual(comparacion['regresiones'], [])
+
+    def test_muchas_muestras_usan_la_prueba_u(self):
+        base = [20 + i % 5 for i in range(20)]
+        codigo, comparacion = _comparar(base, [10 * ms for ms in base])
+        self.assertEqual(codigo, 1)
+        self.assertEqual(comparacion['flujos'][0]['endpoints'][0]['prueba'], 'mann-whitney')
+
+    def test_muchas_muestras_no_significativas_pasan(self):
+        # Un solo valor atípico sube el p95 pero la prueba U no lo considera significativo
+        base = [20 + i % 5 for i in range(20)]
+        codigo, comparacion = _comparar(base, base[:-1] + [400])
+        self.assertEqual(codigo, 0)
+        self.assertFalse(comparacion['flujos'][0]['endpoints'][0]['regresion'])
+
+
+if __name__ == '__main__':
+    unittest.main()
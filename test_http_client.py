@@ -0,0 +1,87 @@
+"""
+Pruebas de los contadores de conexiones de http_client
+
+Ejecución:
+    python -m pytest test_http_client.py
+"""
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip('requests')
+
+from http_client import ClienteHTTP  # noqa: E402
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        cuerpo = json.dumps({'ok': True}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+class ConexionesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        cls.url = f"http://127.0.0.1:{cls.servidor.server_port}/"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+
+    def test_keep_alive_reutiliza_la_conexion(self):
+        cliente = ClienteHTTP()
+        for _ in range(3):
+            cliente.get(self.url)
+        self.assertEqual(cliente.conexiones_abiertas, 1)
+        self.assertEqual(cliente.conexiones_reutilizadas, 2)
+
+    def test_casete_no_cuenta_como_reutilizada(self):
+        ruta = os.path.join(tempfile.mkdtemp(), 'casete.jsonl.gz')
+        grabador = ClienteHTTP()
+        grabador.usar_casete(ruta, 'grabar')
+        for _ in range(3):
+            grabador.get(self.url)
+        grabador.casete.guardar()
+
+        reproductor = ClienteHTTP()
+        reproductor.usar_casete(ruta, 'reproducir')
+        for _ in range(3):
+            reproductor.get(self.url)
+        self.assertEqual(reproductor.peticiones, 3)
+        self.assertEqual(reproductor.peticiones_red, 0)
+        self.assertEqual(reproductor.conexiones_reutilizadas, 0)
+
+    def test_motor_async_se_recrea_con_otro_limite(self):
+        pytest.importorskip('aiohttp')
+        cliente = ClienteHTTP()
+        primero = cliente.usar_motor_async()
+        segundo = cliente.usar_motor_async(limite_conexiones=primero.limite_conexiones + 5)
+        try:
+            self.assertIsNot(primero, segundo)
+            self.assertEqual(segundo.limite_conexiones, primero.limite_conexiones + 5)
+            self.assertIs(cliente.usar_motor_async(), segundo)
+            self.assertEqual(cliente.get(self.url).status_code, 200)
+        finally:
+            cliente.cerrar()
+
+
+if __name__ == '__main__':
+    unittest.main()
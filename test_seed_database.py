@@ -0,0 +1,99 @@
+"""
+Pruebas del seeder contra una base de datos de prueba de Django
+
+Necesitan el backend (DJANGO_SETTINGS_MODULE=config.settings) en el PYTHONPATH
+y pytest-django, que crea y destruye la base de datos de prueba.
+
+Ejecución:
+    python -m pytest test_seed_database.py --ds=config.settings
+"""
+import json
+import os
+import sys
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
+
+import pytest
+
+pytest.importorskip('django')
+
+from django.test import TransactionTestCase  # noqa: E402
+
+import seed_database  # noqa: E402
+
+
+def _args(*argv):
+    """Opciones del seeder como si vinieran de la línea de comandos"""
+    with mock.patch.object(sys, 'argv', ['seed_database.py', *argv]):
+        return seed_database.parse_args()
+
+
+def _volcado():
+    """Todas las filas de los modelos del snapshot, con todas sus columnas"""
+    return {
+        modelo._meta.label: list(modelo.objects.order_by('pk').values_list(
+            *[f.attname for f in modelo._meta.concrete_fields]
+        ))
+        for modelo in seed_database.modelos_snapshot()
+    }
+
+
+class SnapshotTest(TransactionTestCase):
+
+    def test_restaurar_conserva_filas_y_fechas(self):
+        seed_database.poblar(_args('--force'))
+        ruta = os.path.join(tempfile.mkdtemp(), 'seed.snapshot.gz')
+        seed_database.guardar_snapshot(ruta, 'checksum')
+        antes = _volcado()
+
+        seed_database.restaurar_snapshot(ruta)
+
+        self.assertTrue(any(
+            getattr(campo, 'auto_now', False) or getattr(campo, 'auto_now_add', False)
+            for modelo in seed_database.modelos_snapshot() if modelo.objects.exists()
+            for campo in modelo._meta.concrete_fields
+        ), "el seeder no llenó ningún modelo con campos auto_now/auto_now_add")
+        self.assertEqual(_volcado(), antes)
+
+    def test_checksum_no_vence_a_medianoche(self):
+        args = _args('--force')
+        hoy = seed_database.checksum_seeder(args)
+
+        class Manana(date):
+            @classmethod
+            def today(cls):
+                return date.today() + timedelta(days=1)
+
+        with mock.patch.object(seed_database, 'date', Manana):
+            self.assertEqual(seed_database.checksum_seeder(args), hoy)
+
+
+class UpsertTest(TransactionTestCase):
+
+    def test_reseed_no_hashea_cuentas_existentes(self):
+        seed_database.poblar(_args('--force'))
+        args = _args('--upsert')
+        with mock.patch.multiple(seed_database, modo_escritura=seed_database.modo_escritura,
+                                 modo_hash=seed_database.modo_hash,
+                                 BULK_BATCH_SIZE=seed_database.BULK_BATCH_SIZE), \
+                mock.patch.object(seed_database, 'hash_password',
+                                  wraps=seed_database.hash_password) as hashear:
+            seed_database.configurar_modos(args)
+            seed_database.poblar(args)
+        self.assertEqual(hashear.call_count, 0)
+
+
+class CalendarioTest(TransactionTestCase):
+
+    def test_calendario_con_metricas(self):
+        ruta = os.path.join(tempfile.mkdtemp(), 'salida_seeder.json')
+        argv = ['seed_database.py', '--force', '--sin-memoria',
+                '--calendario', '2025-01-06:2025-01-11', '--metricas', ruta]
+        with mock.patch.object(sys, 'argv', argv):
+            seed_database.main()  # sys.exit(1) si alguna fase falla
+
+        with open(ruta, encoding='utf-8') as archivo:
+            metricas = json.load(archivo)
+        self.assertEqual(metricas['seeder']['opciones']['calendario'], ['2025-01-06', '2025-01-11'])
+        self.assertIn('generar_calendario_consultas', [f['fase'] for f in metricas['fases']])
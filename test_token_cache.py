@@ -0,0 +1,85 @@
+"""
+Pruebas de la caché de tokens junto con los casetes de http_client
+
+Ejecución:
+    python -m pytest test_token_cache.py
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import pytest
+
+pytest.importorskip('requests')
+
+import casetes  # noqa: E402
+import token_cache  # noqa: E402
+from http_client import ClienteHTTP  # noqa: E402
+
+BASE_URL = 'http://localhost:8000/api/v1'
+CORREO = 'admin@clinica.com'
+
+
+def _respuesta(url, status, cuerpo):
+    return casetes._a_response(url, {'status': status, 'headers': {'Content-Type': 'application/json'},
+                                     'cuerpo': json.dumps(cuerpo), 'codificacion': 'texto'})
+
+
+def _servidor(metodo, url, **kwargs):
+    """Backend mínimo: login y verificación de token"""
+    if url.endswith('/auth/login/'):
+        return _respuesta(url, 200, {'token': 'nuevo', 'usuario': {'correo': CORREO}})
+    if url.endswith('/auth/verificar-token/'):
+        return _respuesta(url, 200, {'valido': True})
+    return _respuesta(url, 404, {'detail': 'No encontrado'})
+
+
+def _cache_tibia(ruta):
+    """Archivo de caché con un token vigente para CORREO"""
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump({token_cache._clave(BASE_URL, CORREO): {
+            'token': 'viejo', 'usuario': {'correo': CORREO}, 'guardado': time.time()
+        }}, f)
+
+
+class CaseteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.casete = os.path.join(self.directorio, 'login.jsonl.gz')
+
+    def _login(self, cliente, cache):
+        with mock.patch.object(token_cache, 'cliente', cliente), \
+                mock.patch.object(token_cache, 'CACHE_PATH', cache):
+            return token_cache.login_cacheado(BASE_URL, CORREO, 'secreta')
+
+    def test_grabado_con_cache_tibia_se_reproduce_con_cache_fria(self):
+        cache_tibia = os.path.join(self.directorio, 'tibia.json')
+        _cache_tibia(cache_tibia)
+        grabador = ClienteHTTP()
+        grabador.usar_transporte(_servidor)
+        grabador.usar_casete(self.casete, 'grabar')
+        self.assertTrue(self._login(grabador, cache_tibia)[0])
+        grabador.casete.guardar()
+
+        reproductor = ClienteHTTP()
+        reproductor.usar_casete(self.casete, 'reproducir')
+        exito, token, _ = self._login(reproductor, os.path.join(self.directorio, 'fria.json'))
+        self.assertTrue(exito)
+        self.assertEqual(token, 'nuevo')
+        self.assertEqual(reproductor.casete.faltantes, 0)
+
+    def test_casete_no_escribe_la_cache(self):
+        cache = os.path.join(self.directorio, 'tokens.json')
+        cliente = ClienteHTTP()
+        cliente.usar_transporte(_servidor)
+        cliente.usar_casete(self.casete, 'grabar')
+        self._login(cliente, cache)
+        self.assertFalse(os.path.exists(cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Caché de tokens por rol compartida entre flujos
+Evita repetir el POST a auth/login/ (y su hash de contraseña) en cada flujo:
+el token se guarda en disco por (tenant, base_url, correo) y, antes de
+reutilizarlo, se comprueba con GET auth/verificar-token/. Solo si esa
+verificación falla (token vencido, logout en flujo_01, base recreada) se
+vuelve a hacer login.
+
+Con un casete activo (grabar o reproducir, ver casetes) la caché no se lee ni
+se escribe y siempre se hace login: así el casete contiene el POST a
+auth/login/ y se puede reproducir en una máquina con la caché fría o vencida.
+
+Uso:
+    from token_cache import login_cacheado
+
+    exito, token, usuario = login_cacheado(BASE_URL, correo, password)
+
+Variables de entorno:
+    FLUJO_TOKEN_CACHE   archivo de la caché (default: .cache/tokens.json)
+    FLUJO_TOKEN_TTL     segundos que una entrada se considera reutilizable (default: 43200)
+    FLUJO_TENANT        tenant activo (ver http_client); forma parte de la clave
+"""
+import json
+import os
+import tempfile
+import time
+from typing import Optional
+
+from http_client import TENANT, cliente
+
+CACHE_PATH = os.environ.get('FLUJO_TOKEN_CACHE', os.path.join('.cache', 'tokens.json'))
+TTL_SEGUNDOS = int(os.environ.get('FLUJO_TOKEN_TTL', '43200'))
+
+estadisticas = {'reutilizados': 0, 'logins': 0, 'invalidos': 0}
+
+
+def _clave(base_url: str, correo: str) -> str:
+    return f"{TENANT or 'public'}|{base_url.rstrip('/')}|{correo.lower()}"
+
+
+def _leer_cache() -> dict:
+    try:
+        with open(CACHE_PATH, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return {}
+
+
+def _escribir_cache(cambios: dict):
+    """Mezcla los cambios con lo que haya en disco y reemplaza el archivo de forma atómica"""
+    entradas = _leer_cache()
+    for clave, entrada in cambios.items():
+        if entrada is None:
+            entradas.pop(clave, None)
+        else:
+            entradas[clave] = entrada
+
+    directorio = os.path.dirname(CACHE_PATH) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as archivo:
+        json.dump(entradas, archivo, indent=2, ensure_ascii=False)
+    os.replace(temporal, CACHE_PATH)
+
+
+def token_valido(base_url: str, token: str) -> bool:
+    """Verificación barata del token contra auth/verificar-token/"""
+    try:
+        response = cliente.get(
+            f"{base_url.rstrip('/')}/auth/verificar-token/",
+            headers={"Authorization": f"Token {token}"}
+        )
+        return response.status_code == 200
+    except Exception:
+        return False
+
+
+def _desactivada() -> bool:
+    return cliente.casete is not None
+
+
+def token_en_cache(base_url: str, correo: str) -> Optional[tuple[str, dict]]:
+    """Retorna (token, usuario) si hay un token en caché vigente y el servidor lo acepta"""
+    if _desactivada():
+        return None
+    clave = _clave(base_url, correo)
+    entrada = _leer_cache().get(clave)
+    if not entrada or time.time() - entrada.get('guardado', 0) > TTL_SEGUNDOS:
+        return None
+
+    if not token_valido(base_url, entrada['token']):
+        estadisticas['invalidos'] += 1
+        _escribir_cache({clave: None})
+        return None
+
+    estadisticas['reutilizados'] += 1
+    return entrada['token'], entrada.get('usuario') or {}
+
+
+def guardar_token(base_url: str, correo: str, token: str, usuario: dict = None):
+    """Registra el token obtenido por un login"""
+    if not token:
+        return
+    estadisticas['logins'] += 1
+    if _desactivada():
+        return
+    _escribir_cache({_clave(base_url, correo): {
+        'token': token,
+        'usuario': usuario or {},
+        'guardado': time.time()
+    }})
+
+
+def invalidar(base_url: str, correo: str):
+    """Elimina la entrada de un usuario (p. ej. después de cambiarle la contraseña)"""
+    if _desactivada():
+        return
+    _escribir_cache({_clave(base_url, correo): None})
+
+
+def login_cacheado(base_url: str, correo: str, password: str) -> tuple[bool, str, dict]:
+    """Reutiliza el token en caché o hace login; retorna (exitoso, token, usuario)"""
+    en_cache = token_en_cache(base_url, correo)
+    if en_cache:
+        token, usuario = en_cache
+        return True, token, usuario
+
+    try:
+        response = cliente.post(
+            f"{base_url.rstrip('/')}/auth/login/",
+            json={"correo": correo, "password": password},
+            headers={"Content-Type": "application/json"}
+        )
+        if response.status_code == 200:
+            data = response.json()
+            guardar_token(base_url, correo, data.get("token"), data.get("usuario"))
+            return True, data.get("token"), data.get("usuario")
+        return False, "", {}
+    except Exception:
+        return False, "", {}
+
+
+def resumen() -> str:
+    return (f"{estadisticas['reutilizados']} tokens reutilizados, "
+            f"{estadisticas['logins']} logins, {estadisticas['invalidos']} invalidados")